@@ -3,13 +3,51 @@ Phase 2 Enhanced: Agentic Advisor with Validation & Orchestration
 Production-ready multi-agent system
 """
 
+import asyncio
+import contextvars
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from typing import List, Dict, Optional
 from dataclasses import dataclass
-import chromadb
 
 # Import Phase 2 components
-from validation_agent import ValidationAgent, AgentOrchestrator
+from validation_agent import ValidationAgent
+from workflow import Stage, WorkflowCancelled, WorkflowContext, arun_stages, run_stages
+from embeddings import get_shared_encoder
+from retrieval_backends import get_backend
+from fusion import FusedCandidate, fuse_candidates
+from ranking import RankingEngine, resolve_majors
+from catalog_store import CatalogStore
+from course_optimizer import SemesterOptimizer
+from scheduler import SemesterScheduler
+from degree_audit import DegreeAudit
+from program_similarity import ProgramSimilarity
+from course_neighbors import CourseNeighbors
+from materialized_views import MaterializedViews, catalog_fingerprint
+from prerequisites import PrerequisiteGraph, normalize_course_id
+from tracing import TRACE_MEMORY, count, record_llm_usage
+
+# Optional settings from config.py
+try:
+    from config import SEARCH_TIMEOUT_SECONDS
+except ImportError:
+    SEARCH_TIMEOUT_SECONDS = 5.0
+
+try:
+    from config import SEARCH_WORKERS
+except ImportError:
+    SEARCH_WORKERS = 24  # collection queries in flight across all requests (3 per search)
+
+try:
+    from config import PARALLEL_AGENTS
+except ImportError:
+    PARALLEL_AGENTS = True  # run independent agents concurrently
+
+try:
+    from config import AGENT_WORKERS
+except ImportError:
+    AGENT_WORKERS = 8  # stage threads shared by all requests of one advisor
 
 # Try to import OpenAI/Anthropic for LLM features
 try:
@@ -22,6 +60,13 @@ except ImportError:
     print("⚠️  LLM features not available (config.py or API libraries missing)")
 
 
+def default_async_client():
+    """openai.AsyncOpenAI for the configured key (None without an API key or with openai<1.0)."""
+    if not PHASE1_AVAILABLE or not hasattr(openai, "AsyncOpenAI"):
+        return None
+    return openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
+
+
 # ============================================================================
 # DATA STRUCTURES
 # ============================================================================
@@ -35,6 +80,7 @@ class StudentProfile:
     career_goals: str = ""
     preferred_difficulty: str = "moderate"
     desired_credits: int = 15
+    completed_courses: Optional[List[str]] = None  # e.g. ["MATH 112", "CS 111"]
     
     def __post_init__(self):
         # Convert interests to list if it's a string
@@ -46,8 +92,51 @@ class StudentProfile:
             self.goals = []
         if self.considering_majors is None:
             self.considering_majors = []
+        # Stored as course ids ("MATH112") to match the catalog
+        self.completed_courses = [normalize_course_id(c) for c in (self.completed_courses or [])]
+
+
+class Candidate:
+    """
+    One search hit: the document id, where it came from, how close it was,
+    and the metadata stored with it at build time. Uses __slots__ because a
+    request can produce hundreds of these.
+    """
+    __slots__ = ("doc_id", "collection", "query_index", "rank", "distance", "metadata")
+    
+    def __init__(self, doc_id: str, collection: str, query_index: int, rank: int,
+                 distance: float, metadata: Dict):
+        self.doc_id = doc_id
+        self.collection = collection
+        self.query_index = query_index
+        self.rank = rank
+        self.distance = distance
+        self.metadata = metadata
     
+    @property
+    def key(self) -> str:
+        """Catalog id (course_id or program_id) shared across collections."""
+        return self.metadata.get("course_id") or self.metadata.get("program_id") or self.doc_id
     
+    def __repr__(self) -> str:
+        return (f"Candidate({self.key!r}, {self.collection}, q={self.query_index}, "
+                f"rank={self.rank}, distance={self.distance:.4f})")
+
+
+def course_label(course) -> str:
+    """Display name for a recommended course (record dict or plain string)."""
+    if isinstance(course, dict):
+        return f"{course.get('course_name', 'Unknown')} - {course.get('title', '')}".rstrip(" -")
+    return str(course)
+
+
+def program_label(program) -> str:
+    """Display name for a recommended program (record dict or plain string)."""
+    if isinstance(program, dict):
+        return program.get("program_name", "Unknown program")
+    return str(program)
+
+
 # ============================================================================
 # BASIC AGENTS (Core functionality)
 # ============================================================================
@@ -55,7 +144,7 @@ class StudentProfile:
 class PlanningAgent:
     """Analyzes student profile and creates search strategy"""
     
-    def create_plan(self, profile: StudentProfile, programs_data: List[Dict]) -> Dict:
+    def create_plan(self, profile: StudentProfile, catalog: CatalogStore) -> Dict:
         print("\n📋 Planning Agent: Creating search strategy...")
         # Get interests as list
         interests_list = profile.interests_list if hasattr(profile, 'interests_list') else (
@@ -63,11 +152,12 @@ class PlanningAgent:
         )
         goals_list = profile.goals or []
         
-        # Find relevant programs based on interests
-        relevant_programs = [p for p in programs_data if any(
-            interest.lower() in p.get("name", "").lower() 
-            for interest in interests_list
-        )]
+        # Find relevant programs based on interests (word index over program names/categories)
+        relevant_programs = []
+        for interest in interests_list + goals_list:
+            for program in catalog.programs_matching(interest):
+                if program.program_name not in relevant_programs:
+                    relevant_programs.append(program.program_name)
         
         return {
             "search_queries": interests_list + goals_list,
@@ -82,54 +172,312 @@ class PlanningAgent:
 class SearchAgent:
     """Searches vector database for relevant courses"""
     
-    def __init__(self, db_dir: str = "chroma_db"):
-        self.client = chromadb.PersistentClient(path=db_dir)
-        
+    COLLECTIONS = ["programs", "classes", "overlap"]
+    
+    def __init__(self, db_dir: str = "chroma_db", backend: Optional[str] = None,
+                 n_results: int = 3, timeout: float = SEARCH_TIMEOUT_SECONDS,
+                 encoder=None, workers: int = SEARCH_WORKERS):
+        # Chroma or in-process NumPy search, chosen by RETRIEVAL_BACKEND.
+        # The backend is created once and keeps its collection handles.
+        self.backend = get_backend(backend, db_dir)
+        # Same encoder that built the database, so query vectors match
+        self.encoder = encoder if encoder is not None else get_shared_encoder()
+        self.n_results = n_results
+        self.timeout = timeout
+        # Bounded pool for database queries only, shared by all requests; sized
+        # for several concurrent searches (each needs one worker per collection)
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, len(self.COLLECTIONS)),
+                                            thread_name_prefix="search")
+    
+    def _query_collection(self, coll_name: str, query_embeddings,
+                          started: Dict[str, float]) -> Dict:
+        """Run one batched query against a collection (executes on the pool)."""
+        start = time.perf_counter()
+        started[coll_name] = start
+        result = self.backend.query(coll_name, query_embeddings, n_results=self.n_results)
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+    
     def search_courses(self, plan: Dict, profile: StudentProfile) -> Dict:
-        """Main search method called by Phase2AgenticCourseAdvisor"""
+        """
+        Main search method called by Phase2AgenticCourseAdvisor.
+        
+        Returns a Candidate list per collection. All queries are encoded in one batch, then the collections are
+        queried concurrently with one batched query each. A collection that
+        misses its deadline is reported under "timed_out" and the others are
+        returned as partial results. Results are merged in COLLECTIONS order,
+        never in completion order.
+        
+        Each query gets `timeout` seconds from when it starts executing, so
+        time spent queued behind other requests' queries does not count
+        against it; a query still queued `timeout` seconds after submission
+        (the pool is saturated) times out too.
+        """
         print("\n🔍 Search Agent: Querying database...")
-        results = {"programs": [], "classes": [], "overlap": []}
+        results = self._empty_results()
+        queries = self._queries(plan, profile)
+        if not queries:
+            return results
         
-        queries = plan.get("search_queries", [])
-        if isinstance(profile.interests, list):
-            queries.extend(profile.interests)
+        start = time.perf_counter()
+        query_embeddings = self.encoder.encode([str(q) for q in queries])
+        results["latency_ms"]["encode"] = round((time.perf_counter() - start) * 1000, 2)
+        count("encoder_calls")
+        count("texts_encoded", len(queries))
+        
+        # Fan out: one query per collection, each with its own deadline
+        started: Dict[str, float] = {}
+        submitted = time.perf_counter()
+        futures = {
+            coll_name: self._executor.submit(self._query_collection, coll_name, query_embeddings, started)
+            for coll_name in self.COLLECTIONS
+        }
         
-        for query in queries:
+        for coll_name in self.COLLECTIONS:
+            future = futures[coll_name]
             try:
-                # Search each collection
-                for coll_name in ["programs", "classes", "class_overlap"]:
-                    collection = self.client.get_collection(coll_name)
-                    result = collection.query(query_texts=[str(query)], n_results=3)
-                    documents = result.get('documents')
-                    if result and documents is not None and len(documents) > 0 and documents[0]:
-                        key = "overlap" if coll_name == "class_overlap" else coll_name
-                        results[key].extend(documents[0])
+                while True:
+                    queued = coll_name not in started
+                    try:
+                        result = future.result(timeout=self._time_left(started, coll_name, submitted))
+                        break
+                    except FuturesTimeoutError:
+                        # Started while we waited for it to start: wait out its own deadline
+                        if not (queued and coll_name in started):
+                            raise
+            except FuturesTimeoutError:
+                future.cancel()
+                count("db_timeouts")
+                results["timed_out"].append(coll_name)
+                print(f"   ⚠️  {coll_name} timed out after {self.timeout}s - returning partial results")
+                continue
             except Exception as e:
                 print(f"   ⚠️  Error searching {coll_name}: {e}")
-                
+                continue
+            self._collect(results, coll_name, result)
+        
+        self._report(results, queries)
         return results
+    
+    async def asearch_courses(self, plan: Dict, profile: StudentProfile) -> Dict:
+        """
+        asyncio version of search_courses (same result and deadlines).
+        Encoding runs on the loop's default executor and the blocking
+        database calls on the search pool, so the event loop only waits.
+        """
+        print("\n🔍 Search Agent: Querying database...")
+        results = self._empty_results()
+        queries = self._queries(plan, profile)
+        if not queries:
+            return results
+        
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        # CPU-bound: off the event loop (context copied so cache counters reach the trace)
+        query_embeddings = await loop.run_in_executor(
+            None, contextvars.copy_context().run,
+            self.encoder.encode, [str(q) for q in queries])
+        results["latency_ms"]["encode"] = round((time.perf_counter() - start) * 1000, 2)
+        count("encoder_calls")
+        count("texts_encoded", len(queries))
+        
+        started: Dict[str, float] = {}
+        submitted = time.perf_counter()
+        futures = {
+            coll_name: loop.run_in_executor(self._executor, self._query_collection,
+                                            coll_name, query_embeddings, started)
+            for coll_name in self.COLLECTIONS
+        }
+        finished = await asyncio.gather(*(self._await_query(futures[coll_name], started, coll_name, submitted)
+                                          for coll_name in self.COLLECTIONS))
+        
+        for coll_name, in_time in zip(self.COLLECTIONS, finished):
+            future = futures[coll_name]
+            if not in_time:
+                future.cancel()
+                count("db_timeouts")
+                results["timed_out"].append(coll_name)
+                print(f"   ⚠️  {coll_name} timed out after {self.timeout}s - returning partial results")
+                continue
+            if future.exception() is not None:
+                print(f"   ⚠️  Error searching {coll_name}: {future.exception()}")
+                continue
+            self._collect(results, coll_name, future.result())
+        
+        self._report(results, queries)
+        return results
+    
+    def _time_left(self, started: Dict[str, float], coll_name: str, submitted: float) -> float:
+        """Seconds until a query's deadline: `timeout` after it started (or was submitted, while queued)."""
+        return max(0.0, started.get(coll_name, submitted) + self.timeout - time.perf_counter())
+    
+    async def _await_query(self, future: asyncio.Future, started: Dict[str, float],
+                           coll_name: str, submitted: float) -> bool:
+        """Wait for one query until its deadline; False if it missed it."""
+        while True:
+            queued = coll_name not in started
+            done, _ = await asyncio.wait({future}, timeout=self._time_left(started, coll_name, submitted))
+            if done:
+                return True
+            if not (queued and coll_name in started):
+                return False
+    
+    @staticmethod
+    def _empty_results() -> Dict:
+        return {"programs": [], "classes": [], "overlap": [],
+                "latency_ms": {}, "timed_out": []}
+    
+    @staticmethod
+    def _queries(plan: Dict, profile: StudentProfile) -> List[str]:
+        """Planned search queries plus the student's interests."""
+        queries = list(plan.get("search_queries", []))
+        if isinstance(profile.interests, list):
+            queries.extend(profile.interests)
+        return queries
+    
+    @staticmethod
+    def _collect(results: Dict, coll_name: str, result: Dict):
+        """Append one collection's batched query result as Candidates."""
+        count("db_queries")
+        # One result list per query, kept in query order
+        for query_index, (ids, distances, metadatas) in enumerate(zip(
+                result.get('ids') or [], result.get('distances') or [],
+                result.get('metadatas') or [])):
+            for rank, (doc_id, distance, metadata) in enumerate(zip(ids, distances, metadatas)):
+                results[coll_name].append(Candidate(
+                    doc_id, coll_name, query_index, rank, float(distance), metadata or {}
+                ))
+        results["latency_ms"][coll_name] = result["latency_ms"]
+    
+    def _report(self, results: Dict, queries: List[str]):
+        timings = ", ".join(f"{name} {ms}ms" for name, ms in results["latency_ms"].items())
+        print(f"   ✓ {len(queries)} queries across {len(self.COLLECTIONS)} collections ({timings})")
 
 
 class AnalysisAgent:
     """Analyzes search results and creates recommendations"""
     
-    def __init__(self, programs_data: List[Dict], classes_data: List[Dict]):
-        self.programs_data = programs_data
-        self.classes_data = classes_data
+    def __init__(self, catalog: CatalogStore, fusion_method: str = "rrf",
+                 weights: Optional[Dict[str, float]] = None, pool_size: int = 25,
+                 prereq_graph: Optional[PrerequisiteGraph] = None):
+        self.catalog = catalog
+        self.fusion_method = fusion_method
+        self.pool_size = pool_size
         
+        # Feature columns are computed once here, not per request
+        self.ranking = RankingEngine(catalog.programs_data, catalog.classes_data,
+                                     catalog.overlap_data, weights)
+        self.prereq_graph = prereq_graph or PrerequisiteGraph(catalog.classes_data)
+    
     def analyze_and_rank(self, candidates: Dict, profile: StudentProfile, plan: Dict) -> Dict:
         """Main analysis method called by Phase2AgenticCourseAdvisor"""
         print("\n🧠 Analysis Agent: Analyzing and ranking results...")
         
-        # Simple scoring based on search results
-        programs = list(set(candidates.get("programs", [])))[:3]
-        classes = list(set(candidates.get("classes", [])))[:5]
+        # Merge the per-query, per-collection ranked lists by catalog id
+        programs = fuse_candidates(candidates.get("programs", []), top_k=3,
+                                   method=self.fusion_method)
+        class_pool = fuse_candidates(candidates.get("classes", []) + candidates.get("overlap", []),
+                                     top_k=self.pool_size, method=self.fusion_method)
+        overlap_pool = fuse_candidates(candidates.get("overlap", []),
+                                       top_k=self.pool_size, method=self.fusion_method)
+        
+        # Re-rank the fused pools with catalog features and the student's majors
+        majors = profile.considering_majors or []
+        classes = self._rank_pool(class_pool, majors, top_k=5)
+        overlap = self._rank_pool(overlap_pool, majors, top_k=3)
+        
+        programs = [self._program_record(f) for f in programs]
+        completed = profile.completed_courses or []
+        classes = [self._course_record(f, score, completed) for f, score in classes]
+        overlap = [self._course_record(f, score, completed) for f, score in overlap]
+        classes = [c for c in classes if c]
         
         return {
-            "programs": programs,
+            "programs": [p for p in programs if p],
             "courses": classes,
-            "overlap_courses": candidates.get("overlap", [])[:3],
-            "confidence": 85
+            "overlap_courses": [c for c in overlap if c],
+            "confidence": self._confidence(classes)
+        }
+    
+    def rank_catalog(self, considering_majors: List[str], top_k: int = 5,
+                     overlap_k: int = 3) -> Dict:
+        """
+        Recommendations from catalog features alone, without a search step.
+        Used to precompute the materialized views for common major combinations.
+        
+        Returns:
+            Same shape as analyze_and_rank (distance None, fusion_score 0)
+        """
+        matched = set(resolve_majors(considering_majors, self.ranking.program_names))
+        programs = [FusedCandidate(p.program_id, 0.0, None, 0)
+                    for j, p in enumerate(self.catalog.programs) if j in matched]
+        
+        course_ids = self.ranking.course_ids
+        overlap_ids = [cid for cid in course_ids if cid in self.catalog.overlap_ids]
+        classes = self.ranking.rank(course_ids, considering_majors, top_k=top_k)
+        overlap = self.ranking.rank(overlap_ids, considering_majors, top_k=overlap_k)
+        
+        classes = [self._course_record(FusedCandidate(cid, 0.0, None, 0), score) for cid, score in classes]
+        return {
+            "programs": [self._program_record(p) for p in programs],
+            "courses": classes,
+            "overlap_courses": [self._course_record(FusedCandidate(cid, 0.0, None, 0), score)
+                                for cid, score in overlap],
+            "confidence": self._confidence(classes)
+        }
+    
+    def _confidence(self, classes: List[Dict]) -> int:
+        """Average ranking score of the picks relative to the best possible, 0-100."""
+        if not classes:
+            return 0
+        mean_score = sum(c["rank_score"] for c in classes) / len(classes)
+        return int(round(100 * max(0.0, min(1.0, mean_score / self.ranking.max_score()))))
+    
+    def _rank_pool(self, pool: List[FusedCandidate], majors: List[str],
+                   top_k: int) -> List:
+        """Top-k (fused candidate, ranking score) pairs from a fused pool."""
+        by_key = {f.key: f for f in pool}
+        ranked = self.ranking.rank([f.key for f in pool], majors,
+                                   relevance=[f.score for f in pool], top_k=top_k)
+        return [(by_key[course_id], score) for course_id, score in ranked]
+    
+    def _program_record(self, fused: FusedCandidate) -> Optional[Dict]:
+        """Program facts for a fused program candidate."""
+        program = self.catalog.programs_by_id.get(fused.key)
+        if program is None:
+            return None
+        return {
+            "program_id": program.program_id,
+            "program_name": program.program_name,
+            "category": program.program_category,
+            "required_classes": list(program.required_classes),
+            "distance": fused.best.distance if fused.best is not None else None,
+            "fusion_score": round(fused.score, 5)
+        }
+    
+    def _course_record(self, fused: FusedCandidate, rank_score: float = 0.0,
+                       completed: Optional[List[str]] = None) -> Optional[Dict]:
+        """Course facts for a fused class/overlap candidate, in the shape validation and the UI expect."""
+        course = self.catalog.courses_by_id.get(fused.key)
+        if course is None:
+            return None
+        completed = completed or []
+        return {
+            "course_id": course.course_id,
+            "course_name": course.course_name,
+            "title": course.title,
+            "description": course.description,
+            "credit_hours": course.credit_hours,
+            "category": course.category,
+            "prerequisites": course.prerequisites,
+            "prereq_status": self.prereq_graph.prereq_status(course.course_id, completed),
+            "missing_prerequisites": self.prereq_graph.missing_prerequisites(course.course_id, completed),
+            "applicable_majors": list(course.applies_to_programs),
+            "program_count": course.program_count,
+            "versatility_score": course.versatility_score,
+            "distance": fused.best.distance if fused.best is not None else None,
+            "fusion_score": round(fused.score, 5),
+            "rank_score": round(rank_score, 4)
         }
 
 
@@ -140,6 +488,10 @@ class ExplanationAgent:
         """Main explanation method - calls explain()"""
         return self.explain(recommendations, profile)
     
+    async def agenerate_explanation(self, recommendations: Dict, profile: StudentProfile, context: Dict) -> str:
+        """asyncio entry point; the template explanation needs no I/O."""
+        return self.explain(recommendations, profile)
+    
     def explain(self, recommendations: Dict, profile: StudentProfile) -> str:
         print("\n💬 Explanation Agent: Creating explanation...")
         
@@ -156,13 +508,13 @@ class ExplanationAgent:
         if programs:
             explanation += "**Programs:**\n"
             for prog in programs:
-                explanation += f"- {prog}\n"
-                
+                explanation += f"- {program_label(prog)}\n"
+        
         if courses:
             explanation += "\n**Classes:**\n"
             for cls in courses:
-                explanation += f"- {cls}\n"
-                
+                explanation += f"- {course_label(cls)}\n"
+        
         return explanation
 
 
@@ -178,23 +530,73 @@ class EnhancedPlanningAgent(PlanningAgent):
 class EnhancedExplanationAgent(ExplanationAgent):
     """LLM-powered explanations"""
     
+    def __init__(self, llm_client=None, async_llm_client=None):
+        """
+        Args:
+            llm_client: Object with an OpenAI-style chat.completions.create
+                        (default: the configured openai module)
+            async_llm_client: Same interface with an awaitable create, used by
+                              the asyncio API (default: the sync client on a
+                              worker thread)
+        """
+        self.client = llm_client if llm_client is not None else (openai if PHASE1_AVAILABLE else None)
+        self.async_client = async_llm_client
+    
     def generate_explanation(self, recommendations: Dict, profile: StudentProfile, context: Dict) -> str:
         """Main explanation method called by Phase2AgenticCourseAdvisor"""
         return self.explain(recommendations, profile)
     
+    async def agenerate_explanation(self, recommendations: Dict, profile: StudentProfile, context: Dict) -> str:
+        """asyncio explanation method called by Phase2AgenticCourseAdvisor.aget_recommendations"""
+        return await self.aexplain(recommendations, profile)
+    
     def explain(self, recommendations: Dict, profile: StudentProfile) -> str:
-        if not PHASE1_AVAILABLE:
+        if self.client is None:
             return super().explain(recommendations, profile)
             
         print("\n💬 Enhanced Explanation Agent: Generating AI explanation...")
         
         try:
-            interests = profile.interests if isinstance(profile.interests, list) else [profile.interests]
-            goals = profile.goals or []
-            programs = recommendations.get('programs', recommendations.get('recommended_programs', []))
-            courses = recommendations.get('courses', recommendations.get('recommended_classes', []))
-            
-            prompt = f"""Create a friendly, personalized explanation for course recommendations.
+            response = self.client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[{"role": "user", "content": self._prompt(recommendations, profile)}],
+                max_tokens=300
+            )
+            record_llm_usage(response)
+            return response.choices[0].message.content or "Unable to generate explanation."
+        except Exception as e:
+            print(f"   ⚠️  LLM error: {e}")
+            return super().explain(recommendations, profile)
+    
+    async def aexplain(self, recommendations: Dict, profile: StudentProfile) -> str:
+        """Same as explain(), awaiting the LLM instead of blocking on it."""
+        if self.async_client is None:
+            if self.client is None:
+                return super().explain(recommendations, profile)
+            return await asyncio.to_thread(self.explain, recommendations, profile)
+        
+        print("\n💬 Enhanced Explanation Agent: Generating AI explanation...")
+        
+        try:
+            response = await self.async_client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[{"role": "user", "content": self._prompt(recommendations, profile)}],
+                max_tokens=300
+            )
+            record_llm_usage(response)
+            return response.choices[0].message.content or "Unable to generate explanation."
+        except Exception as e:
+            print(f"   ⚠️  LLM error: {e}")
+            return super().explain(recommendations, profile)
+    
+    @staticmethod
+    def _prompt(recommendations: Dict, profile: StudentProfile) -> str:
+        interests = profile.interests if isinstance(profile.interests, list) else [profile.interests]
+        goals = profile.goals or []
+        programs = recommendations.get('programs', recommendations.get('recommended_programs', []))
+        courses = recommendations.get('courses', recommendations.get('recommended_classes', []))
+        
+        return f"""Create a friendly, personalized explanation for course recommendations.
 
 Student Profile:
 - Interests: {', '.join(interests)}
@@ -202,48 +604,74 @@ Student Profile:
 - Preferred Difficulty: {profile.preferred_difficulty}
 
 Recommendations:
-- Programs: {', '.join(programs)}
-- Classes: {', '.join(courses)}
+- Programs: {', '.join(program_label(p) for p in programs)}
+- Classes: {', '.join(course_label(c) for c in courses)}
 
 Generate a warm, encouraging explanation (2-3 paragraphs) that connects their interests to the recommendations."""
 
-            response = openai.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=300
-            )
-            return response.choices[0].message.content or "Unable to generate explanation."
-        except Exception as e:
-            print(f"   ⚠️  LLM error: {e}")
-            return super().explain(recommendations, profile)
-
 
 class ConversationalAgent:
     """Handles conversational follow-up questions"""
     
+    def __init__(self, llm_client=None, async_llm_client=None):
+        """
+        Args:
+            llm_client: Object with an OpenAI-style chat.completions.create
+                        (default: the configured openai module)
+            async_llm_client: Same interface with an awaitable create, used by
+                              arespond (default: the sync client on a worker thread)
+        """
+        self.client = llm_client if llm_client is not None else (openai if PHASE1_AVAILABLE else None)
+        self.async_client = async_llm_client
+    
     def answer_followup(self, question: str, context: Dict) -> str:
         """Main method called by Phase2AgenticCourseAdvisor"""
         return self.respond(question, context)
     
+    async def aanswer_followup(self, question: str, context: Dict) -> str:
+        """asyncio method called by Phase2AgenticCourseAdvisor.ask_followup_async"""
+        return await self.arespond(question, context)
+    
     def respond(self, question: str, context: Dict) -> str:
-        if not PHASE1_AVAILABLE:
+        if self.client is None:
             return "Conversational features require LLM configuration."
             
         try:
-            prompt = f"""Answer this student question about BYU courses: {question}
-
-Context: {json.dumps(context, indent=2)}
-
-Provide a helpful, concise answer."""
-
-            response = openai.chat.completions.create(
+            response = self.client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[{"role": "user", "content": self._prompt(question, context)}],
+                max_tokens=200
+            )
+            record_llm_usage(response)
+            return response.choices[0].message.content or "Unable to generate response."
+        except Exception as e:
+            return f"Error: {e}"
+    
+    async def arespond(self, question: str, context: Dict) -> str:
+        """Same as respond(), awaiting the LLM instead of blocking on it."""
+        if self.async_client is None:
+            if self.client is None:
+                return "Conversational features require LLM configuration."
+            return await asyncio.to_thread(self.respond, question, context)
+        
+        try:
+            response = await self.async_client.chat.completions.create(
                 model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
+                messages=[{"role": "user", "content": self._prompt(question, context)}],
                 max_tokens=200
             )
+            record_llm_usage(response)
             return response.choices[0].message.content or "Unable to generate response."
         except Exception as e:
             return f"Error: {e}"
+    
+    @staticmethod
+    def _prompt(question: str, context: Dict) -> str:
+        return f"""Answer this student question about BYU courses: {question}
+
+Context: {json.dumps(context, indent=2)}
+
+Provide a helpful, concise answer."""
 
 
 class Phase2AgenticCourseAdvisor:
@@ -251,25 +679,63 @@ class Phase2AgenticCourseAdvisor:
     Phase 2: Enhanced advisor with validation and orchestration.
     """
     
-    def __init__(self, data_dir: str = "data", db_dir: str = "chroma_db"):
+    def __init__(self, data_dir: str = "data", db_dir: str = "chroma_db",
+                 use_materialized_views: bool = True, encoder=None, llm_client=None,
+                 parallel_agents: bool = PARALLEL_AGENTS, async_llm_client=None):
+        """
+        Args:
+            data_dir: Directory with the catalog JSON
+            db_dir: Vector database directory
+            use_materialized_views: Serve precomputed views for 1-2 majors
+            encoder: Query encoder (default: the shared SentenceTransformer encoder)
+            llm_client: OpenAI-style client for explanations and follow-ups
+                        (default: openai when config.py has a key)
+            parallel_agents: Run agents whose inputs are ready concurrently
+                             (False: one after another, in pipeline order)
+            async_llm_client: Client with an awaitable chat.completions.create for
+                              aget_recommendations / ask_followup_async (default:
+                              openai.AsyncOpenAI when config.py has a key and no
+                              llm_client is given; otherwise llm_client on a thread)
+        """
         print("\n🚀 Initializing Phase 2 Agentic Course Advisor...")
         
-        # Load data
-        self.programs_data = self._load_json(f"{data_dir}/programs.json")
-        self.classes_data = self._load_json(f"{data_dir}/classes.json")
+        # Shared catalog: parsed and indexed once per process
+        self.catalog = CatalogStore.load(data_dir)
+        self.programs_data = self.catalog.programs_data
+        self.classes_data = self.catalog.classes_data
+        self.overlap_data = self.catalog.overlap_data
         
-        # Initialize orchestrator (tracks all agents)
-        self.orchestrator = AgentOrchestrator()
+        # Agent status and traces are per request (WorkflowContext), never stored here
+        self.trace_memory = TRACE_MEMORY
+        self.parallel_agents = parallel_agents
+        # Bounded pool for workflow stages, shared by all requests
+        self._stage_executor = ThreadPoolExecutor(max_workers=AGENT_WORKERS,
+                                                  thread_name_prefix="agent")
         
         # Initialize all agents
         print("   📋 Initializing agents...")
         self.planning_agent = EnhancedPlanningAgent()
-        self.search_agent = SearchAgent(db_dir)
-        self.analysis_agent = AnalysisAgent(self.programs_data, self.classes_data)
+        self.search_agent = SearchAgent(db_dir, encoder=encoder)
+        self.analysis_agent = AnalysisAgent(self.catalog)
+        self.optimizer = SemesterOptimizer(self.programs_data, self.classes_data)
+        # Prerequisite DAG, parsed once and shared by analysis, validation and planning
+        self.prereq_graph = self.analysis_agent.prereq_graph
+        self.scheduler = SemesterScheduler(self.programs_data, self.classes_data, self.prereq_graph)
+        self.degree_audit = DegreeAudit(self.programs_data, self.classes_data)
+        self.program_similarity = ProgramSimilarity.load(db_dir, self.programs_data, self.classes_data)
+        self.course_neighbors = CourseNeighbors.load(db_dir)
+        
+        # Precomputed views for single majors and major pairs (None if stale or disabled)
+        self.views = None
+        if use_materialized_views:
+            fingerprint = catalog_fingerprint(self.programs_data, self.classes_data, self.overlap_data)
+            self.views = MaterializedViews(db_dir).open(fingerprint)
         
-        if PHASE1_AVAILABLE:
-            self.explanation_agent = EnhancedExplanationAgent()
-            self.conversational_agent = ConversationalAgent()
+        if llm_client is None and async_llm_client is None:
+            async_llm_client = default_async_client()
+        if PHASE1_AVAILABLE or llm_client is not None or async_llm_client is not None:
+            self.explanation_agent = EnhancedExplanationAgent(llm_client, async_llm_client)
+            self.conversational_agent = ConversationalAgent(llm_client, async_llm_client)
             print("   ✓ Phase 1 agents loaded (with LLM support)")
         else:
             # Use basic explanation without LLM
@@ -278,7 +744,7 @@ class Phase2AgenticCourseAdvisor:
             print("   ✓ Basic agents loaded (no LLM)")
         
         # Phase 2: Add validation agent
-        self.validation_agent = ValidationAgent()
+        self.validation_agent = ValidationAgent(prereq_graph=self.prereq_graph)
         print("   ✓ Validation agent loaded (Phase 2)")
         
         print("✅ Phase 2 system ready!")
@@ -286,159 +752,168 @@ class Phase2AgenticCourseAdvisor:
         print("   • Validation & quality checks")
         print("   • Real-time workflow tracking")
     
-    def _load_json(self, filepath: str) -> List[Dict]:
-        with open(filepath, 'r') as f:
-            return json.load(f)
+    def _materialized_view(self, profile: StudentProfile) -> Optional[Dict]:
+        """
+        The precomputed view for the profile's majors, if one applies.
+        Views assume nothing is completed, so profiles with completed
+        courses always take the full pipeline.
+        """
+        if self.views is None or profile.completed_courses:
+            return None
+        matched = resolve_majors(profile.considering_majors or [],
+                                 [p.program_name for p in self.catalog.programs])
+        if not 1 <= len(matched) <= 2:
+            return None
+        return self.views.get([self.catalog.programs[j].program_id for j in matched])
+    
+    def closest_programs(self, completed_courses: List[str], top_k: int = 5) -> List[Dict]:
+        """
+        Programs the student is closest to finishing.
+        
+        Args:
+            completed_courses: Completed course ids ("MATH 112" or "MATH112")
+            top_k: Number of programs to return
+        
+        Returns:
+            Dicts with program_name, remaining_credits, remaining_courses,
+            required_credits and percent_complete, fewest remaining credits first
+        """
+        return self.degree_audit.closest_programs(completed_courses, top_k)
+    
+    def similar_programs(self, program: str, top_k: int = 3) -> List[Dict]:
+        """Programs whose requirements overlap most with `program` (no embedding or LLM call)."""
+        return self.program_similarity.similar_programs(program, top_k)
+    
+    def switch_cost(self, from_program: str, to_program: str) -> Optional[Dict]:
+        """Shared and remaining required credits when switching between two programs."""
+        return self.program_similarity.switch_cost(from_program, to_program)
+    
+    def related_courses(self, course_id: str, top_k: int = 5) -> List[Dict]:
+        """Courses most similar to `course_id`, from the precomputed kNN graph."""
+        if self.course_neighbors is None:
+            return []
+        return self.course_neighbors.related(course_id, top_k)
     
     def get_recommendations(self, profile: StudentProfile, 
-                           return_workflow: bool = True) -> Dict:
+                           return_workflow: bool = True,
+                           context: Optional[WorkflowContext] = None) -> Dict:
         """
         Main workflow with Phase 2 enhancements:
         - Real-time workflow tracking
         - Validation checks
         - Confidence scoring
+        - Per-agent trace (wall/CPU time, memory, call counts) in result["trace"]
+        
+        All request state lives on a WorkflowContext, so one advisor can
+        serve concurrent calls from several threads or asyncio tasks.
+        Agents run as a dependency graph (see _workflow_stages): with
+        parallel_agents, explanation, validation, optimizer and scheduler
+        overlap instead of waiting for each other (except while memory is
+        traced: tracemalloc counts every thread, so stages then run one at
+        a time).
         
         Args:
             profile: Student profile
             return_workflow: If True, includes workflow progress in results
+            context: Optional WorkflowContext to run in (e.g. to poll its
+                     status or cancel() it from another thread); a new one by default
+        
+        Raises:
+            WorkflowCancelled: context.cancel() was called before the workflow finished
         """
+        ctx = context or WorkflowContext(profile, trace_memory=self.trace_memory)
+        ctx.profile = profile
+        ctx.start_trace("get_recommendations",
+                        considering_majors=list(profile.considering_majors or []))
+        try:
+            result = self._run_workflow(ctx, return_workflow)
+        except WorkflowCancelled:
+            ctx.finish_trace("cancelled")
+            raise
+        except Exception:
+            ctx.finish_trace("error")
+            raise
+        result["trace"] = ctx.finish_trace()
+        return result
+    
+    def _workflow_stages(self, profile: StudentProfile) -> List[Stage]:
+        """
+        The agent dependency graph for one request, in sequential order:
+            
+            Planning → Search → Analysis ─┬→ Explanation
+                                          └→ Validation
+            Optimizer, Scheduler: no dependencies when the student names
+            majors (otherwise after Analysis, which supplies the programs)
+        """
+        majors_known = bool(profile.considering_majors)
+        after_majors = () if majors_known else ("Analysis",)
+        return [
+            Stage("Planning", self._plan_stage),
+            Stage("Search", self._search_stage, after=("Planning",), arun=self._asearch_stage),
+            Stage("Analysis", self._analysis_stage, after=("Search",)),
+            Stage("Optimizer", self._optimizer_stage, after=after_majors, agent=False),
+            Stage("Scheduler", self._scheduler_stage, after=after_majors, agent=False),
+            Stage("Explanation", self._explanation_stage, after=("Analysis",),
+                  arun=self._aexplanation_stage),
+            Stage("Validation", self._validation_stage, after=("Analysis",)),
+        ]
+    
+    def _run_workflow(self, ctx: WorkflowContext, return_workflow: bool) -> Dict:
+        """Run the agent graph and assemble the result (see get_recommendations)."""
+        profile = ctx.profile
         print("\n" + "=" * 70)
-        print("🎯 PHASE 2 AGENTIC WORKFLOW")
+        print(f"🎯 PHASE 2 AGENTIC WORKFLOW ({ctx.request_id})")
         print("=" * 70)
         
-        # Initialize workflow tracking
-        workflow_progress = []
-        
-        # AGENT 1: Planning
-        self.orchestrator.update_agent_status("Planning", "running")
-        workflow_progress.append({
-            "agent": "Planning",
-            "status": "running",
-            "message": "Analyzing student profile..."
-        })
-        
-        plan = self.planning_agent.create_plan(profile, self.programs_data)
-        
-        self.orchestrator.update_agent_status(
-            "Planning", "complete", 
-            confidence=95,
-            details=f"Identified {len(plan.get('relevant_programs', []))} relevant programs"
-        )
-        workflow_progress.append({
-            "agent": "Planning",
-            "status": "complete",
-            "confidence": 95,
-            "message": f"Found {len(plan.get('relevant_programs', []))} relevant programs"
-        })
-        
-        # AGENT 2: Search
-        self.orchestrator.update_agent_status("Search", "running")
-        workflow_progress.append({
-            "agent": "Search",
-            "status": "running",
-            "message": "Querying vector database..."
-        })
-        
-        candidates = self.search_agent.search_courses(plan, profile)
-        
-        self.orchestrator.update_agent_status(
-            "Search", "complete",
-            confidence=90,
-            details=f"Found {len(candidates)} candidate courses"
-        )
-        workflow_progress.append({
-            "agent": "Search",
-            "status": "complete",
-            "confidence": 90,
-            "message": f"Found {len(candidates)} courses"
-        })
-        
-        # AGENT 3: Analysis
-        self.orchestrator.update_agent_status("Analysis", "running")
-        workflow_progress.append({
-            "agent": "Analysis",
-            "status": "running",
-            "message": "Ranking courses..."
-        })
-        
-        recommendations = self.analysis_agent.analyze_and_rank(
-            candidates, profile, plan
-        )
-        
-        self.orchestrator.update_agent_status(
-            "Analysis", "complete",
-            confidence=88,
-            details=f"Ranked {len(recommendations)} courses"
-        )
-        workflow_progress.append({
-            "agent": "Analysis",
-            "status": "complete",
-            "confidence": 88,
-            "message": f"Ranked {len(recommendations)} courses"
-        })
-        
-        # AGENT 4: Explanation
-        self.orchestrator.update_agent_status("Explanation", "running")
-        workflow_progress.append({
-            "agent": "Explanation",
-            "status": "running",
-            "message": "Generating personalized explanations..."
-        })
-        
-        explanation = self.explanation_agent.generate_explanation(
-            recommendations, profile, plan
-        )
-        
-        self.orchestrator.update_agent_status(
-            "Explanation", "complete",
-            confidence=92,
-            details="Generated personalized narrative"
-        )
-        workflow_progress.append({
-            "agent": "Explanation",
-            "status": "complete",
-            "confidence": 92,
-            "message": "Explanation generated"
-        })
-        
-        # AGENT 5: Validation (Phase 2)
-        self.orchestrator.update_agent_status("Validation", "running")
-        workflow_progress.append({
-            "agent": "Validation",
-            "status": "running",
-            "message": "Running quality checks..."
-        })
-        
-        # Convert recommendations dict to list format for validation
-        recommendations_list = recommendations.get('courses', [])
-        if isinstance(recommendations_list, list) and recommendations_list:
-            # Already a list
-            pass
-        else:
-            # Create list from dict
-            recommendations_list = [{"name": course} for course in recommendations.get('courses', [])]
+        run_stages(ctx, self._workflow_stages(profile),
+                   None if self._sequential(ctx) else self._stage_executor)
+        return self._workflow_result(ctx, return_workflow)
+    
+    async def aget_recommendations(self, profile: StudentProfile,
+                                   return_workflow: bool = True,
+                                   context: Optional[WorkflowContext] = None) -> Dict:
+        """
+        asyncio version of get_recommendations (same result).
         
-        validation_results = self.validation_agent.validate_recommendations(
-            recommendations_list,
-            {
-                "interests": profile.interests,
-                "considering_majors": profile.considering_majors,
-                "career_goals": profile.career_goals
-            },
-            plan
-        )
+        Search and the LLM explanation are awaited on the event loop;
+        encoding, database queries and the CPU-bound agents run on bounded
+        shared pools. A request therefore never holds a thread while it
+        waits, and one loop can serve hundreds of sessions concurrently.
+        Cancelling the awaiting task (or context.cancel()) cancels the
+        stages still pending, including an LLM call in flight.
         
-        self.orchestrator.update_agent_status(
-            "Validation", "complete",
-            confidence=validation_results["confidence_score"],
-            details=f"{validation_results['checks_passed']}/{validation_results['total_checks']} checks passed"
-        )
-        workflow_progress.append({
-            "agent": "Validation",
-            "status": "complete",
-            "confidence": validation_results["confidence_score"],
-            "message": f"{validation_results['checks_passed']}/{validation_results['total_checks']} checks passed"
-        })
+        Raises:
+            WorkflowCancelled: context.cancel() was called before the workflow finished
+        """
+        ctx = context or WorkflowContext(profile, trace_memory=self.trace_memory)
+        ctx.profile = profile
+        ctx.start_trace("aget_recommendations",
+                        considering_majors=list(profile.considering_majors or []))
+        try:
+            print(f"\n🎯 PHASE 2 AGENTIC WORKFLOW ({ctx.request_id}, async)")
+            await arun_stages(ctx, self._workflow_stages(profile), self._stage_executor,
+                              sequential=self._sequential(ctx))
+            result = self._workflow_result(ctx, return_workflow)
+        except (WorkflowCancelled, asyncio.CancelledError):
+            ctx.finish_trace("cancelled")
+            raise
+        except Exception:
+            ctx.finish_trace("error")
+            raise
+        result["trace"] = ctx.finish_trace()
+        return result
+    
+    def _sequential(self, ctx: WorkflowContext) -> bool:
+        """Run stages one at a time: parallel_agents off, or memory traced (alloc_kb is per process)."""
+        return not self.parallel_agents or ctx.status.trace_memory
+    
+    def _workflow_result(self, ctx: WorkflowContext, return_workflow: bool) -> Dict:
+        """Assemble the result of a finished workflow."""
+        profile = ctx.profile
+        recommendations = ctx.recommendations
+        recommendations["semester_plan"] = ctx.semester_plan
+        recommendations["roadmap"] = ctx.roadmap
+        validation_results = ctx.validation
         
         print("\n" + "=" * 70)
         print("✅ PHASE 2 WORKFLOW COMPLETE")
@@ -447,9 +922,10 @@ class Phase2AgenticCourseAdvisor:
         
         # Build result
         result = {
+            "request_id": ctx.request_id,
             "recommendations": recommendations,  # Already a dict with programs/courses/overlap
-            "explanation": explanation,
-            "plan": plan,
+            "explanation": ctx.explanation,
+            "plan": ctx.plan,
             "validation": validation_results,
             "profile": {
                 "interests": profile.interests,
@@ -459,17 +935,152 @@ class Phase2AgenticCourseAdvisor:
         }
         
         if return_workflow:
-            result["workflow"] = workflow_progress
-            result["workflow_summary"] = self.orchestrator.get_overall_status()
+            result["workflow"] = ctx.progress
+            result["workflow_summary"] = ctx.summary()
         
         return result
     
+    # ------------------------------------------------------------------
+    # Stages: each reads its inputs from the context and stores its output
+    # ------------------------------------------------------------------
+    
+    def _plan_stage(self, ctx: WorkflowContext):
+        """AGENT 1: Planning"""
+        ctx.begin("Planning", "Analyzing student profile...")
+        ctx.plan = self.planning_agent.create_plan(ctx.profile, self.catalog)
+        n_programs = len(ctx.plan.get('relevant_programs', []))
+        ctx.complete("Planning", 95, f"Found {n_programs} relevant programs",
+                     details=f"Identified {n_programs} relevant programs")
+    
+    def _search_stage(self, ctx: WorkflowContext):
+        """AGENT 2: Search (or a materialized view, which also covers Analysis)"""
+        if self._serve_view(ctx):
+            return
+        ctx.begin("Search", "Querying vector database...")
+        ctx.candidates = self.search_agent.search_courses(ctx.plan, ctx.profile)
+        self._search_complete(ctx)
+    
+    async def _asearch_stage(self, ctx: WorkflowContext):
+        """AGENT 2: Search, awaited (see _search_stage)"""
+        if self._serve_view(ctx):
+            return
+        ctx.begin("Search", "Querying vector database...")
+        ctx.candidates = await self.search_agent.asearch_courses(ctx.plan, ctx.profile)
+        self._search_complete(ctx)
+    
+    def _serve_view(self, ctx: WorkflowContext) -> bool:
+        """Use the materialized view for the profile's majors, if one applies."""
+        ctx.recommendations = self._materialized_view(ctx.profile)
+        if ctx.recommendations is None:
+            return False
+        print(f"\n⚡ Served from materialized view ({', '.join(p['program_name'] for p in ctx.recommendations['programs'])})")
+        ctx.complete("Search", ctx.recommendations["confidence"], "Served from materialized view")
+        return True
+    
+    def _search_complete(self, ctx: WorkflowContext):
+        n_candidates = sum(len(ctx.candidates.get(name, [])) for name in SearchAgent.COLLECTIONS)
+        ctx.complete("Search", 90, f"Found {n_candidates} courses",
+                     details=f"Found {n_candidates} candidate courses")
+    
+    def _analysis_stage(self, ctx: WorkflowContext):
+        """AGENT 3: Analysis"""
+        if ctx.candidates is None:
+            ctx.complete("Analysis", ctx.recommendations["confidence"], "Served from materialized view")
+            return
+        
+        ctx.begin("Analysis", "Ranking courses...")
+        ctx.recommendations = self.analysis_agent.analyze_and_rank(
+            ctx.candidates, ctx.profile, ctx.plan
+        )
+        n_ranked = len(ctx.recommendations.get("courses", []))
+        ctx.complete("Analysis", ctx.recommendations["confidence"], f"Ranked {n_ranked} courses")
+    
+    def _majors(self, ctx: WorkflowContext) -> List[str]:
+        """The student's majors, or the recommended programs when none were given."""
+        return ctx.profile.considering_majors or [p["program_name"] for p in ctx.recommendations.get("programs", [])]
+    
+    def _optimizer_stage(self, ctx: WorkflowContext):
+        """Optimizer: best requirement coverage within the student's credit load"""
+        profile = ctx.profile
+        # Skip completed courses and ones whose prerequisites are not met yet
+        completed = profile.completed_courses or []
+        with ctx.tracer.span("Optimizer"):
+            satisfied = self.prereq_graph.satisfied_mask(completed)
+            not_ready = self.prereq_graph.ids_of(self.prereq_graph.blocked_mask(satisfied))
+            ctx.semester_plan = self.optimizer.optimize(self._majors(ctx), profile.desired_credits,
+                                                        exclude=completed + not_ready)
+        print(f"\n🧮 Optimizer: {len(ctx.semester_plan['courses'])} courses, "
+              f"{ctx.semester_plan['credits']:g}/{profile.desired_credits} credits ({ctx.semester_plan['method']})")
+    
+    def _scheduler_stage(self, ctx: WorkflowContext):
+        """Scheduler: multi-semester roadmap through the required courses"""
+        profile = ctx.profile
+        with ctx.tracer.span("Scheduler"):
+            roadmap = self.scheduler.plan(self._majors(ctx), profile.desired_credits,
+                                          completed=profile.completed_courses or [])
+        ctx.roadmap = roadmap
+        print(f"🗓️  Scheduler: {roadmap['required_total'] - len(roadmap['unscheduled'])}/"
+              f"{roadmap['required_total']} required courses over {len(roadmap['semesters'])} semesters "
+              f"({roadmap['elapsed_ms']}ms)")
+    
+    def _explanation_stage(self, ctx: WorkflowContext):
+        """AGENT 4: Explanation"""
+        ctx.begin("Explanation", "Generating personalized explanations...")
+        ctx.explanation = self.explanation_agent.generate_explanation(
+            ctx.recommendations, ctx.profile, ctx.plan
+        )
+        ctx.complete("Explanation", 92, "Explanation generated",
+                     details="Generated personalized narrative")
+    
+    async def _aexplanation_stage(self, ctx: WorkflowContext):
+        """AGENT 4: Explanation, awaiting the LLM"""
+        ctx.begin("Explanation", "Generating personalized explanations...")
+        ctx.explanation = await self.explanation_agent.agenerate_explanation(
+            ctx.recommendations, ctx.profile, ctx.plan
+        )
+        ctx.complete("Explanation", 92, "Explanation generated",
+                     details="Generated personalized narrative")
+    
+    def _validation_stage(self, ctx: WorkflowContext):
+        """AGENT 5: Validation (Phase 2)"""
+        profile = ctx.profile
+        ctx.begin("Validation", "Running quality checks...")
+        
+        # Convert recommendations dict to list format for validation
+        recommendations_list = ctx.recommendations.get('courses', [])
+        if isinstance(recommendations_list, list) and recommendations_list:
+            # Already a list
+            pass
+        else:
+            # Create list from dict
+            recommendations_list = [{"name": course} for course in ctx.recommendations.get('courses', [])]
+        
+        ctx.validation = self.validation_agent.validate_recommendations(
+            recommendations_list,
+            {
+                "interests": profile.interests,
+                "considering_majors": profile.considering_majors,
+                "career_goals": profile.career_goals,
+                "completed_courses": profile.completed_courses
+            },
+            ctx.plan
+        )
+        ctx.complete("Validation", ctx.validation["confidence_score"],
+                     f"{ctx.validation['checks_passed']}/{ctx.validation['total_checks']} checks passed")
+    
     def ask_followup(self, question: str, context: Dict) -> str:
         """Handle follow-up questions (if Phase 1 is available)."""
         if self.conversational_agent:
             return self.conversational_agent.answer_followup(question, context)
         else:
             return "Follow-up Q&A requires Phase 1 enhancements with API key configured."
+    
+    async def ask_followup_async(self, question: str, context: Dict) -> str:
+        """asyncio version of ask_followup; awaits the LLM without holding a thread."""
+        if self.conversational_agent:
+            return await self.conversational_agent.aanswer_followup(question, context)
+        else:
+            return "Follow-up Q&A requires Phase 1 enhancements with API key configured."
 
 
 # Test function
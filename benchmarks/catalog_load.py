@@ -0,0 +1,111 @@
+"""
+Catalog load benchmark: JSON vs. the binary SQLite export.
+
+Generates a synthetic catalog (50,000 courses by default, with
+byu_data_generator.generate_synthetic_catalog), exports it to
+catalog.sqlite, then measures each way of opening it in a fresh
+subprocess, so cold start and peak RSS are not shared between runs:
+  • json         - CatalogStore from the three JSON files
+  • binary_lazy  - CatalogStore from a fresh catalog.sqlite beside the JSON
+                   (lookups query SQLite on demand)
+  • binary_full  - the same, then classes_data, which builds every record
+                   (what the advisor's ranking and planners read)
+Every mode then does 1,000 courses_by_id lookups.
+
+Usage:
+    python benchmarks/catalog_load.py [--courses 50000] [--programs 200]
+"""
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from byu_data_generator import generate_synthetic_catalog
+from catalog_binary import BINARY_CATALOG_FILE, export_binary_catalog
+
+MEASURE = r'''
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+mode, data_dir, ids_path = sys.argv[1], sys.argv[2], sys.argv[3]
+from catalog_store import CatalogStore
+store = CatalogStore.load(data_dir)
+if mode == "binary_full":
+    store.classes_data
+opened = time.perf_counter() - start
+ids = json.load(open(ids_path))
+found = sum(cid in store.courses_by_id for cid in ids)
+total = time.perf_counter() - start
+# VmHWM, unlike ru_maxrss, is not inherited from the benchmark parent
+peak_kb = next(int(line.split()[1]) for line in open("/proc/self/status") if line.startswith("VmHWM"))
+print(json.dumps({{"open_s": opened, "open_and_lookups_s": total, "found": found,
+                  "peak_rss_mb": peak_kb / 1024}}))
+'''
+
+
+def measure(mode: str, data_dir: Path, ids_path: Path, repeats: int) -> dict:
+    """Best-of-`repeats` timings (and the largest peak RSS) for one load mode."""
+    script = MEASURE.format(root=str(ROOT))
+    runs = [json.loads(subprocess.run([sys.executable, "-c", script, mode, str(data_dir), str(ids_path)],
+                                      check=True, capture_output=True, text=True).stdout)
+            for _ in range(repeats)]
+    return {
+        "open_s": min(r["open_s"] for r in runs),
+        "open_and_lookups_s": min(r["open_and_lookups_s"] for r in runs),
+        "peak_rss_mb": max(r["peak_rss_mb"] for r in runs),
+        "found": runs[0]["found"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--courses", type=int, default=50000)
+    parser.add_argument("--programs", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    
+    work = Path(tempfile.mkdtemp(prefix="catalog_bench_"))
+    json_dir = work / "json"
+    ids_path = work / "lookup_ids.json"
+    try:
+        print(f"📦 Generating {args.courses:,} courses / {args.programs} programs...")
+        _, classes, _ = generate_synthetic_catalog(args.programs, args.courses, seed=7,
+                                                   output_dir=str(json_dir))
+        binary_dir = work / "binary"
+        shutil.copytree(json_dir, binary_dir)
+        (json_dir / BINARY_CATALOG_FILE).unlink(missing_ok=True)
+        # Exported after the copy, so its source stamp matches the copied JSON
+        export_binary_catalog(str(binary_dir))
+        with open(ids_path, 'w') as f:
+            json.dump([classes[i * 37 % len(classes)]["course_id"] for i in range(1000)], f)
+        json_mb = sum((json_dir / n).stat().st_size for n in
+                      ("programs.json", "classes.json", "class_overlap.json")) / 2**20
+        binary_mb = (binary_dir / BINARY_CATALOG_FILE).stat().st_size / 2**20
+        print(f"   JSON: {json_mb:.1f} MB   binary: {binary_mb:.1f} MB")
+        
+        results = {
+            "json": measure("json", json_dir, ids_path, args.repeats),
+            "binary_lazy": measure("binary_lazy", binary_dir, ids_path, args.repeats),
+            "binary_full": measure("binary_full", binary_dir, ids_path, args.repeats)
+        }
+        print(f"\n{'mode':<14}{'open (s)':>10}{'+1k lookups (s)':>18}{'peak RSS (MB)':>16}")
+        for mode, r in results.items():
+            print(f"{mode:<14}{r['open_s']:>10.3f}{r['open_and_lookups_s']:>18.3f}{r['peak_rss_mb']:>16.1f}")
+        base = results["json"]
+        for mode in ("binary_lazy", "binary_full"):
+            r = results[mode]
+            print(f"\n✓ {mode}: {base['open_and_lookups_s'] / r['open_and_lookups_s']:.1f}× faster cold start, "
+                  f"{base['peak_rss_mb'] - r['peak_rss_mb']:.0f} MB less peak memory")
+    finally:
+        shutil.rmtree(work)
+
+
+if __name__ == "__main__":
+    main()
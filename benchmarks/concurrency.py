@@ -0,0 +1,186 @@
+"""
+Concurrency stress test: one advisor, many simultaneous requests.
+
+Runs every profile in benchmarks/profiles.json once, sequentially, as the
+reference. Then the same advisor serves the profiles again, shuffled and
+repeated, in three modes:
+
+  • threads  - get_recommendations from a pool of --threads threads
+  • to_thread - asyncio tasks, each offloaded with asyncio.to_thread
+  • async    - aget_recommendations, all --requests sessions at once on
+               one event loop (no thread per request)
+
+Every concurrent result must match its sequential reference -
+recommendations, schedule, explanation, validation, workflow progress and
+trace - or the script exits with status 1. The semester optimizer stops
+on a node budget, so its plan is deterministic too; only when a request
+hit the optimizer's wall-clock fallback (an overloaded machine) is its
+semester plan left out of the comparison. The "threads" column is the
+number of live threads in the process after each mode.
+
+Runs offline with the same hashing encoder and fake LLM as pipeline.py.
+With --views, materialized views are built and served where they apply.
+
+Usage:
+    python benchmarks/concurrency.py
+    python benchmarks/concurrency.py --threads 32 --requests 500 --llm-latency-ms 500
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(BENCH_DIR))
+
+from fakes import FakeAsyncLLMClient, FakeLLMClient, HashingEncoder
+from pipeline import load_profiles
+from agentic_chatbot_phase2 import Phase2AgenticCourseAdvisor
+from rag_system_setup import BYUCourseRAG
+
+AGENTS = ["Planning", "Search", "Analysis", "Explanation", "Validation"]
+
+
+def fingerprint(result: Dict) -> Dict:
+    """The parts of a result that must not depend on what else is running."""
+    recs = result["recommendations"]
+    return {
+        "programs": [p["program_name"] for p in recs.get("programs", [])],
+        "courses": [c["course_id"] for c in recs.get("courses", [])],
+        "overlap": [c["course_id"] for c in recs.get("overlap_courses", [])],
+        "semester_plan": recs["semester_plan"]["courses"],
+        "semester_plan_timed_out": "time budget" in recs["semester_plan"]["method"],
+        "roadmap": [s["courses"] for s in recs["roadmap"]["semesters"]],
+        "explanation": result["explanation"],
+        "plan": result["plan"],
+        "validation": (result["validation"]["confidence_score"], result["validation"]["checks_passed"]),
+        "considering_majors": result["profile"]["considering_majors"]
+    }
+
+
+def check(result: Dict, expected: Dict) -> List[str]:
+    """Problems with one concurrent result (empty if it is consistent)."""
+    problems = []
+    actual = fingerprint(result)
+    timed_out = actual.pop("semester_plan_timed_out") or expected["semester_plan_timed_out"]
+    for key, value in expected.items():
+        if key == "semester_plan_timed_out" or (key == "semester_plan" and timed_out):
+            continue
+        if actual[key] != value:
+            problems.append(f"{key} differs from the sequential run")
+    
+    # Progress must be this request's own five agents, each completed once
+    completed = [step["agent"] for step in result["workflow"] if step["status"] == "complete"]
+    if sorted(completed) != sorted(AGENTS):
+        problems.append(f"workflow completed {completed}")
+    summary = result["workflow_summary"]
+    if summary["completed"] != len(AGENTS) or summary["current_step"] is not None:
+        problems.append(f"workflow summary {summary}")
+    
+    trace = result["trace"]
+    if trace["attributes"].get("request_id") != result["request_id"]:
+        problems.append("trace belongs to another request")
+    spans = [span["name"] for span in trace["children"]]
+    if sorted(set(spans) & set(AGENTS)) != sorted(AGENTS) or len(spans) != len(set(spans)):
+        problems.append(f"trace spans {spans}")
+    return problems
+
+
+def run_threads(advisor, jobs, threads: int) -> List[Dict]:
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(advisor.get_recommendations, jobs))
+
+
+async def run_tasks(advisor, jobs, concurrency: int) -> List[Dict]:
+    limit = asyncio.Semaphore(concurrency)
+    
+    async def one(profile):
+        async with limit:
+            return await asyncio.to_thread(advisor.get_recommendations, profile)
+    
+    return await asyncio.gather(*(one(profile) for profile in jobs))
+
+
+async def run_async(advisor, jobs) -> List[Dict]:
+    return await asyncio.gather(*(advisor.aget_recommendations(profile) for profile in jobs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent requests against one shared advisor")
+    parser.add_argument("--data-dir", default=str(ROOT / "data"))
+    parser.add_argument("--profiles", default=str(BENCH_DIR / "profiles.json"))
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--llm-latency-ms", type=float, default=20.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--views", action="store_true", help="build and serve materialized views")
+    args = parser.parse_args()
+    
+    work = Path(tempfile.mkdtemp(prefix="concurrency_"))
+    try:
+        encoder = HashingEncoder()
+        llm = FakeLLMClient(latency_ms=args.llm_latency_ms, jitter_ms=args.llm_jitter_ms, seed=args.seed)
+        async_llm = FakeAsyncLLMClient(latency_ms=args.llm_latency_ms, jitter_ms=args.llm_jitter_ms,
+                                       seed=args.seed)
+        profiles = load_profiles(Path(args.profiles))
+        with contextlib.redirect_stdout(io.StringIO()):
+            BYUCourseRAG(args.data_dir, str(work), encoder=encoder).build_vector_database(
+                build_views=args.views)
+            advisor = Phase2AgenticCourseAdvisor(args.data_dir, str(work), encoder=encoder,
+                                                 llm_client=llm, async_llm_client=async_llm)
+            
+            start = time.perf_counter()
+            expected = {id(p): fingerprint(advisor.get_recommendations(p)) for p in profiles}
+            sequential_ms = (time.perf_counter() - start) * 1000 / len(profiles)
+        
+        rng = random.Random(args.seed)
+        jobs = [rng.choice(profiles) for _ in range(args.requests)]
+        
+        failures = 0
+        print(f"{'mode':<10}{'requests':>10}{'workers':>9}{'req/s':>10}{'seq req/s':>11}"
+              f"{'threads':>9}{'failures':>10}")
+        for mode in ("threads", "to_thread", "async"):
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                if mode == "threads":
+                    results = run_threads(advisor, jobs, args.threads)
+                elif mode == "to_thread":
+                    results = asyncio.run(run_tasks(advisor, jobs, args.threads))
+                else:
+                    results = asyncio.run(run_async(advisor, jobs))
+                elapsed = time.perf_counter() - start
+            
+            problems = []
+            for profile, result in zip(jobs, results):
+                problems.extend(f"{result['request_id']}: {p}" for p in check(result, expected[id(profile)]))
+            if len({r["request_id"] for r in results}) != len(results):
+                problems.append("request ids are not unique")
+            failures += len(problems)
+            workers = len(jobs) if mode == "async" else args.threads
+            print(f"{mode:<10}{len(jobs):>10}{workers:>9}{len(jobs) / elapsed:>10.1f}"
+                  f"{1000 / sequential_ms:>11.1f}{threading.active_count():>9}{len(problems):>10}")
+            for line in problems[:10]:
+                print(f"   • {line}")
+        
+        if failures:
+            sys.exit(f"\n❌ {failures} inconsistent result(s) under concurrency")
+        print("\n✓ Every concurrent result matches its sequential run")
+    finally:
+        shutil.rmtree(work)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Offline stand-ins for the embedding model and the OpenAI client.
+
+  • HashingEncoder - deterministic feature-hashing embeddings with the
+                     SharedEncoder interface; no model download
+  • FakeLLMClient  - OpenAI-style chat.completions.create that sleeps for an
+                     injectable latency and returns a canned answer
+  • FakeAsyncLLMClient - the same with an awaitable create (AsyncOpenAI-style)
+
+They plug into the advisor through its encoder= / llm_client= /
+async_llm_client= arguments.
+"""
+
+import asyncio
+import hashlib
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+import numpy as np
+
+from embeddings import normalize_text
+
+
+class HashingEncoder:
+    """
+    Bag of words and word bigrams hashed into `dimension` signed buckets,
+    L2-normalized. The same text always gets the same vector, on any machine.
+    """
+    
+    def __init__(self, dimension: int = 384, batch_size: int = 64, ms_per_text: float = 0.0):
+        """
+        Args:
+            dimension: Embedding size
+            batch_size: Kept for SharedEncoder compatibility
+            ms_per_text: Optional simulated model cost per text
+        """
+        self.model_name = f"hashing-{dimension}"
+        self.dimension = dimension
+        self.batch_size = batch_size
+        self.ms_per_text = ms_per_text
+        self.calls = 0
+        self.texts_encoded = 0
+    
+    def _bucket(self, token: str):
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dimension, 1.0 if value >> 63 else -1.0
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into L2-normalized float32 vectors."""
+        self.calls += 1
+        self.texts_encoded += len(texts)
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            words = normalize_text(text).lower().split()
+            for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                bucket, sign = self._bucket(token)
+                vectors[i, bucket] += sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.maximum(norms, 1e-12)
+        if self.ms_per_text:
+            time.sleep(self.ms_per_text * len(texts) / 1000)
+        return vectors
+    
+    def cache_stats(self) -> Dict:
+        return {}
+
+
+class FakeLLMClient:
+    """
+    Minimal OpenAI client double: client.chat.completions.create(...).
+    
+    Each call sleeps latency_ms + ms_per_token × max_tokens (plus uniform
+    jitter from a seeded generator) and returns a deterministic answer with
+    token usage, so LLM-bound stages can be benchmarked without a network.
+    """
+    
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 ms_per_token: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.ms_per_token = ms_per_token
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+    
+    def create(self, model: str, messages: List[Dict], max_tokens: int = 256, **kwargs):
+        """Sleep for the injected latency and return an OpenAI-shaped response."""
+        time.sleep(self._delay_ms(max_tokens) / 1000)
+        return self._response(model, messages, max_tokens)
+    
+    def _delay_ms(self, max_tokens: int) -> float:
+        with self._lock:
+            self.calls += 1
+            jitter = self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        return self.latency_ms + jitter + self.ms_per_token * max_tokens
+    
+    @staticmethod
+    def _response(model: str, messages: List[Dict], max_tokens: int):
+        prompt = messages[-1]["content"] if messages else ""
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages)
+        first_line = next((line for line in prompt.splitlines() if line.strip()), "")
+        content = f"[{model}] Response to: {first_line[:80]}"
+        completion_tokens = min(max_tokens, len(content.split()))
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                  total_tokens=prompt_tokens + completion_tokens)
+        )
+
+
+class FakeAsyncLLMClient(FakeLLMClient):
+    """FakeLLMClient whose create is a coroutine (AsyncOpenAI-style); same answers."""
+    
+    async def create(self, model: str, messages: List[Dict], max_tokens: int = 256, **kwargs):
+        """Await the injected latency and return an OpenAI-shaped response."""
+        await asyncio.sleep(self._delay_ms(max_tokens) / 1000)
+        return self._response(model, messages, max_tokens)
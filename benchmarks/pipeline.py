@@ -0,0 +1,275 @@
+"""
+Pipeline benchmark: per-agent and end-to-end advisor latency, fully offline.
+
+Builds a vector database in a temporary directory with a deterministic
+hashing encoder, then times every agent and the whole
+Phase2AgenticCourseAdvisor.get_recommendations against the fixed profiles
+in benchmarks/profiles.json. The OpenAI client is replaced by a fake
+whose latency is injected with --llm-latency-ms. Materialized views are
+only built (and the pipeline_with_views row only reported) with --views.
+
+Results (p50/p95/p99 per stage, in ms) are written as JSON. With a
+baseline, any stage whose p50 or p95 is slower than the baseline by more
+than --threshold (and by at least --min-delta-ms) is a regression, and the
+script exits with status 1.
+
+benchmarks/pipeline_baseline.json is a reference run with the default
+options, compared against by default. Timings depend on the machine, so
+CI records its own baseline on the same runner before comparing:
+
+    git checkout <base commit>
+    python benchmarks/pipeline.py --save-baseline --baseline /tmp/base.json
+    git checkout <head commit>
+    python benchmarks/pipeline.py --baseline /tmp/base.json
+
+Usage:
+    python benchmarks/pipeline.py --save-baseline
+    python benchmarks/pipeline.py --baseline benchmarks/pipeline_baseline.json
+    python benchmarks/pipeline.py --scale 100 --llm-latency-ms 400
+    python benchmarks/pipeline.py --views
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(BENCH_DIR))
+
+from fakes import FakeLLMClient, HashingEncoder
+from agentic_chatbot_phase2 import Phase2AgenticCourseAdvisor, StudentProfile
+from byu_data_generator import generate_synthetic_catalog
+from rag_system_setup import BYUCourseRAG
+
+DEFAULT_BASELINE = BENCH_DIR / "pipeline_baseline.json"
+DEFAULT_OUTPUT = BENCH_DIR / "pipeline_results.json"
+PERCENTILES = (50, 95, 99)
+
+# Stages compared against the baseline
+COMPARED_METRICS = ("p50_ms", "p95_ms")
+
+
+def load_profiles(path: Path) -> List[StudentProfile]:
+    """StudentProfile fixtures (the "name" field is only a label)."""
+    with open(path, 'r') as f:
+        fixtures = json.load(f)
+    return [StudentProfile(**{k: v for k, v in fixture.items() if k != "name"}) for fixture in fixtures]
+
+
+def catalog_label(args) -> str:
+    """Catalog in the results config; data directories inside the repo are stored relative to it."""
+    if args.scale:
+        return f"synthetic x{args.scale}"
+    data_dir = Path(args.data_dir).resolve()
+    try:
+        return data_dir.relative_to(ROOT).as_posix()
+    except ValueError:
+        return str(data_dir)
+
+
+def summarize(samples: List[float]) -> Dict:
+    """Percentiles and spread of a list of millisecond timings."""
+    values = np.asarray(samples, dtype=np.float64)
+    summary = {f"p{p}_ms": round(float(np.percentile(values, p)), 3) for p in PERCENTILES}
+    summary.update({
+        "mean_ms": round(float(values.mean()), 3),
+        "min_ms": round(float(values.min()), 3),
+        "max_ms": round(float(values.max()), 3),
+        "n": int(len(values))
+    })
+    return summary
+
+
+def timed(fn: Callable, *args, **kwargs):
+    """(result, elapsed ms)"""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def time_agents(advisor: Phase2AgenticCourseAdvisor, profile: StudentProfile) -> Dict[str, float]:
+    """Run each agent once, in pipeline order, and time it."""
+    timings = {}
+    plan, timings["planning"] = timed(advisor.planning_agent.create_plan, profile, advisor.catalog)
+    candidates, timings["search"] = timed(advisor.search_agent.search_courses, plan, profile)
+    recommendations, timings["analysis"] = timed(
+        advisor.analysis_agent.analyze_and_rank, candidates, profile, plan)
+    
+    majors = profile.considering_majors or [p["program_name"] for p in recommendations.get("programs", [])]
+    completed = profile.completed_courses or []
+    _, timings["optimizer"] = timed(advisor.optimizer.optimize, majors, profile.desired_credits,
+                                    exclude=completed)
+    _, timings["scheduler"] = timed(advisor.scheduler.plan, majors, profile.desired_credits,
+                                    completed=completed)
+    _, timings["explanation"] = timed(advisor.explanation_agent.generate_explanation,
+                                      recommendations, profile, plan)
+    _, timings["validation"] = timed(
+        advisor.validation_agent.validate_recommendations,
+        recommendations.get("courses", []),
+        {"interests": profile.interests, "considering_majors": profile.considering_majors,
+         "career_goals": profile.career_goals, "completed_courses": profile.completed_courses},
+        plan)
+    return timings
+
+
+def run_benchmark(args) -> Dict:
+    """Build the offline environment, run every stage, return the results document."""
+    work = Path(tempfile.mkdtemp(prefix="pipeline_bench_"))
+    try:
+        data_dir = Path(args.data_dir)
+        if args.scale:
+            data_dir = work / "data"
+            generate_synthetic_catalog(9 * args.scale, 28 * args.scale, seed=args.seed,
+                                       output_dir=str(data_dir))
+        db_dir = work / "db"
+        encoder = HashingEncoder()
+        llm = FakeLLMClient(latency_ms=args.llm_latency_ms, jitter_ms=args.llm_jitter_ms, seed=args.seed)
+        profiles = load_profiles(Path(args.profiles))
+        
+        quiet = contextlib.redirect_stdout(io.StringIO())
+        with quiet:
+            build_start = time.perf_counter()
+            BYUCourseRAG(str(data_dir), str(db_dir), encoder=encoder).build_vector_database(
+                build_views=args.views)
+            build_ms = (time.perf_counter() - build_start) * 1000
+            advisor = Phase2AgenticCourseAdvisor(str(data_dir), str(db_dir), encoder=encoder, llm_client=llm)
+        views = advisor.views
+        
+        samples: Dict[str, List[float]] = {}
+        
+        def record(name: str, ms: float, iteration: int):
+            if iteration >= args.warmup:
+                samples.setdefault(name, []).append(ms)
+        
+        for iteration in range(args.warmup + args.iterations):
+            for profile in profiles:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    for stage, ms in time_agents(advisor, profile).items():
+                        record(stage, ms, iteration)
+                    
+                    advisor.views = None
+                    _, ms = timed(advisor.get_recommendations, profile)
+                    record("pipeline", ms, iteration)
+                    
+                    # Same workflow with the agent graph run one stage at a time
+                    advisor.parallel_agents = False
+                    _, ms = timed(advisor.get_recommendations, profile)
+                    record("pipeline_sequential", ms, iteration)
+                    advisor.parallel_agents = True
+                    
+                    if views is not None:
+                        advisor.views = views
+                        _, ms = timed(advisor.get_recommendations, profile)
+                        record("pipeline_with_views", ms, iteration)
+        
+        return {
+            "benchmark": "pipeline",
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {
+                "catalog": catalog_label(args),
+                "profiles": len(profiles),
+                "iterations": args.iterations,
+                "warmup": args.warmup,
+                "llm_latency_ms": args.llm_latency_ms,
+                "llm_jitter_ms": args.llm_jitter_ms,
+                "encoder": encoder.model_name,
+                "views": args.views
+            },
+            "build_ms": round(build_ms, 1),
+            "stages": {name: summarize(values) for name, values in samples.items()}
+        }
+    finally:
+        shutil.rmtree(work)
+
+
+def compare(results: Dict, baseline: Dict, threshold: float, min_delta_ms: float) -> List[str]:
+    """Human-readable regressions of `results` against `baseline` (empty if none)."""
+    regressions = []
+    for stage, current in results["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if base is None:
+            continue
+        for metric in COMPARED_METRICS:
+            now, before = current[metric], base[metric]
+            if now > before * (1 + threshold) and now - before >= min_delta_ms:
+                regressions.append(f"{stage} {metric}: {before:.2f} → {now:.2f} ms "
+                                   f"(+{(now / before - 1) * 100 if before else float('inf'):.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline latency benchmark for the advisor pipeline")
+    parser.add_argument("--data-dir", default=str(ROOT / "data"))
+    parser.add_argument("--scale", type=int, default=0,
+                        help="benchmark a synthetic catalog this many times the BYU catalog instead")
+    parser.add_argument("--profiles", default=str(BENCH_DIR / "profiles.json"))
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--views", action="store_true",
+                        help="build materialized views and time the pipeline served from them")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT))
+    parser.add_argument("--baseline", default=None,
+                        help=f"baseline JSON to compare against (default: {DEFAULT_BASELINE.name} if present)")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown as a fraction of the baseline (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5,
+                        help="ignore slowdowns smaller than this many milliseconds")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store this run as the baseline")
+    args = parser.parse_args()
+    
+    results = run_benchmark(args)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    
+    print(f"{'stage':<22}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'n':>6}")
+    for stage, s in results["stages"].items():
+        print(f"{stage:<22}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['n']:>6}")
+    print(f"\n📄 Results written to {args.output}")
+    
+    baseline_path = Path(args.baseline) if args.baseline else DEFAULT_BASELINE
+    if args.save_baseline:
+        with open(baseline_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"📌 Baseline saved to {baseline_path}")
+        return
+    if not baseline_path.exists():
+        if args.baseline:
+            sys.exit(f"Baseline {baseline_path} not found")
+        return
+    
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    if baseline.get("config") != results["config"]:
+        print("⚠️  Baseline was recorded with a different configuration - comparison may not be meaningful")
+    if baseline.get("platform") != results["platform"]:
+        print(f"⚠️  Baseline was recorded on {baseline.get('platform')} - record one on this machine "
+              f"with --save-baseline for a reliable comparison")
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%} of {baseline_path.name}:")
+        for line in regressions:
+            print(f"   • {line}")
+        sys.exit(1)
+    print(f"\n✓ No regressions beyond {args.threshold:.0%} of {baseline_path.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,97 @@ Generate structured JSON data from BYU program PDFs for the undecided major advi
 This creates the exact data structure needed for your RAG system.
 """
 
+import argparse
+import itertools
 import json
+import math
+import random
 from pathlib import Path
 
-def generate_byu_course_data():
+from catalog_binary import export_binary_catalog
+from streaming_ingest import write_jsonl
+
+def build_class_overlap(classes_data):
+    """
+    Classes that apply to more than one program, most versatile first.
+    
+    Args:
+        classes_data: Classes with their applies_to_programs lists
+    
+    Returns:
+        class_overlap.json records (class fields plus program_count and versatility_score)
+    """
+    class_overlap_data = []
+    
+    # Group classes by how many programs they apply to
+    for cls in classes_data:
+        program_count = len(cls["applies_to_programs"])
+        if program_count > 1:
+            class_overlap_data.append({
+                "course_id": cls["course_id"],
+                "course_name": cls["course_name"],
+                "title": cls["title"],
+                "credit_hours": cls["credit_hours"],
+                "description": cls["description"],
+                "prerequisites": cls["prerequisites"],
+                "category": cls["category"],
+                "applies_to_programs": cls["applies_to_programs"],
+                "program_count": program_count,
+                "versatility_score": program_count * 10  # Higher = more versatile
+            })
+    
+    # Sort by versatility (most programs first)
+    class_overlap_data.sort(key=lambda x: x["program_count"], reverse=True)
+    return class_overlap_data
+
+
+def save_catalog(programs_data, classes_data, class_overlap_data, output_dir="data",
+                 derivatives=False):
+    """
+    Write the catalog as JSON, optionally with its JSONL and binary copies.
+    
+    Args:
+        programs_data: programs.json records
+        classes_data: classes.json records
+        class_overlap_data: class_overlap.json records
+        output_dir: Directory to write into (created if needed)
+        derivatives: Also write <name>.jsonl and catalog.sqlite (they must be
+                     regenerated whenever the JSON is edited)
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Save programs.json
+    with open(output_dir / "programs.json", "w") as f:
+        json.dump(programs_data, f, indent=2)
+    
+    # Save classes.json
+    with open(output_dir / "classes.json", "w") as f:
+        json.dump(classes_data, f, indent=2)
+    
+    # Save class_overlap.json
+    with open(output_dir / "class_overlap.json", "w") as f:
+        json.dump(class_overlap_data, f, indent=2)
+    
+    if not derivatives:
+        return
+    
+    # One record per line, for streaming ingestion (rag_system_setup.py --stream)
+    for name, records in (("programs", programs_data), ("classes", classes_data),
+                          ("class_overlap", class_overlap_data)):
+        write_jsonl(str(output_dir / f"{name}.jsonl"), records)
+    
+    # Compact binary copy of the catalog for fast loading
+    export_binary_catalog(str(output_dir))
+
+
+def generate_byu_course_data(derivatives=False):
     """
     Generate comprehensive course data based on the provided BYU program PDFs.
     This creates all the JSON files needed for your RAG chatbot.
+    
+    Args:
+        derivatives: Also write data/*.jsonl and data/catalog.sqlite
     """
     
     # Define all programs from your PDFs
@@ -464,43 +548,10 @@ def generate_byu_course_data():
     ]
     
     # Build class overlap data (classes used in multiple majors)
-    class_overlap_data = []
-    
-    # Group classes by how many programs they apply to
-    for cls in classes_data:
-        program_count = len(cls["applies_to_programs"])
-        if program_count > 1:
-            class_overlap_data.append({
-                "course_id": cls["course_id"],
-                "course_name": cls["course_name"],
-                "title": cls["title"],
-                "credit_hours": cls["credit_hours"],
-                "description": cls["description"],
-                "prerequisites": cls["prerequisites"],
-                "category": cls["category"],
-                "applies_to_programs": cls["applies_to_programs"],
-                "program_count": program_count,
-                "versatility_score": program_count * 10  # Higher = more versatile
-            })
-    
-    # Sort by versatility (most programs first)
-    class_overlap_data.sort(key=lambda x: x["program_count"], reverse=True)
+    class_overlap_data = build_class_overlap(classes_data)
     
     # Save all data files
-    output_dir = Path("data")
-    output_dir.mkdir(exist_ok=True)
-    
-    # Save programs.json
-    with open(output_dir / "programs.json", "w") as f:
-        json.dump(programs_data, f, indent=2)
-    
-    # Save classes.json
-    with open(output_dir / "classes.json", "w") as f:
-        json.dump(classes_data, f, indent=2)
-    
-    # Save class_overlap.json
-    with open(output_dir / "class_overlap.json", "w") as f:
-        json.dump(class_overlap_data, f, indent=2)
+    save_catalog(programs_data, classes_data, class_overlap_data, "data", derivatives)
     
     # Print summary
     print("=" * 70)
@@ -514,6 +565,9 @@ def generate_byu_course_data():
     print("   • data/programs.json")
     print("   • data/classes.json")
     print("   • data/class_overlap.json")
+    if derivatives:
+        print("   • data/*.jsonl")
+        print("   • data/catalog.sqlite")
     
     print("\n🎯 TOP 5 MOST VERSATILE CLASSES:")
     for i, cls in enumerate(class_overlap_data[:5], 1):
@@ -535,5 +589,225 @@ def generate_byu_course_data():
     print("🚀 Ready for Phase 2: RAG System Setup!")
     print("=" * 70)
 
+# ========================================
+# Synthetic catalogs for load testing
+# ========================================
+
+# Category → (department prefix, topic words used in titles and descriptions)
+SYNTHETIC_CATEGORIES = {
+    "Computer Science": ("CS", ["programming", "algorithms", "software", "systems", "data structures", "networks", "security", "machine learning"]),
+    "Mathematics": ("MATH", ["calculus", "linear algebra", "proofs", "analysis", "differential equations", "number theory", "topology", "optimization"]),
+    "Statistics": ("STAT", ["probability", "inference", "regression", "sampling", "bayesian methods", "experimental design", "time series", "data analysis"]),
+    "Business": ("BUS", ["management", "marketing", "strategy", "operations", "leadership", "supply chain", "negotiation", "entrepreneurship"]),
+    "Accounting": ("ACC", ["financial reporting", "auditing", "taxation", "cost accounting", "controls", "valuation", "ethics", "forensics"]),
+    "Economics": ("ECON", ["microeconomics", "macroeconomics", "econometrics", "game theory", "public policy", "labor markets", "trade", "development"]),
+    "Physics": ("PHYS", ["mechanics", "electromagnetism", "thermodynamics", "quantum mechanics", "optics", "relativity", "astrophysics", "materials"]),
+    "Chemistry": ("CHEM", ["organic chemistry", "inorganic chemistry", "biochemistry", "spectroscopy", "kinetics", "polymers", "lab methods", "analytical chemistry"]),
+    "Biology": ("BIO", ["genetics", "ecology", "cell biology", "evolution", "physiology", "microbiology", "neuroscience", "bioinformatics"]),
+    "Psychology": ("PSYC", ["cognition", "development", "social behavior", "research methods", "personality", "clinical practice", "perception", "motivation"]),
+    "Communications": ("COMM", ["public speaking", "journalism", "media", "rhetoric", "advertising", "public relations", "digital content", "storytelling"]),
+    "Writing": ("WRTG", ["composition", "technical writing", "argument", "editing", "research writing", "professional writing", "style", "creative nonfiction"]),
+}
+
+# Categories whose introductory courses serve as general education across all majors
+SHARED_CORE_CATEGORIES = ("Mathematics", "Statistics", "Writing", "Economics")
+
+COURSE_FORMS = ["Foundations of", "Principles of", "Methods in", "Topics in", "Applied",
+                "Advanced", "Seminar in", "Projects in"]
+
+# Most courses per department (3-digit numbers 100-999 leave room for ~900)
+COURSES_PER_DEPARTMENT = 400
+
+
+def _department_codes(n_departments):
+    """(category, code) per department: CS, MATH, ..., then CSA, MATHA, ..."""
+    categories = list(SYNTHETIC_CATEGORIES)
+    departments = []
+    for d in range(n_departments):
+        category = categories[d % len(categories)]
+        prefix = SYNTHETIC_CATEGORIES[category][0]
+        round_number = d // len(categories)
+        suffix = ""
+        while round_number > 0:
+            round_number -= 1
+            suffix = chr(ord("A") + round_number % 26) + suffix
+            round_number //= 26
+        departments.append((category, prefix + suffix))
+    return departments
+
+
+def _zipf_sample(rng, population, cum_weights, k):
+    """k distinct items drawn with the given cumulative weights."""
+    k = min(k, len(population))
+    chosen = []
+    seen = set()
+    while len(chosen) < k:
+        for item in rng.choices(population, cum_weights=cum_weights, k=k - len(chosen)):
+            if item not in seen:
+                seen.add(item)
+                chosen.append(item)
+    return chosen
+
+
+def generate_synthetic_catalog(n_programs, n_courses, prerequisite_depth=4, seed=0,
+                               output_dir=None):
+    """
+    Generate a seeded synthetic catalog in the same schema as the BYU data.
+    
+    Courses are spread over departments; course numbers rise with their
+    level in the prerequisite DAG (levels 0 .. prerequisite_depth - 1), and
+    every course above level 0 in a department requires courses from the
+    level below, so the longest prerequisite chain is exactly
+    `prerequisite_depth` courses (as long as departments have at least that
+    many courses). Program requirements mix home-department
+    courses, courses from sibling departments in the same category and
+    introductory "core" courses drawn with a Zipf distribution, which gives
+    the long-tailed overlap real catalogs have (a few courses count toward
+    most majors, most count toward one).
+    
+    Args:
+        n_programs: Number of programs
+        n_courses: Number of courses
+        prerequisite_depth: Levels in the prerequisite DAG (1 = no prerequisites)
+        seed: Random seed; the same arguments always produce the same catalog
+        output_dir: If given, write the catalog there (JSON, JSONL and binary)
+    
+    Returns:
+        (programs_data, classes_data, class_overlap_data)
+    """
+    rng = random.Random(seed)
+    depth = max(1, prerequisite_depth)
+    n_departments = max(len(SYNTHETIC_CATEGORIES), math.ceil(n_courses / COURSES_PER_DEPARTMENT))
+    departments = _department_codes(n_departments)
+    
+    # ---- Courses, department by department ----
+    classes_data = []
+    by_department = {}   # code → [level → [course_id]]
+    for d, (category, code) in enumerate(departments):
+        size = n_courses // n_departments + (1 if d < n_courses % n_departments else 0)
+        band = 900 // depth
+        levels = [[] for _ in range(depth)]
+        topics = SYNTHETIC_CATEGORIES[category][1]
+        for j in range(size):
+            level = j * depth // max(size, 1)
+            number = 100 + level * band + len(levels[level])
+            course_id = f"{code}{number}"
+            topic = rng.choice(topics)
+            related = rng.sample(topics, 3)
+            
+            prerequisites = ""
+            below = levels[level - 1] if level > 0 else []
+            # The first course of each level always continues the chain
+            if below and (not levels[level] or rng.random() < 0.85):
+                picks = [below[0]] if not levels[level] else rng.sample(below, min(len(below), rng.choice([1, 1, 2])))
+                names = [f"{p[:len(code)]} {p[len(code):]}" for p in picks]
+                if rng.random() < 0.1:
+                    names[-1] += " (can be concurrent)"
+                prerequisites = ", ".join(names)
+            
+            levels[level].append(course_id)
+            classes_data.append({
+                "course_id": course_id,
+                "course_name": f"{code} {number}",
+                "title": f"{rng.choice(COURSE_FORMS)} {topic.title()}",
+                "credit_hours": rng.choice([3.0, 3.0, 3.0, 3.0, 4.0, 2.0, 1.0]),
+                "description": (f"{'Introduction to' if level == 0 else 'Level ' + str(level + 1) + ' study of'} "
+                                f"{topic} for {category.lower()} students. Covers "
+                                f"{', '.join(related)} with applications and projects."),
+                "prerequisites": prerequisites,
+                "category": category,
+                "applies_to_programs": []
+            })
+        by_department[code] = levels
+    
+    # Introductory courses shared across majors, most popular first
+    core = [cid for category, code in departments if category in SHARED_CORE_CATEGORIES
+            for lvl in by_department[code][:2] for cid in lvl]
+    rng.shuffle(core)
+    core_weights = list(itertools.accumulate(1.0 / (rank + 1) ** 1.1 for rank in range(len(core))))
+    flat = {code: [cid for lvl in levels for cid in lvl] for code, levels in by_department.items()}
+    departments_in = {}
+    for category, code in departments:
+        departments_in.setdefault(category, []).append(code)
+    
+    # ---- Programs ----
+    course_index = {c["course_id"]: c for c in classes_data}
+    programs_data = []
+    tracks = {}
+    width = len(str(n_programs))
+    for p in range(n_programs):
+        category, home = departments[rng.randrange(n_departments)]
+        track = tracks[category] = tracks.get(category, 0) + 1
+        # Fixed-width track numbers, so no program name is a prefix of another
+        name = f"{category} Track {track:0{width}d} (BS)"
+        
+        home_courses = flat[home]
+        n_required = rng.randint(12, 24)
+        required = rng.sample(home_courses, min(len(home_courses), int(n_required * 0.6)))
+        siblings = [code for code in departments_in[category] if code != home] or [home]
+        sibling_pool = [cid for lvl in by_department[rng.choice(siblings)][:2] for cid in lvl]
+        extra = rng.sample(sibling_pool, min(len(sibling_pool), int(n_required * 0.15)))
+        if core:
+            extra += _zipf_sample(rng, core, core_weights, n_required - len(required) - len(extra))
+        taken = set(required)
+        for cid in extra:
+            if cid not in taken:
+                taken.add(cid)
+                required.append(cid)
+        electives = [cid for cid in home_courses if cid not in taken]
+        key_electives = rng.sample(electives, min(len(electives), rng.randint(3, 8)))
+        
+        credits = int(sum(course_index[cid]["credit_hours"] for cid in required))
+        programs_data.append({
+            "program_id": str(50000 + p),
+            "program_name": name,
+            "program_category": category,
+            "min_credit_hours": credits,
+            "max_credit_hours": credits + rng.choice([0, 3, 6, 9]),
+            "required_classes": required,
+            "key_electives": key_electives
+        })
+        for cid in required:
+            course_index[cid]["applies_to_programs"].append(name)
+    
+    class_overlap_data = build_class_overlap(classes_data)
+    if output_dir is not None:
+        save_catalog(programs_data, classes_data, class_overlap_data, output_dir, derivatives=True)
+    return programs_data, classes_data, class_overlap_data
+
+
+def main():
+    """Command-line entry point: the BYU catalog by default, or a synthetic one."""
+    parser = argparse.ArgumentParser(description="Generate the course catalog data files")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="generate a seeded synthetic catalog instead of the BYU data")
+    parser.add_argument("--scale", type=int, default=None,
+                        help="synthetic size as a multiple of the BYU catalog (9 programs, 28 courses)")
+    parser.add_argument("--programs", type=int, default=90)
+    parser.add_argument("--courses", type=int, default=280)
+    parser.add_argument("--depth", type=int, default=4, help="prerequisite DAG depth")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="data_synthetic")
+    parser.add_argument("--derivatives", action="store_true",
+                        help="also write data/*.jsonl and data/catalog.sqlite for the BYU data "
+                             "(synthetic catalogs always get them)")
+    args = parser.parse_args()
+    
+    if not args.synthetic:
+        generate_byu_course_data(args.derivatives)
+        return
+    
+    n_programs, n_courses = args.programs, args.courses
+    if args.scale:
+        n_programs, n_courses = 9 * args.scale, 28 * args.scale
+    programs, classes, overlap = generate_synthetic_catalog(
+        n_programs, n_courses, args.depth, args.seed, args.output)
+    print("=" * 70)
+    print("✓ SYNTHETIC CATALOG GENERATED")
+    print("=" * 70)
+    print(f"   • {len(programs)} programs, {len(classes)} classes, {len(overlap)} multi-major classes")
+    print(f"   • Prerequisite depth {args.depth}, seed {args.seed}")
+    print(f"   • Written to {args.output}/")
+
 if __name__ == "__main__":
-    generate_byu_course_data()
+    main()
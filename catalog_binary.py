@@ -0,0 +1,481 @@
+"""
+Binary Catalog - Compact SQLite form of the course catalog.
+
+JSON stays the interchange format; data/catalog.sqlite is derived from it
+by `export_binary_catalog` (and turned back into JSON by
+`export_json_catalog`). The file carries indexes on course id, course
+name, category and the program ↔ course relations, and is opened
+read-only with SQLite memory-mapped I/O.
+
+The export is used whenever it matches the JSON it was exported from
+(its source_stamp), or in place of the JSON when classes.json is absent (a
+deployment may ship catalog.sqlite alone):
+
+  • CatalogStore.load()        - returns a BinaryCatalogStore: opening it
+                                 reads nothing, courses_by_id and the other
+                                 lookups query SQLite on first use, and the
+                                 full record lists are only built when a
+                                 component reads programs_data / classes_data
+  • rag_system_setup --stream  - iter_programs / iter_classes / iter_overlap
+                                 stream the records; the catalog is never
+                                 loaded (stream_binary_records)
+
+benchmarks/catalog_load.py compares the cold start and memory of each.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from catalog_store import CatalogStore, CourseRecord, ProgramRecord, index_program_words
+
+BINARY_CATALOG_FILE = "catalog.sqlite"
+
+# Bump when the table layout changes
+BINARY_FORMAT_VERSION = 1
+
+# SQLite memory-mapped I/O window for readers
+MMAP_BYTES = 256 * 1024 * 1024
+
+# Separator for list columns (never appears in ids or program names)
+LIST_SEP = "\x1f"
+
+SOURCE_FILES = ("programs.json", "classes.json", "class_overlap.json")
+
+COURSE_FIELDS = ("course_id", "course_name", "title", "credit_hours", "description",
+                 "prerequisites", "category")
+PROGRAM_FIELDS = ("program_id", "program_name", "program_category",
+                  "min_credit_hours", "max_credit_hours")
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE programs (
+    position INTEGER PRIMARY KEY,
+    program_id TEXT UNIQUE, program_name TEXT, program_category TEXT,
+    min_credit_hours, max_credit_hours,
+    required_classes TEXT, key_electives TEXT, extra TEXT
+);
+CREATE TABLE courses (
+    position INTEGER PRIMARY KEY,
+    course_id TEXT UNIQUE, course_name TEXT, title TEXT, credit_hours,
+    description TEXT, prerequisites TEXT, category TEXT,
+    applies_to_programs TEXT, extra TEXT,
+    overlap_rank INTEGER, program_count, versatility_score
+);
+CREATE TABLE program_courses (program_id TEXT, course_id TEXT);
+CREATE INDEX idx_courses_name ON courses (course_name);
+CREATE INDEX idx_courses_category ON courses (category);
+CREATE INDEX idx_courses_overlap ON courses (overlap_rank);
+CREATE INDEX idx_programs_name ON programs (program_name);
+CREATE INDEX idx_program_courses_program ON program_courses (program_id);
+CREATE INDEX idx_program_courses_course ON program_courses (course_id);
+"""
+
+
+def source_stamp(data_dir: str) -> str:
+    """Sizes and modification times of the JSON files, to detect a stale export."""
+    parts = []
+    for name in SOURCE_FILES:
+        path = Path(data_dir) / name
+        if path.exists():
+            stat = path.stat()
+            parts.append(f"{name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return "|".join(parts)
+
+
+def _join(values) -> str:
+    return LIST_SEP.join(values)
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return value.split(LIST_SEP) if value else []
+
+
+def _extra(record: Dict, known) -> Optional[str]:
+    """Any fields beyond the known columns, kept so the JSON round-trips."""
+    extra = {k: v for k, v in record.items() if k not in known}
+    return json.dumps(extra) if extra else None
+
+
+def export_binary_catalog(data_dir: str = "data", path: Optional[str] = None) -> Path:
+    """
+    Write the JSON catalog in data_dir to a SQLite file.
+    
+    Args:
+        data_dir: Directory with programs.json, classes.json and class_overlap.json
+        path: Output file (default: <data_dir>/catalog.sqlite)
+    
+    Returns:
+        Path of the written file
+    """
+    data = {}
+    for name in SOURCE_FILES:
+        with open(Path(data_dir) / name, 'r') as f:
+            data[name] = json.load(f)
+    programs, classes, overlap = (data[name] for name in SOURCE_FILES)
+    
+    out = Path(path) if path else Path(data_dir) / BINARY_CATALOG_FILE
+    tmp = out.with_suffix(".tmp")
+    if tmp.exists():
+        tmp.unlink()
+    
+    overlap_by_id = {c["course_id"]: (rank, c) for rank, c in enumerate(overlap)}
+    conn = sqlite3.connect(str(tmp))
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO programs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+        (pos, p["program_id"], p["program_name"], p.get("program_category", ""),
+         p.get("min_credit_hours"), p.get("max_credit_hours"),
+         _join(p.get("required_classes", [])), _join(p.get("key_electives", [])),
+         _extra(p, PROGRAM_FIELDS + ("required_classes", "key_electives")))
+        for pos, p in enumerate(programs)
+    ])
+    rows = []
+    for pos, c in enumerate(classes):
+        rank, entry = overlap_by_id.get(c["course_id"], (None, {}))
+        rows.append((pos,) + tuple(c.get(f) for f in COURSE_FIELDS) + (
+            _join(c.get("applies_to_programs", [])),
+            _extra(c, COURSE_FIELDS + ("applies_to_programs",)),
+            rank, entry.get("program_count"), entry.get("versatility_score")))
+    conn.executemany("INSERT INTO courses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.executemany("INSERT INTO program_courses VALUES (?, ?)", [
+        (p["program_id"], cid) for p in programs for cid in p.get("required_classes", [])
+    ])
+    conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+        ("format_version", str(BINARY_FORMAT_VERSION)),
+        ("source_stamp", source_stamp(data_dir))
+    ])
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    tmp.replace(out)
+    return out
+
+
+class BinaryCatalog:
+    """Read-only, lazily queried catalog backed by the SQLite export."""
+    
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        self.conn.execute(f"PRAGMA mmap_size = {MMAP_BYTES}")
+        self.conn.execute("PRAGMA query_only = 1")
+        # Lookups may come from concurrent requests; one query at a time per connection
+        self._lock = threading.Lock()
+        self.meta = dict(self.conn.execute("SELECT key, value FROM meta").fetchall())
+        if self.meta.get("format_version") != str(BINARY_FORMAT_VERSION):
+            raise ValueError(f"{self.path} has catalog format {self.meta.get('format_version')}, "
+                             f"expected {BINARY_FORMAT_VERSION} - re-export it")
+    
+    @classmethod
+    def open(cls, data_dir: str = "data") -> Optional["BinaryCatalog"]:
+        """
+        The export in data_dir, or None if there is none or it is stale: with
+        classes.json present it must match the JSON files; without it, the
+        export is the catalog.
+        """
+        path = Path(data_dir) / BINARY_CATALOG_FILE
+        if not path.exists():
+            return None
+        try:
+            catalog = cls(str(path))
+        except (sqlite3.Error, ValueError):
+            return None
+        has_json = (Path(data_dir) / "classes.json").exists()
+        if has_json and catalog.meta.get("source_stamp") != source_stamp(data_dir):
+            catalog.close()
+            return None
+        return catalog
+    
+    def close(self):
+        self.conn.close()
+    
+    # ---- row → dict -------------------------------------------------------
+    
+    @staticmethod
+    def _course_dict(row: Tuple) -> Dict:
+        course = dict(zip(COURSE_FIELDS, row[:7]))
+        course["applies_to_programs"] = _split(row[7])
+        if row[8]:
+            course.update(json.loads(row[8]))
+        return course
+    
+    @staticmethod
+    def _program_dict(row: Tuple) -> Dict:
+        program = dict(zip(PROGRAM_FIELDS, row[:5]))
+        program["required_classes"] = _split(row[5])
+        program["key_electives"] = _split(row[6])
+        if row[7]:
+            program.update(json.loads(row[7]))
+        return program
+    
+    _COURSE_COLUMNS = ", ".join(COURSE_FIELDS + ("applies_to_programs", "extra"))
+    _PROGRAM_COLUMNS = ", ".join(PROGRAM_FIELDS + ("required_classes", "key_electives", "extra"))
+    
+    def _query(self, sql: str, args: Tuple = ()) -> List[Tuple]:
+        with self._lock:
+            return self.conn.execute(sql, args).fetchall()
+    
+    def _column(self, sql: str, args: Tuple = ()) -> List:
+        return [row[0] for row in self._query(sql, args)]
+    
+    def _course_record(self, clause: str, args: Tuple) -> Optional[CourseRecord]:
+        rows = self._query(f"SELECT {self._COURSE_COLUMNS}, versatility_score FROM courses "
+                           f"WHERE {clause} ORDER BY position LIMIT 1", args)
+        # versatility_score is only set for class_overlap.json entries, like in CatalogStore
+        return CourseRecord(self._course_dict(rows[0]), rows[0][9]) if rows else None
+    
+    def _program_record(self, clause: str, args: Tuple) -> Optional[ProgramRecord]:
+        rows = self._query(f"SELECT {self._PROGRAM_COLUMNS} FROM programs "
+                           f"WHERE {clause} ORDER BY position LIMIT 1", args)
+        return ProgramRecord(self._program_dict(rows[0])) if rows else None
+    
+    # ---- lazy lookups -----------------------------------------------------
+    
+    def course_count(self) -> int:
+        return self._query("SELECT COUNT(*) FROM courses")[0][0]
+    
+    def program_count(self) -> int:
+        return self._query("SELECT COUNT(*) FROM programs")[0][0]
+    
+    def course(self, course_id: str) -> Optional[CourseRecord]:
+        """One course by id (indexed lookup)."""
+        return self._course_record("course_id = ?", (course_id,))
+    
+    def course_by_name(self, course_name: str) -> Optional[CourseRecord]:
+        """One course by display name, e.g. "CS 111"."""
+        return self._course_record("course_name = ?", (course_name,))
+    
+    def program(self, program_id: str) -> Optional[ProgramRecord]:
+        return self._program_record("program_id = ?", (program_id,))
+    
+    def program_by_name(self, program_name: str) -> Optional[ProgramRecord]:
+        return self._program_record("program_name = ?", (program_name,))
+    
+    def course_ids(self) -> List[str]:
+        """Every course id, in catalog order."""
+        return self._column("SELECT course_id FROM courses ORDER BY position")
+    
+    def course_names(self) -> List[str]:
+        return self._column("SELECT course_name FROM courses ORDER BY position")
+    
+    def categories(self) -> List[str]:
+        return self._column("SELECT category FROM courses GROUP BY category ORDER BY MIN(position)")
+    
+    def overlap_ids(self) -> List[str]:
+        """Ids of the class_overlap.json courses."""
+        return self._column("SELECT course_id FROM courses WHERE overlap_rank IS NOT NULL")
+    
+    def courses_in_category(self, category: str) -> List[str]:
+        """Course ids in a category, in catalog order."""
+        return self._column("SELECT course_id FROM courses WHERE category = ? ORDER BY position",
+                            (category,))
+    
+    def courses_for_program(self, program_id: str) -> List[str]:
+        """Required course ids of a program."""
+        return self._column("SELECT course_id FROM program_courses WHERE program_id = ? ORDER BY rowid",
+                            (program_id,))
+    
+    def programs_for_course(self, course_id: str) -> List[str]:
+        """Ids of the programs that require a course."""
+        return self._column("SELECT program_id FROM program_courses WHERE course_id = ? ORDER BY rowid",
+                            (course_id,))
+    
+    def listed_programs(self, course_id: str) -> List[str]:
+        """The course's applies_to_programs names."""
+        rows = self._query("SELECT applies_to_programs FROM courses WHERE course_id = ?", (course_id,))
+        return _split(rows[0][0]) if rows else []
+    
+    # ---- streaming ------------------------------------------------------------
+    
+    def _iter_rows(self, query: str, convert, batch_size: int) -> Iterator[Dict]:
+        cursor = self.conn.execute(query)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield convert(row)
+    
+    def iter_programs(self, batch_size: int = 1000) -> Iterator[Dict]:
+        """Stream every program as a programs.json dict."""
+        return self._iter_rows(f"SELECT {self._PROGRAM_COLUMNS} FROM programs ORDER BY position",
+                               self._program_dict, batch_size)
+    
+    def iter_classes(self, batch_size: int = 1000) -> Iterator[Dict]:
+        """Stream every course as a classes.json dict without holding them all."""
+        return self._iter_rows(f"SELECT {self._COURSE_COLUMNS} FROM courses ORDER BY position",
+                               self._course_dict, batch_size)
+    
+    def iter_overlap(self, batch_size: int = 1000) -> Iterator[Dict]:
+        """Stream the class_overlap.json entries, in their original order."""
+        return self._iter_rows(
+            f"SELECT {self._COURSE_COLUMNS}, program_count, versatility_score FROM courses "
+            f"WHERE overlap_rank IS NOT NULL ORDER BY overlap_rank",
+            lambda row: dict(self._course_dict(row), program_count=row[9], versatility_score=row[10]),
+            batch_size)
+    
+    # ---- full load ----------------------------------------------------------
+    
+    def load_all(self) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+        """(programs, classes, class_overlap) exactly as the JSON files hold them."""
+        programs = [self._program_dict(row) for row in self.conn.execute(
+            f"SELECT {self._PROGRAM_COLUMNS} FROM programs ORDER BY position")]
+        classes = []
+        overlap = []
+        for row in self.conn.execute(
+                f"SELECT {self._COURSE_COLUMNS}, overlap_rank, program_count, versatility_score "
+                f"FROM courses ORDER BY position"):
+            course = self._course_dict(row)
+            classes.append(course)
+            if row[9] is not None:
+                overlap.append((row[9], dict(course, program_count=row[10], versatility_score=row[11])))
+        overlap.sort(key=lambda item: item[0])
+        return programs, classes, [entry for _, entry in overlap]
+
+
+class _LazyIndex(Mapping):
+    """Read-only mapping whose values are queried from the export on first access."""
+    
+    def __init__(self, fetch: Callable[[str], Optional[object]], keys: Callable[[], List[str]]):
+        """
+        Args:
+            fetch: key → value, or None for a missing key
+            keys: Every key, in catalog order (only called to iterate or count)
+        """
+        self._fetch = fetch
+        self._keys = keys
+        self._found: Dict[str, object] = {}
+    
+    def __getitem__(self, key):
+        if key not in self._found:
+            value = self._fetch(key)
+            if value is None:
+                raise KeyError(key)
+            self._found[key] = value
+        return self._found[key]
+    
+    def __iter__(self):
+        return iter(self._keys())
+    
+    def __len__(self) -> int:
+        return len(self._keys())
+
+
+class BinaryCatalogStore(CatalogStore):
+    """
+    CatalogStore backed by the export. Opening it reads only the meta
+    table; the lookup mappings query SQLite per key (and remember what they
+    found), and the raw record lists - with the full in-memory indexes -
+    are built once, on first access, for components that need every record.
+    """
+    
+    def __init__(self, catalog: BinaryCatalog):
+        """
+        Args:
+            catalog: Open export (kept open for the life of the store)
+        """
+        self.binary = catalog
+        self._full: Optional[CatalogStore] = None
+        self._full_lock = threading.Lock()
+        self._programs: Optional[Tuple[ProgramRecord, ...]] = None
+        self._programs_by_word: Optional[Mapping[str, Tuple[str, ...]]] = None
+        self._overlap_ids: Optional[frozenset] = None
+        
+        program_ids = lambda: [p.program_id for p in self.programs]
+        self.courses_by_id: Mapping[str, CourseRecord] = _LazyIndex(catalog.course, catalog.course_ids)
+        self.courses_by_name: Mapping[str, CourseRecord] = _LazyIndex(catalog.course_by_name,
+                                                                      catalog.course_names)
+        self.programs_by_id: Mapping[str, ProgramRecord] = _LazyIndex(catalog.program, program_ids)
+        self.programs_by_name: Mapping[str, ProgramRecord] = _LazyIndex(
+            catalog.program_by_name, lambda: [p.program_name for p in self.programs])
+        self.courses_by_category: Mapping[str, Tuple[str, ...]] = _LazyIndex(
+            lambda category: tuple(catalog.courses_in_category(category)) or None, catalog.categories)
+        self.program_courses: Mapping[str, Tuple[str, ...]] = _LazyIndex(
+            lambda pid: tuple(catalog.courses_for_program(pid)) if catalog.program(pid) else None,
+            program_ids)
+        self.course_programs: Mapping[str, Tuple[str, ...]] = _LazyIndex(
+            self._course_programs, lambda: [cid for cid in catalog.course_ids() if self._course_programs(cid)])
+    
+    def _course_programs(self, course_id: str) -> Optional[Tuple[str, ...]]:
+        """Programs that require the course, then those it lists (as CatalogStore builds it)."""
+        ids = self.binary.programs_for_course(course_id)
+        for name in self.binary.listed_programs(course_id):
+            program = self.programs_by_name.get(name)
+            if program is not None and program.program_id not in ids:
+                ids.append(program.program_id)
+        return tuple(ids) or None
+    
+    def _loaded(self) -> CatalogStore:
+        """The whole catalog in memory, built on first use."""
+        with self._full_lock:
+            if self._full is None:
+                self._full = CatalogStore(*self.binary.load_all())
+            return self._full
+    
+    @property
+    def programs(self) -> Tuple[ProgramRecord, ...]:
+        # Programs are few; they are read on their own without the courses
+        if self._programs is None:
+            self._programs = tuple(ProgramRecord(p) for p in self.binary.iter_programs())
+        return self._programs
+    
+    @property
+    def programs_by_word(self) -> Mapping[str, Tuple[str, ...]]:
+        if self._programs_by_word is None:
+            self._programs_by_word = index_program_words(self.programs)
+        return self._programs_by_word
+    
+    @property
+    def overlap_ids(self) -> frozenset:
+        if self._overlap_ids is None:
+            self._overlap_ids = frozenset(self.binary.overlap_ids())
+        return self._overlap_ids
+    
+    @property
+    def courses(self) -> Tuple[CourseRecord, ...]:
+        return self._loaded().courses
+    
+    @property
+    def programs_data(self) -> List[Dict]:
+        return self._loaded().programs_data
+    
+    @property
+    def classes_data(self) -> List[Dict]:
+        return self._loaded().classes_data
+    
+    @property
+    def overlap_data(self) -> List[Dict]:
+        return self._loaded().overlap_data
+
+
+def stream_binary_records(catalog: BinaryCatalog, name: str) -> Iterator[Dict]:
+    """
+    Records of one catalog file ("programs", "classes" or "class_overlap")
+    streamed from the export; the catalog is closed when they run out.
+    """
+    iterators = {"programs": catalog.iter_programs, "classes": catalog.iter_classes,
+                 "class_overlap": catalog.iter_overlap}
+    try:
+        yield from iterators[name]()
+    finally:
+        catalog.close()
+
+
+def export_json_catalog(path: str, data_dir: str = "data"):
+    """
+    Write a binary catalog back out as the three JSON interchange files.
+    
+    Args:
+        path: SQLite catalog file
+        data_dir: Output directory
+    """
+    catalog = BinaryCatalog(path)
+    programs, classes, overlap = catalog.load_all()
+    catalog.close()
+    out = Path(data_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    for name, data in zip(SOURCE_FILES, (programs, classes, overlap)):
+        with open(out / name, 'w') as f:
+            json.dump(data, f, indent=2)
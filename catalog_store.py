@@ -0,0 +1,207 @@
+"""
+Catalog Store - The course catalog, loaded once per process and indexed.
+
+programs.json, classes.json and class_overlap.json are read once per
+data directory. CatalogStore.load() returns the same store to every
+caller (advisor, database build, each Streamlit session) until the files
+change on disk. Records use __slots__. The lookup indexes are read-only
+mappings built at load time:
+  • courses by course_id, by course_name ("CS 111") and by category
+  • programs by program_id and by program_name
+  • program_id → required course ids, course_id → program_ids
+  • word → program_ids, for matching free-text interests
+
+When data/catalog.sqlite matches the JSON it was exported from (or
+stands in for it: no classes.json), load() returns a BinaryCatalogStore
+instead (see catalog_binary.py): the same interface, with the lookups
+served from SQLite on demand and the raw lists built only when read.
+"""
+
+import json
+import re
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+# Words too common to identify a program in free text
+STOPWORDS = {"and", "the", "for", "with", "want", "work", "into", "from", "about", "science", "studies"}
+
+
+class CourseRecord:
+    """One course from classes.json (plus its overlap versatility score)."""
+    __slots__ = ("course_id", "course_name", "title", "description", "credit_hours",
+                 "category", "prerequisites", "applies_to_programs", "program_count",
+                 "versatility_score")
+    
+    def __init__(self, data: Dict, versatility_score: Optional[float] = None):
+        self.course_id = data["course_id"]
+        self.course_name = data.get("course_name", data["course_id"])
+        self.title = data.get("title", "")
+        self.description = data.get("description", "")
+        self.credit_hours = data.get("credit_hours", 0)
+        self.category = data.get("category", "")
+        self.prerequisites = data.get("prerequisites", "")
+        self.applies_to_programs: Tuple[str, ...] = tuple(data.get("applies_to_programs", []))
+        self.program_count = len(self.applies_to_programs)
+        # Courses outside class_overlap.json get the same 10-per-program estimate
+        self.versatility_score = (versatility_score if versatility_score is not None
+                                  else self.program_count * 10)
+    
+    def __repr__(self) -> str:
+        return f"CourseRecord({self.course_id!r})"
+
+
+class ProgramRecord:
+    """One program from programs.json."""
+    __slots__ = ("program_id", "program_name", "program_category", "min_credit_hours",
+                 "max_credit_hours", "required_classes", "key_electives")
+    
+    def __init__(self, data: Dict):
+        self.program_id = data["program_id"]
+        self.program_name = data["program_name"]
+        self.program_category = data.get("program_category", "")
+        self.min_credit_hours = data.get("min_credit_hours")
+        self.max_credit_hours = data.get("max_credit_hours")
+        self.required_classes: Tuple[str, ...] = tuple(data.get("required_classes", []))
+        self.key_electives: Tuple[str, ...] = tuple(data.get("key_electives", []))
+    
+    def __repr__(self) -> str:
+        return f"ProgramRecord({self.program_id!r}, {self.program_name!r})"
+
+
+def _words(text: str) -> List[str]:
+    return [w for w in re.findall(r'[a-z]+', text.lower()) if len(w) > 2 and w not in STOPWORDS]
+
+
+def index_program_words(programs) -> Mapping[str, Tuple[str, ...]]:
+    """word → ids of the programs whose name or category contains it."""
+    by_word: Dict[str, List[str]] = {}
+    for program in programs:
+        for word in set(_words(f"{program.program_name} {program.program_category}")):
+            by_word.setdefault(word, []).append(program.program_id)
+    return MappingProxyType({word: tuple(ids) for word, ids in by_word.items()})
+
+
+class CatalogStore:
+    """
+    Immutable, indexed view of the catalog.
+    
+    The raw JSON lists stay available as programs_data / classes_data /
+    overlap_data for components that precompute their own matrices from
+    them; treat them as read-only.
+    """
+    
+    _stores: Dict[str, "CatalogStore"] = {}
+    _lock = threading.Lock()
+    _stamp: Tuple = ()   # File modification times the store was loaded from
+    
+    def __init__(self, programs_data: List[Dict], classes_data: List[Dict],
+                 overlap_data: Optional[List[Dict]] = None):
+        """
+        Build records and indexes from already-parsed catalog data.
+        
+        Args:
+            programs_data: Programs from programs.json
+            classes_data: Courses from classes.json
+            overlap_data: Optional class_overlap.json
+        """
+        self.programs_data = programs_data
+        self.classes_data = classes_data
+        self.overlap_data = overlap_data or []
+        
+        versatility = {c["course_id"]: c["versatility_score"] for c in self.overlap_data}
+        self.courses: Tuple[CourseRecord, ...] = tuple(
+            CourseRecord(c, versatility.get(c["course_id"])) for c in classes_data)
+        self.programs: Tuple[ProgramRecord, ...] = tuple(ProgramRecord(p) for p in programs_data)
+        self.overlap_ids = frozenset(versatility)
+        
+        self.courses_by_id: Mapping[str, CourseRecord] = MappingProxyType(
+            {c.course_id: c for c in self.courses})
+        self.courses_by_name: Mapping[str, CourseRecord] = MappingProxyType(
+            {c.course_name: c for c in self.courses})
+        self.programs_by_id: Mapping[str, ProgramRecord] = MappingProxyType(
+            {p.program_id: p for p in self.programs})
+        self.programs_by_name: Mapping[str, ProgramRecord] = MappingProxyType(
+            {p.program_name: p for p in self.programs})
+        
+        by_category: Dict[str, List[str]] = {}
+        for course in self.courses:
+            by_category.setdefault(course.category, []).append(course.course_id)
+        self.courses_by_category: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {cat: tuple(ids) for cat, ids in by_category.items()})
+        
+        # program → required courses, course → programs that require or list it
+        self.program_courses: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {p.program_id: p.required_classes for p in self.programs})
+        course_programs: Dict[str, List[str]] = {}
+        for program in self.programs:
+            for cid in program.required_classes:
+                course_programs.setdefault(cid, []).append(program.program_id)
+        for course in self.courses:
+            for name in course.applies_to_programs:
+                program = self.programs_by_name.get(name)
+                ids = course_programs.setdefault(course.course_id, [])
+                if program is not None and program.program_id not in ids:
+                    ids.append(program.program_id)
+        self.course_programs: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {cid: tuple(ids) for cid, ids in course_programs.items()})
+        
+        self.programs_by_word: Mapping[str, Tuple[str, ...]] = index_program_words(self.programs)
+    
+    @classmethod
+    def load(cls, data_dir: str = "data") -> "CatalogStore":
+        """
+        The process-wide store for `data_dir`, reloaded only if a file changed.
+        
+        Args:
+            data_dir: Directory with programs.json, classes.json and class_overlap.json
+                      and/or catalog.sqlite (used when it matches the JSON)
+        """
+        # Imported here: catalog_binary builds on the classes above
+        from catalog_binary import BINARY_CATALOG_FILE, BinaryCatalog, BinaryCatalogStore
+        
+        paths = [Path(data_dir) / name for name in
+                 ("programs.json", "classes.json", "class_overlap.json", BINARY_CATALOG_FILE)]
+        key = str(Path(data_dir).resolve())
+        stamp = tuple(p.stat().st_mtime_ns if p.exists() else 0 for p in paths)
+        
+        with cls._lock:
+            store = cls._stores.get(key)
+            if store is None or store._stamp != stamp:
+                # A fresh export opens without parsing anything; records are queried as needed
+                binary = BinaryCatalog.open(data_dir)
+                if binary is not None:
+                    store = BinaryCatalogStore(binary)
+                else:
+                    data = []
+                    for path in paths[:3]:
+                        if path.exists():
+                            with open(path, 'r') as f:
+                                data.append(json.load(f))
+                        elif path.name == "class_overlap.json":
+                            data.append([])
+                        else:
+                            raise FileNotFoundError(f"{path} not found - run byu_data_generator.py first")
+                    store = cls(*data)
+                store._stamp = stamp
+                cls._stores[key] = store
+            return store
+    
+    def programs_matching(self, text: str) -> List[ProgramRecord]:
+        """Programs whose name or category shares a word with `text`, most shared words first."""
+        counts: Dict[str, int] = {}
+        for word in set(_words(text)):
+            for program_id in self.programs_by_word.get(word, ()):
+                counts[program_id] = counts.get(program_id, 0) + 1
+        ranked = sorted(counts, key=lambda pid: (-counts[pid], pid))
+        return [self.programs_by_id[pid] for pid in ranked]
+    
+    def courses_for_program(self, program_id: str) -> List[CourseRecord]:
+        """Required courses of a program that are in the catalog."""
+        return [self.courses_by_id[cid] for cid in self.program_courses.get(program_id, ())
+                if cid in self.courses_by_id]
+    
+    def programs_for_course(self, course_id: str) -> List[ProgramRecord]:
+        """Programs that require or list a course."""
+        return [self.programs_by_id[pid] for pid in self.course_programs.get(course_id, ())]
@@ -6,6 +6,10 @@ Handles conversational interactions with context awareness and memory
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 
+from prerequisites import COURSE_CODE
+from ranking import resolve_majors
+from tracing import record_llm_usage
+
 try:
     from config import OPENAI_API_KEY
     from openai import OpenAI
@@ -30,7 +34,24 @@ class ChatAgent:
     and provides natural, helpful responses about course recommendations
     """
     
-    def __init__(self):
+    # Intents answered from catalog data even when the LLM is available
+    DATA_INTENTS = {"closest_programs", "switching_cost", "similar_programs", "related_courses"}
+    
+    def __init__(self, prereq_graph=None, degree_audit=None, program_similarity=None,
+                 course_neighbors=None, llm_client=None):
+        """
+        Args:
+            prereq_graph: Optional PrerequisiteGraph for exact "what do I take first" answers
+            degree_audit: Optional DegreeAudit for "which majors am I closest to?"
+            program_similarity: Optional ProgramSimilarity for similar majors and switching costs
+            course_neighbors: Optional CourseNeighbors for "courses like CS 111"
+            llm_client: Optional OpenAI-style client (default: the configured OpenAI client)
+        """
+        self.client = llm_client if llm_client is not None else client
+        self.prereq_graph = prereq_graph
+        self.degree_audit = degree_audit
+        self.program_similarity = program_similarity
+        self.course_neighbors = course_neighbors
         self.chat_history: List[ChatMessage] = []
         self.context = {
             "recommendations": [],
@@ -103,7 +124,7 @@ Top recommended courses:
         intent = self._detect_intent(user_message)
         
         # Generate response based on AI availability
-        if AI_AVAILABLE:
+        if self.client is not None and intent not in self.DATA_INTENTS:
             response = self._generate_ai_response(user_message, intent)
         else:
             response = self._generate_template_response(user_message, intent)
@@ -122,7 +143,15 @@ Top recommended courses:
         message_lower = message.lower()
         
         # Intent patterns
-        if any(word in message_lower for word in ["why", "explain", "reasoning"]):
+        if any(phrase in message_lower for phrase in ["closest to", "closest major", "close to finishing", "am i closest"]):
+            return "closest_programs"
+        elif any(phrase in message_lower for phrase in ["courses like", "similar course", "courses similar", "related course"]):
+            return "related_courses"
+        elif "switch" in message_lower:
+            return "switching_cost"
+        elif any(phrase in message_lower for phrase in ["similar to", "majors like", "programs like"]):
+            return "similar_programs"
+        elif any(word in message_lower for word in ["why", "explain", "reasoning"]):
             return "explanation"
         elif any(word in message_lower for word in ["tell me more", "more about", "details"]):
             return "details"
@@ -163,13 +192,14 @@ Top recommended courses:
             })
             
             # Call OpenAI API only if client is available
-            if client is not None:
-                response = client.chat.completions.create(
+            if self.client is not None:
+                response = self.client.chat.completions.create(
                     model="gpt-4o-mini",
                     messages=api_messages,
                     max_tokens=200,
                     temperature=0.7
                 )
+                record_llm_usage(response)
                 content = response.choices[0].message.content
                 return content.strip() if content is not None else ""
             else:
@@ -203,9 +233,61 @@ Top recommended courses:
             if recs:
                 course = recs[0]
                 prereq = course.get('prereq_status', 'Check with advisor')
+                if self.prereq_graph is not None and course.get('course_id'):
+                    missing = self.prereq_graph.missing_prerequisites(
+                        course['course_id'], profile.get('completed_courses') or [])
+                    if missing:
+                        return f"For {course['course_name']}, you'll need to take {', '.join(missing)} first (in that order). Everything else on the list is open to you now!"
                 return f"For {course['course_name']}, the prerequisites are: {prereq}. Most of these recommended courses are designed to be accessible to first-year students!"
             return "Most of these courses are accessible to first-year students, but it's always good to verify prerequisites with your advisor."
         
+        elif intent == "closest_programs":
+            completed = profile.get('completed_courses') or []
+            if self.degree_audit is None or not completed:
+                return "Tell me which courses you've already completed and I can show which majors you're closest to finishing!"
+            closest = self.degree_audit.closest_programs(completed, top_k=3)
+            lines = [f"{p['program_name']}: {p['remaining_credits']:g} required credits left ({p['percent_complete']}% done)"
+                     for p in closest]
+            return "Based on the courses you've completed, you're closest to:\n- " + "\n- ".join(lines)
+        
+        elif intent == "switching_cost":
+            if self.program_similarity is None:
+                return "Switching majors is common! Your advisor can compare how many of your credits would carry over."
+            mentioned = self.program_similarity.programs_in(message)
+            if len(mentioned) == 1:
+                # "switch to X": from the first considered major that is not X
+                names = self.program_similarity.program_names
+                current = [names[j] for major in profile.get('considering_majors', [])
+                           for j in resolve_majors([major], names) if names[j] != mentioned[0]]
+                mentioned = current[:1] + mentioned
+            if len(mentioned) < 2:
+                return "Which two majors would you like to compare? For example: \"How costly is it to switch from Finance to Information Systems?\""
+            cost = self.program_similarity.switch_cost(mentioned[0], mentioned[1])
+            if cost is None:
+                return "I couldn't find one of those majors in the catalog."
+            return f"Switching from {cost['from_program']} to {cost['to_program']}: {cost['shared_credits']:g} required credits carry over, and {cost['switching_cost']:g} required credits would remain."
+        
+        elif intent == "similar_programs":
+            if self.program_similarity is None:
+                return "Many majors share foundational courses - ask your advisor which ones overlap most with your interests!"
+            mentioned = self.program_similarity.programs_in(message) or profile.get('considering_majors', [])[:1]
+            similar = self.program_similarity.similar_programs(mentioned[0]) if mentioned else []
+            if not similar:
+                return "Which major would you like to compare? For example: \"What majors are similar to Computer Science?\""
+            lines = [f"{p['program_name']} ({p['shared_credits']:g} shared required credits, switch cost {p['switching_cost']:g} credits)"
+                     for p in similar]
+            return f"Majors most similar to {mentioned[0]}:\n- " + "\n- ".join(lines)
+        
+        elif intent == "related_courses":
+            match = COURSE_CODE.search(message.upper())
+            course_id = f"{match.group(1)}{match.group(2)}" if match else (recs[0].get('course_id') if recs else None)
+            related = self.course_neighbors.related(course_id, top_k=3) if self.course_neighbors and course_id else []
+            if not related:
+                return "Tell me which course you have in mind (e.g. \"courses like CS 111\") and I'll find similar ones!"
+            name = self.course_neighbors.course_names[self.course_neighbors.index[course_id]]
+            lines = [f"{c['course_name']} - {c['title']}" for c in related]
+            return f"Courses similar to {name}:\n- " + "\n- ".join(lines)
+        
         elif intent == "career":
             goals = profile.get('career_goals', '')
             if goals:
@@ -278,6 +360,10 @@ Top recommended courses:
             suggestions.append(f"Tell me more about {first_course['course_name']}")
             suggestions.append(f"Why was {first_course['course_name']} recommended?")
             
+            # Degree audit, when we know what they've completed
+            if self.degree_audit is not None and profile.get('completed_courses'):
+                suggestions.append("Which majors am I closest to?")
+            
             # General questions
             suggestions.append("What are the prerequisites for these courses?")
             suggestions.append("How difficult are these courses?")
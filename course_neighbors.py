@@ -0,0 +1,133 @@
+"""
+Course Neighbors - Precomputed k-nearest-neighbour graph over course embeddings.
+
+Built at database build time from the dense "classes" export: for every
+course, the ids of its `k` most similar courses (int32) and their cosine
+similarities (float16). "Courses like CS 111" is then an array lookup,
+with no encoder or database call.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from prerequisites import normalize_course_id
+from retrieval_backends import NUMPY_INDEX_DIR
+
+try:
+    from config import COURSE_KNN_K
+except ImportError:
+    COURSE_KNN_K = 10
+
+# Sub-directory of the database directory holding the graph
+COURSE_KNN_DIR = "course_knn"
+
+# Rows of the similarity matrix computed at a time
+BLOCK_SIZE = 1024
+
+
+def build_knn_graph(embeddings: np.ndarray, k: int = COURSE_KNN_K) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k cosine neighbours for every row, excluding the row itself.
+    
+    Args:
+        embeddings: (n, dimension) course embeddings
+        k: Neighbours per course
+    
+    Returns:
+        (neighbours int32 of shape (n, k), similarities float16 of shape (n, k)),
+        most similar first
+    """
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.maximum(norms, 1e-12)
+    
+    n = len(vectors)
+    k = min(k, max(n - 1, 0))
+    neighbours = np.zeros((n, k), dtype=np.int32)
+    similarities = np.zeros((n, k), dtype=np.float16)
+    if k == 0:
+        return neighbours, similarities
+    
+    # Block by block so memory stays O(BLOCK_SIZE × n)
+    for start in range(0, n, BLOCK_SIZE):
+        stop = min(start + BLOCK_SIZE, n)
+        sims = vectors[start:stop] @ vectors.T
+        sims[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1, kind="stable")
+        neighbours[start:stop] = np.take_along_axis(top, order, axis=1)
+        similarities[start:stop] = np.take_along_axis(top_sims, order, axis=1)
+    return neighbours, similarities
+
+
+def save_course_knn(db_dir: str, k: int = COURSE_KNN_K, collection: str = "classes") -> int:
+    """
+    Build the kNN graph from the dense export of `collection` and save it to
+    <db_dir>/course_knn/.
+    
+    Returns:
+        Number of courses in the graph
+    """
+    index_dir = Path(db_dir) / NUMPY_INDEX_DIR
+    embeddings = np.load(index_dir / f"{collection}.npy", mmap_mode="r")
+    with open(index_dir / f"{collection}.json", 'r') as f:
+        metadatas = json.load(f)["metadatas"]
+    
+    neighbours, similarities = build_knn_graph(embeddings, k)
+    
+    knn_dir = Path(db_dir) / COURSE_KNN_DIR
+    knn_dir.mkdir(parents=True, exist_ok=True)
+    np.save(knn_dir / "neighbors.npy", neighbours)
+    np.save(knn_dir / "similarities.npy", similarities)
+    with open(knn_dir / "courses.json", 'w') as f:
+        json.dump({
+            "course_ids": [meta["course_id"] for meta in metadatas],
+            "course_names": [meta.get("course_name", meta["course_id"]) for meta in metadatas],
+            "titles": [meta.get("title", "") for meta in metadatas]
+        }, f)
+    return len(metadatas)
+
+
+class CourseNeighbors:
+    """Memory-mapped course kNN graph."""
+    
+    def __init__(self, db_dir: str = "chroma_db"):
+        knn_dir = Path(db_dir) / COURSE_KNN_DIR
+        self.neighbors = np.load(knn_dir / "neighbors.npy", mmap_mode="r")
+        self.similarities = np.load(knn_dir / "similarities.npy", mmap_mode="r")
+        with open(knn_dir / "courses.json", 'r') as f:
+            courses = json.load(f)
+        self.course_ids: List[str] = courses["course_ids"]
+        self.course_names: List[str] = courses["course_names"]
+        self.titles: List[str] = courses["titles"]
+        self.index = {cid: i for i, cid in enumerate(self.course_ids)}
+    
+    @classmethod
+    def load(cls, db_dir: str = "chroma_db") -> Optional["CourseNeighbors"]:
+        """The saved graph, or None if the database was built without one."""
+        try:
+            return cls(db_dir)
+        except FileNotFoundError:
+            print("   ⚠️  Course kNN graph not found - rebuild the database to enable related courses")
+            return None
+    
+    def related(self, course_id: str, top_k: int = 5) -> List[Dict]:
+        """
+        Courses most similar to `course_id`.
+        
+        Returns:
+            Dicts with course_id, course_name, title and similarity, most similar first
+        """
+        i = self.index.get(normalize_course_id(course_id))
+        if i is None:
+            return []
+        return [{
+            "course_id": self.course_ids[j],
+            "course_name": self.course_names[j],
+            "title": self.titles[j],
+            "similarity": round(float(sim), 3)
+        } for j, sim in zip(self.neighbors[i, :top_k], self.similarities[i, :top_k])]
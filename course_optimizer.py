@@ -0,0 +1,233 @@
+"""
+Course Optimizer - Picks a semester's courses to cover the most requirements.
+
+Each course's program membership is an integer bitset (bit j = program j
+lists it in required_classes). For a student's considered programs the
+optimizer chooses courses within `desired_credits` that maximize
+
+    requirements covered  +  breadth_bonus × programs touched
+
+which rewards both progress and keeping several majors open. Small inputs
+are solved exactly with branch-and-bound; larger ones use lazy greedy
+(CELF). Branch-and-bound stops after a fixed number of search nodes, so
+the answer does not depend on machine load; a wall-clock limit is only a
+fallback. Either way the best set so far is returned and the result's
+"optimal" flag says whether the search was exhaustive.
+"""
+
+import heapq
+import time
+from typing import Dict, List, Optional, Sequence
+
+from ranking import resolve_majors
+
+DEFAULT_CREDITS = 3.0
+
+# Branch-and-bound nodes per optimize() call (deterministic cut-off, ~30 ms)
+DEFAULT_NODE_BUDGET = 5000
+
+
+class _SearchBudget:
+    """Node budget for one optimize() call, with wall time as a fallback."""
+    
+    def __init__(self, max_nodes: int, deadline: float):
+        self.max_nodes = max_nodes
+        self.deadline = deadline
+        self.nodes = 0
+        self.reached: Optional[str] = None   # "node" or "time" once exhausted
+    
+    def out_of_time(self) -> bool:
+        if self.reached is None and time.perf_counter() > self.deadline:
+            self.reached = "time"
+        return self.reached == "time"
+    
+    def spend(self) -> bool:
+        """Count one search node; False once either budget is used up."""
+        if self.reached is not None:
+            return False
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            self.reached = "node"
+        return not self.out_of_time()
+
+
+class SemesterOptimizer:
+    """Requirement-coverage optimizer over the course catalog."""
+    
+    def __init__(self, programs_data: List[Dict], classes_data: List[Dict],
+                 breadth_bonus: float = 1.0, exact_limit: int = 20):
+        """
+        Build per-course program bitsets.
+        
+        Args:
+            programs_data: Programs from programs.json
+            classes_data: Courses from classes.json (only these are picked)
+            breadth_bonus: Value of touching one more considered program
+            exact_limit: Use branch-and-bound when at most this many courses qualify
+        """
+        self.breadth_bonus = breadth_bonus
+        self.exact_limit = exact_limit
+        self.program_names = [p["program_name"] for p in programs_data]
+        self.required_counts = [len(p["required_classes"]) for p in programs_data]
+        
+        self.course_ids = [c["course_id"] for c in classes_data]
+        self.course_names = [c.get("course_name", c["course_id"]) for c in classes_data]
+        self.credits = [float(c.get("credit_hours") or DEFAULT_CREDITS) for c in classes_data]
+        index = {cid: i for i, cid in enumerate(self.course_ids)}
+        
+        self.masks = [0] * len(self.course_ids)
+        for j, prog in enumerate(programs_data):
+            for cid in prog["required_classes"]:
+                if cid in index:
+                    self.masks[index[cid]] |= 1 << j
+    
+    def program_mask(self, considering_majors: Sequence[str]) -> int:
+        """Bitset of the programs matching the student's majors."""
+        mask = 0
+        for j in resolve_majors(considering_majors, self.program_names):
+            mask |= 1 << j
+        return mask
+    
+    def _value(self, chosen: List[int], considered: int) -> float:
+        covered = 0
+        total = 0
+        for i in chosen:
+            total += (self.masks[i] & considered).bit_count()
+            covered |= self.masks[i] & considered
+        return total + self.breadth_bonus * covered.bit_count()
+    
+    def optimize(self, considering_majors: Sequence[str], credit_cap: float,
+                 node_budget: int = DEFAULT_NODE_BUDGET,
+                 time_budget_ms: float = 1000.0,
+                 exclude: Optional[Sequence[str]] = None) -> Dict:
+        """
+        Choose courses for one semester.
+        
+        Args:
+            considering_majors: Majors the student is considering (free text)
+            credit_cap: Maximum total credit hours (desired_credits)
+            node_budget: Branch-and-bound nodes to explore before stopping
+            time_budget_ms: Fallback limit on search time (only reached on an
+                            overloaded machine; results then depend on load)
+            exclude: Course ids to leave out (e.g. already completed)
+        
+        Returns:
+            Dict with the chosen course ids and names, credits, per-program coverage,
+            objective value, method used, "optimal" (True only if branch-and-bound
+            finished within both budgets), nodes searched and elapsed time
+        """
+        start = time.perf_counter()
+        budget = _SearchBudget(node_budget, start + time_budget_ms / 1000.0)
+        considered = self.program_mask(considering_majors)
+        excluded = set(exclude or [])
+        
+        items = [i for i, mask in enumerate(self.masks)
+                 if mask & considered and self.credits[i] <= credit_cap
+                 and self.course_ids[i] not in excluded]
+        
+        if not items:
+            chosen, method = [], "none"
+        elif len(items) <= self.exact_limit:
+            chosen, method = self._branch_and_bound(items, considered, credit_cap, budget), "exact"
+        else:
+            chosen, method = self._lazy_greedy(items, considered, credit_cap, budget), "greedy"
+        
+        if budget.reached:
+            method += f" ({budget.reached} budget reached)"
+        
+        chosen.sort()
+        covered_by_program = {}
+        for j, name in enumerate(self.program_names):
+            if considered >> j & 1:
+                covered = sum(1 for i in chosen if self.masks[i] >> j & 1)
+                covered_by_program[name] = f"{covered}/{self.required_counts[j]}"
+        
+        return {
+            "courses": [self.course_ids[i] for i in chosen],
+            "course_names": [self.course_names[i] for i in chosen],
+            "credits": sum(self.credits[i] for i in chosen),
+            "coverage": covered_by_program,
+            "value": self._value(chosen, considered),
+            "method": method,
+            "optimal": method in ("none", "exact"),
+            "nodes": budget.nodes,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)
+        }
+    
+    def _gain(self, i: int, considered: int, covered: int) -> float:
+        """Marginal value of adding course i given the programs already covered."""
+        mask = self.masks[i] & considered
+        return mask.bit_count() + self.breadth_bonus * (mask & ~covered).bit_count()
+    
+    def _lazy_greedy(self, items: List[int], considered: int,
+                     credit_cap: float, budget: _SearchBudget) -> List[int]:
+        """
+        CELF: re-evaluate a course's gain only when it reaches the top of
+        the heap, since gains can only shrink as more programs are covered.
+        """
+        # Heap entries: (-gain per credit, course index, round the gain was computed in)
+        heap = [(-self._gain(i, considered, 0) / self.credits[i], i, 0) for i in items]
+        heapq.heapify(heap)
+        
+        chosen: List[int] = []
+        covered = 0
+        used = 0.0
+        round_no = 0
+        while heap and not budget.out_of_time():
+            neg_ratio, i, computed_in = heapq.heappop(heap)
+            if used + self.credits[i] > credit_cap:
+                continue
+            if computed_in != round_no:
+                gain = self._gain(i, considered, covered)
+                heapq.heappush(heap, (-gain / self.credits[i], i, round_no))
+                continue
+            chosen.append(i)
+            covered |= self.masks[i] & considered
+            used += self.credits[i]
+            round_no += 1
+        
+        # Knapsack safeguard: a single high-value course can beat the ratio greedy
+        best_single = max(items, key=lambda i: (self._gain(i, considered, 0), -i))
+        if self._value([best_single], considered) > self._value(chosen, considered):
+            return [best_single]
+        return chosen
+    
+    def _branch_and_bound(self, items: List[int], considered: int,
+                          credit_cap: float, budget: _SearchBudget) -> List[int]:
+        """Exact depth-first search with a fractional-knapsack upper bound."""
+        items = sorted(items, key=lambda i: (-self._gain(i, considered, 0) / self.credits[i], i))
+        # Start from the greedy answer so the budget always leaves a good set
+        best = self._lazy_greedy(items, considered, credit_cap, budget)
+        best_value = self._value(best, considered)
+        
+        def bound(pos: int, covered: int, used: float, value: float) -> float:
+            # Gains only shrink, so current marginal gains give a valid bound
+            remaining = credit_cap - used
+            ratios = sorted(((self._gain(i, considered, covered), self.credits[i])
+                             for i in items[pos:]), key=lambda gc: -gc[0] / gc[1])
+            for gain, credits in ratios:
+                if remaining <= 0:
+                    break
+                take = min(1.0, remaining / credits)
+                value += gain * take
+                remaining -= credits * take
+            return value
+        
+        def search(pos: int, chosen: List[int], covered: int, used: float, value: float):
+            nonlocal best, best_value
+            if value > best_value:
+                best, best_value = list(chosen), value
+            if pos == len(items) or not budget.spend():
+                return
+            if bound(pos, covered, used, value) <= best_value:
+                return
+            i = items[pos]
+            if used + self.credits[i] <= credit_cap:
+                chosen.append(i)
+                search(pos + 1, chosen, covered | (self.masks[i] & considered),
+                       used + self.credits[i], value + self._gain(i, considered, covered))
+                chosen.pop()
+            search(pos + 1, chosen, covered, used, value)
+        
+        search(0, [], 0, 0.0, 0.0)
+        return best
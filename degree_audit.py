@@ -0,0 +1,106 @@
+"""
+Degree Audit - How far a student is from every program.
+
+A program × course requirement matrix is built once from the
+`required_classes` in programs.json. Given the completed courses, one
+matrix multiply returns the remaining required credits and courses for
+every program. The same multiply also scores many students at once.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from course_optimizer import DEFAULT_CREDITS
+from prerequisites import normalize_course_id
+
+
+class DegreeAudit:
+    """Vectorized remaining-requirements audit across all programs."""
+    
+    def __init__(self, programs_data: List[Dict], classes_data: List[Dict]):
+        """
+        Build the requirement matrix.
+        
+        Args:
+            programs_data: Programs from programs.json
+            classes_data: Courses from classes.json (for credit hours)
+        """
+        self.program_names = [p["program_name"] for p in programs_data]
+        
+        # Every catalog course plus required courses missing from the catalog
+        self.course_ids = [c["course_id"] for c in classes_data]
+        self.course_index = {cid: i for i, cid in enumerate(self.course_ids)}
+        for prog in programs_data:
+            for cid in prog["required_classes"]:
+                if cid not in self.course_index:
+                    self.course_index[cid] = len(self.course_ids)
+                    self.course_ids.append(cid)
+        
+        credits_by_id = {c["course_id"]: float(c.get("credit_hours") or DEFAULT_CREDITS)
+                         for c in classes_data}
+        self.credits = np.array([credits_by_id.get(cid, DEFAULT_CREDITS) for cid in self.course_ids],
+                                dtype=np.float32)
+        
+        # requirements[p, c] is True when program p requires course c
+        self.requirements = np.zeros((len(programs_data), len(self.course_ids)), dtype=bool)
+        for p, prog in enumerate(programs_data):
+            self.requirements[p, [self.course_index[cid] for cid in prog["required_classes"]]] = True
+        
+        # Rows: required credit hours per program, then required course counts,
+        # so one multiply yields both totals
+        requirements_f32 = self.requirements.astype(np.float32)
+        self._totals_matrix = np.concatenate([requirements_f32 * self.credits[None, :],
+                                              requirements_f32], axis=0)   # (2·programs, courses)
+        self.required_totals = self._totals_matrix.sum(axis=1).reshape(2, -1).T   # (programs, 2)
+    
+    def completed_matrix(self, completed_batch: Sequence[Sequence[str]]) -> np.ndarray:
+        """Student × course boolean matrix of completed courses (unknown ids ignored)."""
+        done = np.zeros((len(completed_batch), len(self.course_ids)), dtype=bool)
+        for row, completed in enumerate(completed_batch):
+            cols = [self.course_index[cid] for cid in map(normalize_course_id, completed or [])
+                    if cid in self.course_index]
+            done[row, cols] = True
+        return done
+    
+    def remaining_batch(self, completed_batch: Sequence[Sequence[str]]) -> np.ndarray:
+        """
+        Remaining required (credits, courses) for every student and program.
+        
+        Returns:
+            Array of shape (n_students, n_programs, 2)
+        """
+        done = self.completed_matrix(completed_batch).astype(np.float32)
+        # Completed (credits, courses) per program for all students: one matrix multiply
+        completed_totals = (done @ self._totals_matrix.T).reshape(len(done), 2, -1).transpose(0, 2, 1)
+        return self.required_totals[None, :, :] - completed_totals
+    
+    def remaining_credits(self, completed: Sequence[str]) -> np.ndarray:
+        """Remaining required credits for every program, in program order."""
+        return self.remaining_batch([completed])[0, :, 0]
+    
+    def closest_programs(self, completed: Sequence[str], top_k: Optional[int] = 5) -> List[Dict]:
+        """
+        Programs ranked by remaining required credits (fewest first).
+        
+        Args:
+            completed: Completed course ids ("MATH 112" or "MATH112")
+            top_k: Number of programs to return (None for all)
+        
+        Returns:
+            Dicts with program_name, remaining_credits, remaining_courses,
+            required_credits and percent_complete
+        """
+        remaining = self.remaining_batch([completed])[0]
+        # Fewest remaining credits, then highest share complete, then name
+        share = 1.0 - remaining[:, 0] / np.maximum(self.required_totals[:, 0], 1.0)
+        order = np.lexsort((np.array(self.program_names), -share, remaining[:, 0]))
+        if top_k is not None:
+            order = order[:top_k]
+        return [{
+            "program_name": self.program_names[p],
+            "remaining_credits": float(remaining[p, 0]),
+            "remaining_courses": int(round(remaining[p, 1])),
+            "required_credits": float(self.required_totals[p, 0]),
+            "percent_complete": int(round(100 * share[p]))
+        } for p in order]
@@ -0,0 +1,385 @@
+"""
+Shared Embeddings - One encoder for building the database AND searching it.
+The same SentenceTransformer produces every document and query vector, so
+build-time and query-time embeddings are always consistent.
+
+Vectors are also kept in a persistent on-disk cache, so rebuilds and
+repeated student queries skip the model entirely on a cache hit.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tracing import count
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows: the cache is then only safe within one process
+    fcntl = None
+
+# Optional settings from config.py (falls back to sensible defaults)
+try:
+    from config import EMBEDDING_BATCH_SIZE
+except ImportError:
+    EMBEDDING_BATCH_SIZE = 64
+
+try:
+    from config import EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_MAX_ENTRIES
+except ImportError:
+    EMBEDDING_CACHE_DIR = "embedding_cache"
+    EMBEDDING_CACHE_MAX_ENTRIES = 50000
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different texts share one embedding."""
+    return " ".join(str(text).split())
+
+
+class EmbeddingCache:
+    """
+    Persistent LRU cache of embeddings for a single model.
+    
+    Vectors live in a memory-mapped float32 array (`<model>.f32`) with one
+    row per slot; `<model>.index.json` maps text hashes to slots in LRU
+    order. When the cache is full the least recently used slot is reused.
+    
+    The cache is safe to share between threads and between processes
+    (e.g. several advisor workers on one cache directory). Each access
+    takes an flock on `<model>.lock` - shared to read vectors, exclusive to
+    allocate slots - and first re-reads the index if another process has
+    rewritten it, so two processes are never handed the same slot. New
+    slots reach the index file before the lock is released; only the LRU
+    order from lookups is flushed lazily.
+    """
+    
+    def __init__(self, model_name: str, cache_dir: str = EMBEDDING_CACHE_DIR,
+                 max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        """
+        Open (or lazily create) the cache files for `model_name`.
+        
+        Args:
+            model_name: Embedding model the vectors belong to
+            cache_dir: Directory holding the cache files
+            max_entries: Maximum number of vectors kept (LRU eviction)
+        """
+        self.model_name = model_name
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.vectors_path = self.cache_dir / f"{slug}.f32"
+        self.index_path = self.cache_dir / f"{slug}.index.json"
+        self.lock_path = self.cache_dir / f"{slug}.lock"
+        
+        self._lock = threading.Lock()
+        self._slots: "OrderedDict[str, int]" = OrderedDict()  # key -> slot, LRU first
+        self._vectors: Optional[np.memmap] = None
+        self._next_slot = 0
+        self.dimension: Optional[int] = None
+        # Version of the index file last read or written (None: no index on disk)
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        # Keys looked up since the index was last written, least recent first
+        self._touched: "OrderedDict[str, None]" = OrderedDict()
+        with self._lock, self._file_lock(exclusive=False):
+            self._load_index()
+        
+        # LRU order from lookups is written with the next new slot, or at
+        # interpreter exit
+        self._dirty = False
+        atexit.register(self.flush)
+    
+    def _key(self, text: str) -> str:
+        """Cache key for (model name, normalized text)."""
+        payload = f"{self.model_name}\n{text}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()[:32]
+    
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """Inter-process lock; taken with self._lock held, so threads never share it."""
+        if fcntl is None or (not exclusive and not self.cache_dir.exists()):
+            yield
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # A fresh descriptor each time: a forked child must not share the lock
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _index_stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = self.index_path.stat()
+        except OSError:
+            return None
+        # Every write is a rename, so the inode changes too
+        return st.st_ino, st.st_mtime_ns, st.st_size
+    
+    def _sync_locked(self):
+        """Re-read the index if another process rewrote it (file lock held)."""
+        if self._index_stamp() == self._stamp:
+            return
+        self._load_index()
+        for key in self._touched:
+            if key in self._slots:
+                self._slots.move_to_end(key)
+    
+    def _load_index(self):
+        """Reopen an existing cache; a mismatched or corrupt one starts empty."""
+        self._stamp = self._index_stamp()
+        self._slots = OrderedDict()
+        self._vectors = None
+        self._next_slot = 0
+        if not (self._stamp and self.vectors_path.exists()):
+            return
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            if index["model_name"] != self.model_name:
+                return
+            capacity = index["capacity"]
+            self.dimension = index["dimension"]
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+",
+                                      shape=(capacity, self.dimension))
+            # Keep the most recently used entries if the cap was lowered
+            entries = [(k, s) for k, s in index["entries"] if s < capacity]
+            self._slots = OrderedDict(entries[-self.max_entries:])
+            self._next_slot = max((s for _, s in entries), default=-1) + 1
+        except (OSError, ValueError, KeyError, TypeError):
+            self._slots = OrderedDict()
+            self._vectors = None
+            self._next_slot = 0
+            self.dimension = None
+    
+    def _ensure_storage(self, dimension: int):
+        """Create the memory-mapped vector file on first write (exclusive lock held)."""
+        if self._vectors is not None:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.dimension = dimension
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="w+",
+                                  shape=(self.max_entries, dimension))
+        self._slots = OrderedDict()
+        self._next_slot = 0
+    
+    def get_many(self, texts: List[str]) -> Tuple[Dict[int, np.ndarray], List[int]]:
+        """
+        Look up normalized texts.
+        
+        Returns:
+            (found, missing) - found maps position -> vector, missing lists
+            the positions that must be encoded
+        """
+        found: Dict[int, np.ndarray] = {}
+        missing: List[int] = []
+        with self._lock:
+            with self._file_lock(exclusive=False):
+                self._sync_locked()
+                for i, text in enumerate(texts):
+                    key = self._key(text)
+                    slot = self._slots.get(key)
+                    if slot is None or self._vectors is None:
+                        missing.append(i)
+                        continue
+                    self._slots.move_to_end(key)
+                    self._touched[key] = None
+                    self._touched.move_to_end(key)
+                    found[i] = np.array(self._vectors[slot])
+            self.hits += len(found)
+            self.misses += len(missing)
+            self._dirty = self._dirty or bool(found)
+        return found, missing
+    
+    def put_many(self, texts: List[str], vectors: np.ndarray):
+        """
+        Store vectors for normalized texts, evicting LRU entries if full.
+        The new slots are in the index file when this returns.
+        """
+        if len(texts) == 0:
+            return
+        with self._lock, self._file_lock(exclusive=True):
+            self._sync_locked()
+            self._ensure_storage(vectors.shape[1])
+            if vectors.shape[1] != self.dimension:
+                return
+            capacity = self._vectors.shape[0]
+            for text, vector in zip(texts, vectors):
+                key = self._key(text)
+                if key in self._slots:
+                    slot = self._slots.pop(key)
+                elif len(self._slots) < self.max_entries and self._next_slot < capacity:
+                    slot = self._next_slot
+                    self._next_slot += 1
+                elif self._slots:
+                    # Full: reuse the least recently used slot
+                    _, slot = self._slots.popitem(last=False)
+                else:
+                    continue
+                self._vectors[slot] = vector
+                self._slots[key] = slot
+            self._flush_locked()
+    
+    def flush(self):
+        """Persist vectors and the LRU index to disk."""
+        with self._lock:
+            if self._vectors is None or not self._dirty:
+                return
+            with self._file_lock(exclusive=True):
+                self._sync_locked()
+                self._flush_locked()
+    
+    def _flush_locked(self):
+        """Write vectors and the index (both locks held, index just synced)."""
+        if self._vectors is None:
+            return
+        self._vectors.flush()
+        index = {
+            "model_name": self.model_name,
+            "dimension": self.dimension,
+            "capacity": self._vectors.shape[0],
+            "entries": list(self._slots.items())
+        }
+        # Write-then-rename so a crash never leaves a half-written index
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+        self._stamp = self._index_stamp()
+        self._touched.clear()
+        self._dirty = False
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": len(self._slots),
+            "max_entries": self.max_entries
+        }
+
+
+class SharedEncoder:
+    """
+    Wraps a SentenceTransformer and produces normalized float32 embeddings.
+    Texts are encoded in batches of `batch_size`; vectors already in the
+    cache are returned without touching the model, which is only loaded on
+    the first cache miss.
+    """
+    
+    def __init__(self, model_name: str = DEFAULT_MODEL,
+                 batch_size: int = EMBEDDING_BATCH_SIZE,
+                 cache: Optional[EmbeddingCache] = None):
+        """
+        Set up the encoder.
+        
+        Args:
+            model_name: SentenceTransformer model to load
+            batch_size: Number of texts encoded per forward pass
+            cache: Optional persistent embedding cache
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.cache = cache
+        self._model = None
+        self._model_lock = threading.Lock()
+    
+    @property
+    def model(self):
+        """The SentenceTransformer, loaded on first use."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    # Imported here so cache hits never pay for torch
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name)
+        return self._model
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts into L2-normalized vectors.
+        
+        Returns:
+            float32 array of shape (len(texts), dimension)
+        """
+        texts = [normalize_text(t) for t in texts]
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        
+        if self.cache is None:
+            return self._encode_with_model(texts)
+        
+        found, missing = self.cache.get_many(texts)
+        count("embedding_cache_hits", len(found))
+        count("embedding_cache_misses", len(missing))
+        if missing:
+            fresh = self._encode_with_model([texts[i] for i in missing])
+            self.cache.put_many([texts[i] for i in missing], fresh)
+            found.update(zip(missing, fresh))
+        return np.stack([found[i] for i in range(len(texts))]).astype(np.float32)
+    
+    def _encode_with_model(self, texts: List[str]) -> np.ndarray:
+        """Run the model over texts in batches."""
+        embeddings = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return np.asarray(embeddings, dtype=np.float32)
+    
+    @property
+    def dimension(self) -> int:
+        """Size of each embedding vector."""
+        if self.cache is not None and self.cache.dimension is not None:
+            return self.cache.dimension
+        return int(self.model.get_sentence_embedding_dimension())
+    
+    def cache_stats(self) -> Dict:
+        """Embedding cache hit/miss counters (empty if caching is off)."""
+        return self.cache.stats() if self.cache is not None else {}
+
+
+# One encoder per model for the whole process
+_encoders: Dict[str, SharedEncoder] = {}
+_encoders_lock = threading.Lock()
+
+
+def get_shared_encoder(model_name: str = DEFAULT_MODEL,
+                       batch_size: Optional[int] = None) -> SharedEncoder:
+    """
+    Return the process-wide encoder for `model_name`, creating it on first use.
+    The builder and the search agents share it, and with it the embedding
+    cache in EMBEDDING_CACHE_DIR.
+    
+    Args:
+        model_name: SentenceTransformer model to use
+        batch_size: Optional override of the encoding batch size
+    """
+    with _encoders_lock:
+        encoder = _encoders.get(model_name)
+        if encoder is None:
+            encoder = SharedEncoder(model_name, cache=EmbeddingCache(model_name))
+            _encoders[model_name] = encoder
+        if batch_size is not None:
+            encoder.batch_size = batch_size
+        return encoder
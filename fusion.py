@@ -0,0 +1,99 @@
+"""
+Result Fusion - Merges the ranked lists produced by the search stage.
+
+Every (collection, query) pair yields its own ranked list of candidates.
+Fusion combines them by catalog id into one deterministic ranking:
+  • "rrf"   - reciprocal rank fusion: sum of weight / (k + rank)
+  • "score" - weighted score fusion: sum of weight * cosine similarity
+Only a bounded heap of the best `top_k` ids is kept while selecting.
+"""
+
+import heapq
+from typing import Dict, Iterable, List, Optional
+
+# Standard RRF damping constant (Cormack et al.)
+RRF_K = 60
+
+
+class FusedCandidate:
+    """A catalog id with its fused score and the closest hit that produced it."""
+    __slots__ = ("key", "score", "best", "hits")
+    
+    def __init__(self, key: str, score: float, best, hits: int):
+        self.key = key
+        self.score = score
+        self.best = best      # Candidate with the smallest distance
+        self.hits = hits      # Number of ranked lists the id appeared in
+    
+    def __repr__(self) -> str:
+        return f"FusedCandidate({self.key!r}, score={self.score:.5f}, hits={self.hits})"
+
+
+def fuse_candidates(candidates: Iterable, top_k: int = 5, method: str = "rrf",
+                    weights: Optional[Dict[str, float]] = None,
+                    k: int = RRF_K) -> List[FusedCandidate]:
+    """
+    Fuse search candidates into a single top-k ranking.
+    
+    Candidates are grouped into ranked lists by (collection, query_index);
+    each candidate's `rank` is its position in that list.
+    
+    Args:
+        candidates: Candidate records from SearchAgent (any collections)
+        top_k: Number of fused results to return
+        method: "rrf" (reciprocal rank) or "score" (weighted similarity)
+        weights: Optional per-collection weights (default 1.0)
+        k: RRF damping constant
+    
+    Returns:
+        FusedCandidates, best first. Ties break on the closest distance,
+        then on the catalog id, so the order never depends on hashing.
+    """
+    if method not in ("rrf", "score"):
+        raise ValueError(f"Unknown fusion method '{method}' (choose 'rrf' or 'score')")
+    weights = weights or {}
+    
+    scores: Dict[str, float] = {}
+    best: Dict[str, object] = {}
+    hits: Dict[str, int] = {}
+    for candidate in candidates:
+        weight = weights.get(candidate.collection, 1.0)
+        if method == "rrf":
+            contribution = weight / (k + candidate.rank + 1)
+        else:
+            # Squared L2 between unit vectors is 2 - 2·cosine
+            contribution = weight * (1.0 - candidate.distance / 2.0)
+        
+        key = candidate.key
+        scores[key] = scores.get(key, 0.0) + contribution
+        hits[key] = hits.get(key, 0) + 1
+        if key not in best or candidate.distance < best[key].distance:
+            best[key] = candidate
+    
+    # Bounded heap: never holds more than top_k entries
+    heap: List = []
+    for key, score in scores.items():
+        # Larger tuple = better: higher score, then smaller distance, then smaller id
+        entry = (score, -best[key].distance, _Reversed(key))
+        if len(heap) < top_k:
+            heapq.heappush(heap, entry)
+        elif top_k > 0 and entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+    
+    ranked = sorted(heap, reverse=True)
+    return [FusedCandidate(entry[2].value, entry[0], best[entry[2].value], hits[entry[2].value])
+            for entry in ranked]
+
+
+class _Reversed:
+    """Orders strings descending so that, inside a max-ranking, smaller ids win ties."""
+    __slots__ = ("value",)
+    
+    def __init__(self, value: str):
+        self.value = value
+    
+    def __lt__(self, other: "_Reversed") -> bool:
+        return self.value > other.value
+    
+    def __eq__(self, other) -> bool:
+        return isinstance(other, _Reversed) and self.value == other.value
@@ -0,0 +1,172 @@
+"""
+Materialized Views - Precomputed recommendations for common major combinations.
+
+Most requests consider one or two majors. At build time, the catalog-only
+ranking (AnalysisAgent.rank_catalog) is stored for every single program
+and for the program pairs that share the most required courses (at most
+MATERIALIZED_VIEW_MAX_PAIRS; pairs with nothing in common are never
+stored). Rows go in a SQLite table as zlib-compressed JSON. The advisor
+serves a stored view directly when a profile's majors resolve to one of
+these combinations, and runs the full pipeline otherwise.
+
+Building views is optional (MATERIALIZED_VIEWS in config.py); pairs grow
+quadratically with the number of programs, so large catalogs should keep
+the pair cap low.
+
+The table records the catalog fingerprint and index version it was built
+from. If either no longer matches, no view is served until the next build.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import zlib
+from collections import Counter
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from retrieval_backends import NUMPY_INDEX_DIR
+
+# Optional settings from config.py (falls back to sensible defaults)
+try:
+    from config import MATERIALIZED_VIEWS
+except ImportError:
+    MATERIALIZED_VIEWS = True
+
+try:
+    from config import MATERIALIZED_VIEW_MAX_PAIRS
+except ImportError:
+    MATERIALIZED_VIEW_MAX_PAIRS = 200
+
+# Bump when the stored view format or the ranking that produces it changes
+VIEW_FORMAT_VERSION = 1
+
+VIEWS_FILE = "materialized_views.sqlite"
+
+
+def catalog_fingerprint(*datasets: List[Dict]) -> str:
+    """Stable hash of the catalog JSON (programs, classes, overlap)."""
+    digest = hashlib.sha256(str(VIEW_FORMAT_VERSION).encode("utf-8"))
+    for data in datasets:
+        digest.update(json.dumps(data, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def index_version(db_dir: str) -> str:
+    """
+    Hash of the dense index export, whose metadata carries each document's
+    content hash (and therefore the embedding model).
+    """
+    digest = hashlib.sha256()
+    index_dir = Path(db_dir) / NUMPY_INDEX_DIR
+    for path in sorted(index_dir.glob("*.json")):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def overlapping_pairs(programs_data: List[Dict], max_pairs: int) -> List[Tuple[int, int]]:
+    """
+    Index pairs of programs that share required courses, most shared first
+    (ties by index), at most `max_pairs` of them.
+    """
+    programs_by_course: Dict[str, List[int]] = {}
+    for j, program in enumerate(programs_data):
+        for cid in set(program["required_classes"]):
+            programs_by_course.setdefault(cid, []).append(j)
+    shared: Counter = Counter()
+    for programs in programs_by_course.values():
+        shared.update(combinations(programs, 2))
+    return sorted(shared, key=lambda pair: (-shared[pair], pair))[:max(max_pairs, 0)]
+
+
+def view_key(program_ids: Sequence[str]) -> str:
+    """Order-independent key for a set of programs."""
+    return ",".join(sorted(program_ids))
+
+
+class MaterializedViews:
+    """SQLite-backed store of precomputed recommendation views."""
+    
+    def __init__(self, db_dir: str = "chroma_db"):
+        self.path = Path(db_dir) / VIEWS_FILE
+        self.db_dir = db_dir
+    
+    def _connect(self) -> sqlite3.Connection:
+        # Shared across Streamlit's worker threads; ViewReader serializes access
+        conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("CREATE TABLE IF NOT EXISTS views (key TEXT PRIMARY KEY, payload BLOB)")
+        return conn
+    
+    def build(self, analysis_agent, programs_data: List[Dict], fingerprint: str,
+              max_pairs: int = MATERIALIZED_VIEW_MAX_PAIRS) -> int:
+        """
+        Precompute and store views for every program and the most
+        overlapping program pairs.
+        
+        Args:
+            analysis_agent: AnalysisAgent over the same catalog
+            programs_data: Programs from programs.json
+            fingerprint: catalog_fingerprint() of the catalog
+            max_pairs: Most program pairs to store (see overlapping_pairs)
+        
+        Returns:
+            Number of views written
+        """
+        combos = [(p,) for p in programs_data] + [
+            (programs_data[i], programs_data[j]) for i, j in overlapping_pairs(programs_data, max_pairs)]
+        rows = []
+        for combo in combos:
+            view = analysis_agent.rank_catalog([p["program_name"] for p in combo])
+            payload = zlib.compress(json.dumps(view, separators=(",", ":")).encode("utf-8"))
+            rows.append((view_key([p["program_id"] for p in combo]), payload))
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("DELETE FROM views")
+            conn.executemany("INSERT INTO views (key, payload) VALUES (?, ?)", rows)
+            conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+                ("catalog_fingerprint", fingerprint),
+                ("index_version", index_version(self.db_dir))
+            ])
+        conn.close()
+        return len(rows)
+    
+    def open(self, fingerprint: str) -> Optional["ViewReader"]:
+        """
+        A reader for the stored views, or None if there are none or they are stale.
+        
+        Args:
+            fingerprint: catalog_fingerprint() of the catalog currently loaded
+        """
+        if not self.path.exists():
+            return None
+        conn = self._connect()
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        if (meta.get("catalog_fingerprint") != fingerprint
+                or meta.get("index_version") != index_version(self.db_dir)):
+            conn.close()
+            print("   ⚠️  Materialized views are stale (catalog or index changed) - rebuild to refresh")
+            return None
+        return ViewReader(conn)
+
+
+class ViewReader:
+    """Read-only access to validated views."""
+    
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self._lock = threading.Lock()
+        self.count = conn.execute("SELECT COUNT(*) FROM views").fetchone()[0]
+    
+    def get(self, program_ids: Sequence[str]) -> Optional[Dict]:
+        """The stored view for exactly these programs, or None."""
+        with self._lock:
+            row = self.conn.execute("SELECT payload FROM views WHERE key = ?",
+                                    (view_key(program_ids),)).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
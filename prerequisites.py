@@ -0,0 +1,273 @@
+"""
+Prerequisite Engine - Parses free-text prerequisites into a DAG of courses.
+
+Built once when the catalog loads. Every course gets integer bitsets for
+its direct prerequisites and for its full transitive closure, plus its
+depth (longest prerequisite chain below it). "Can I take X given what I
+have completed?" is then one AND over the bitsets, O(n/64).
+
+A requirement with alternatives ("MATH 112 or MATH 110") is an any-of
+group: it is met by any one of its courses, so none of them is a hard
+prerequisite. Groups are checked by can_take and reported by
+prereq_status, but they are not edges of the DAG - the closure, depth and
+missing_prerequisites (and the scheduler built on them) only follow hard
+prerequisites.
+"""
+
+import re
+from typing import Dict, Iterable, List, Tuple
+
+# Course codes as written in prerequisites, e.g. "MATH 112" or "FIN 201"
+COURSE_CODE = re.compile(r'\b([A-Z]{2,6})\s*(\d{3}[A-Z]?)\b')
+
+# Phrases marking prerequisites that may be taken in the same semester
+CONCURRENT_HINT = re.compile(r'concurrent', re.IGNORECASE)
+
+# Separates alternatives within one requirement
+ALTERNATIVE = re.compile(r'\bor\b', re.IGNORECASE)
+
+
+def normalize_course_id(course: str) -> str:
+    """"MATH 112" / "math112" -> "MATH112" (the course_id format)."""
+    return re.sub(r'\s+', '', str(course)).upper()
+
+
+def parse_requirements(text: str) -> List[List[Tuple[str, bool]]]:
+    """
+    Split a prerequisite string into requirements, each a list of
+    (course_id, concurrent_allowed) alternatives. Requirements are separated
+    by commas or semicolons; "or" inside one makes its courses alternatives.
+    
+    "MATH 112, STAT 121"            -> [[("MATH112", False)], [("STAT121", False)]]
+    "MATH 112 or MATH 110"          -> [[("MATH112", False), ("MATH110", False)]]
+    """
+    if not text:
+        return []
+    requirements = []
+    for part in re.split(r'[,;]', text):
+        concurrent = bool(CONCURRENT_HINT.search(part))
+        courses = [(f"{dept}{number}", concurrent) for dept, number in COURSE_CODE.findall(part)]
+        if len(courses) > 1 and ALTERNATIVE.search(part):
+            requirements.append(courses)
+        else:
+            requirements.extend([course] for course in courses)
+    return requirements
+
+
+def parse_prerequisites(text: str) -> List[Tuple[str, bool]]:
+    """
+    Extract the hard (course_id, concurrent_allowed) pairs from a
+    prerequisite string; courses in an "or" group are left out.
+    
+    "MATH 112, STAT 121"            -> [("MATH112", False), ("STAT121", False)]
+    "MATH 213 (can be concurrent)"  -> [("MATH213", True)]
+    "MATH 112 or MATH 110"          -> []
+    "Precalculus or placement"      -> []
+    """
+    return [options[0] for options in parse_requirements(text) if len(options) == 1]
+
+
+class PrerequisiteGraph:
+    """
+    Prerequisite DAG keyed by course_id with precomputed bitset closure.
+    
+    Raises ValueError at construction if the prerequisites contain a cycle.
+    """
+    
+    def __init__(self, classes_data: List[Dict]):
+        """
+        Parse every course's prerequisites and precompute the closure.
+        
+        Args:
+            classes_data: Courses from classes.json
+        """
+        self.course_ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.names: Dict[str, str] = {}
+        self.prerequisite_text: Dict[str, str] = {}
+        
+        for cls in classes_data:
+            self._node(cls["course_id"])
+            self.names[cls["course_id"]] = cls.get("course_name", cls["course_id"])
+            self.prerequisite_text[cls["course_id"]] = cls.get("prerequisites", "")
+        
+        edges = {}
+        groups = {}
+        for cls in classes_data:
+            requirements = parse_requirements(cls.get("prerequisites", ""))
+            edges[cls["course_id"]] = [options[0] for options in requirements if len(options) == 1]
+            groups[cls["course_id"]] = [options for options in requirements if len(options) > 1]
+            for options in requirements:
+                for prereq_id, _ in options:
+                    # Referenced courses outside the catalog still become nodes
+                    self._node(prereq_id)
+        
+        n = len(self.course_ids)
+        self.direct = [0] * n          # bitset of direct prerequisites
+        self.concurrent_ok = [0] * n   # subset of `direct` allowed in the same semester
+        self.children: List[List[int]] = [[] for _ in range(n)]
+        for course_id, prereqs in edges.items():
+            i = self.index[course_id]
+            for prereq_id, concurrent in prereqs:
+                p = self.index[prereq_id]
+                if p == i:
+                    raise ValueError(f"Prerequisite cycle: {course_id} requires itself")
+                self.direct[i] |= 1 << p
+                if concurrent:
+                    self.concurrent_ok[i] |= 1 << p
+                self.children[p].append(i)
+        # Courses that directly require each course, and every course some course requires
+        self.dependents = [0] * n
+        for p, children in enumerate(self.children):
+            for child in children:
+                self.dependents[p] |= 1 << child
+        self.prerequisite_nodes = sum(1 << p for p in range(n) if self.children[p])
+        
+        # Any-of groups per course: (alternatives, those allowed concurrently)
+        self.any_of: Dict[int, List[Tuple[int, int]]] = {}
+        for course_id, options_list in groups.items():
+            for options in options_list:
+                mask = concurrent = 0
+                for prereq_id, concurrent_ok in options:
+                    mask |= 1 << self.index[prereq_id]
+                    if concurrent_ok:
+                        concurrent |= 1 << self.index[prereq_id]
+                self.any_of.setdefault(self.index[course_id], []).append((mask, concurrent))
+        
+        self.order = self._topological_order()
+        
+        # Transitive closure and depth, in topological order
+        self.ancestors = [0] * n
+        self.depth = [0] * n
+        for i in self.order:
+            for p in self._bits(self.direct[i]):
+                self.ancestors[i] |= (1 << p) | self.ancestors[p]
+                self.depth[i] = max(self.depth[i], self.depth[p] + 1)
+    
+    def _node(self, course_id: str) -> int:
+        if course_id not in self.index:
+            self.index[course_id] = len(self.course_ids)
+            self.course_ids.append(course_id)
+        return self.index[course_id]
+    
+    def _topological_order(self) -> List[int]:
+        """Kahn's algorithm; leftover nodes mean a cycle."""
+        indegree = [bin(mask).count("1") for mask in self.direct]
+        ready = [i for i, d in enumerate(indegree) if d == 0]
+        order = []
+        while ready:
+            i = ready.pop()
+            order.append(i)
+            for child in self.children[i]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    ready.append(child)
+        if len(order) != len(self.course_ids):
+            stuck = sorted(self.course_ids[i] for i, d in enumerate(indegree) if d > 0)
+            raise ValueError(f"Prerequisite cycle; courses blocked by it: {', '.join(stuck)}")
+        return order
+    
+    @staticmethod
+    def _bits(mask: int) -> Iterable[int]:
+        """Indexes of the set bits in mask."""
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+    
+    def mask_of(self, course_ids: Iterable[str]) -> int:
+        """Bitset of the given (known) course ids."""
+        mask = 0
+        for course_id in course_ids:
+            i = self.index.get(normalize_course_id(course_id))
+            if i is not None:
+                mask |= 1 << i
+        return mask
+    
+    def satisfied_mask(self, completed: Iterable[str]) -> int:
+        """
+        Completed courses plus all of their prerequisites: finishing
+        MATH 113 implies MATH 112 is satisfied even if it is not listed.
+        """
+        done = self.mask_of(completed)
+        satisfied = done
+        for i in self._bits(done):
+            satisfied |= self.ancestors[i]
+        return satisfied
+    
+    def ids_of(self, mask: int) -> List[str]:
+        """Course ids in a bitset, shallowest prerequisites first."""
+        return sorted((self.course_ids[i] for i in self._bits(mask)),
+                      key=lambda cid: (self.depth[self.index[cid]], cid))
+    
+    def can_take(self, course_id: str, completed: Iterable[str] = (),
+                 concurrent: Iterable[str] = ()) -> bool:
+        """
+        True if every direct prerequisite is completed (or, where allowed,
+        being taken concurrently) and every any-of group has one that is.
+        """
+        i = self.index.get(normalize_course_id(course_id))
+        if i is None:
+            return True
+        done = self.satisfied_mask(completed)
+        taking = self.mask_of(concurrent)
+        alongside = taking & self.concurrent_ok[i]
+        if self.direct[i] & ~(done | alongside):
+            return False
+        return all(mask & (done | taking & concurrent_ok)
+                   for mask, concurrent_ok in self.any_of.get(i, ()))
+    
+    def blocked_mask(self, satisfied: int) -> int:
+        """
+        Courses that cannot be taken yet (can_take is False), given a
+        satisfied_mask computed once per request: one pass over the unmet
+        prerequisites instead of a check per course.
+        """
+        blocked = 0
+        for p in self._bits(self.prerequisite_nodes & ~satisfied):
+            blocked |= self.dependents[p]
+        for i, groups in self.any_of.items():
+            if not all(mask & satisfied for mask, _ in groups):
+                blocked |= 1 << i
+        return blocked
+    
+    def _unmet_groups(self, i: int, done: int) -> List[int]:
+        """Any-of groups of course i with none of their courses done."""
+        return [mask for mask, _ in self.any_of.get(i, ()) if not mask & done]
+    
+    def missing_prerequisites(self, course_id: str, completed: Iterable[str] = ()) -> List[str]:
+        """
+        Every hard prerequisite still needed before `course_id`, in the order
+        to take them (any-of groups are in prereq_status instead).
+        """
+        i = self.index.get(normalize_course_id(course_id))
+        if i is None:
+            return []
+        return self.ids_of(self.ancestors[i] & ~self.satisfied_mask(completed))
+    
+    def prereq_status(self, course_id: str, completed: Iterable[str] = ()) -> str:
+        """Human-readable prerequisite status for a course."""
+        course_id = normalize_course_id(course_id)
+        text = self.prerequisite_text.get(course_id, "")
+        missing = self.missing_prerequisites(course_id, completed)
+        if missing:
+            first = ", ".join(self.names.get(cid, cid) for cid in missing)
+            return f"Prerequisite required: {text} (take first: {first})"
+        i = self.index.get(course_id)
+        unmet = self._unmet_groups(i, self.satisfied_mask(completed)) if i is not None else []
+        if unmet:
+            choices = "; ".join(" or ".join(self.names.get(cid, cid) for cid in self.ids_of(mask))
+                                for mask in unmet)
+            return f"Prerequisite required: {text} (take one of: {choices})"
+        if text and not parse_requirements(text):
+            # Non-course requirement such as a placement exam
+            return f"Prerequisite required: {text}"
+        if text:
+            return "Prerequisites completed"
+        return "No prerequisites"
+    
+    def depth_of(self, course_id: str) -> int:
+        """Length of the longest prerequisite chain below a course."""
+        i = self.index.get(normalize_course_id(course_id))
+        return self.depth[i] if i is not None else 0
+
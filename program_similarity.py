@@ -0,0 +1,174 @@
+"""
+Program Similarity - Precomputed program × program overlap and switching costs.
+
+Built at database build time from the required courses in programs.json
+and stored next to the vector database:
+  • shared_credits[i, j] - required credits programs i and j have in common
+  • jaccard[i, j]        - |required_i ∩ required_j| / |required_i ∪ required_j|
+  • switching_cost[i, j] - credits of j still required after finishing all of i's
+                           requirements (what switching from i to j costs)
+
+The advisor memory-maps the saved matrices, so "majors similar to X" and
+"cost to switch from X to Y" are plain array lookups.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from degree_audit import DegreeAudit
+from ranking import majors_in_text, resolve_majors
+
+# Sub-directory of the database directory holding the matrices
+PROGRAM_MATRIX_DIR = "program_matrices"
+
+MATRICES = ("shared_credits", "jaccard", "switching_cost")
+
+
+def compute_program_matrices(programs_data: List[Dict], classes_data: List[Dict]) -> Dict[str, np.ndarray]:
+    """
+    Compute the three program × program matrices.
+    
+    Args:
+        programs_data: Programs from programs.json
+        classes_data: Courses from classes.json (for credit hours)
+    """
+    audit = DegreeAudit(programs_data, classes_data)
+    required = audit.requirements.astype(np.float32)
+    
+    shared_courses = required @ required.T
+    shared_credits = (required * audit.credits[None, :]) @ required.T
+    counts = np.diag(shared_courses)
+    union = counts[:, None] + counts[None, :] - shared_courses
+    jaccard = np.divide(shared_courses, union, out=np.zeros_like(union), where=union > 0)
+    
+    required_credits = np.diag(shared_credits)
+    switching_cost = required_credits[None, :] - shared_credits
+    
+    return {
+        "shared_credits": shared_credits.astype(np.float32),
+        "jaccard": jaccard.astype(np.float32),
+        "switching_cost": switching_cost.astype(np.float32)
+    }
+
+
+def matrix_fingerprint(programs_data: List[Dict], classes_data: List[Dict]) -> str:
+    """Hash of everything the matrices are computed from (requirements and credit hours)."""
+    digest = hashlib.sha256()
+    for p in programs_data:
+        digest.update(json.dumps([p["program_name"], p["required_classes"]]).encode("utf-8"))
+    for c in classes_data:
+        digest.update(json.dumps([c["course_id"], c.get("credit_hours")]).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def save_program_matrices(programs_data: List[Dict], classes_data: List[Dict], db_dir: str):
+    """
+    Compute the matrices and write them to <db_dir>/program_matrices/.
+    
+    Args:
+        programs_data: Programs from programs.json
+        classes_data: Courses from classes.json
+        db_dir: Database directory
+    """
+    matrix_dir = Path(db_dir) / PROGRAM_MATRIX_DIR
+    matrix_dir.mkdir(parents=True, exist_ok=True)
+    
+    for name, matrix in compute_program_matrices(programs_data, classes_data).items():
+        np.save(matrix_dir / f"{name}.npy", matrix)
+    with open(matrix_dir / "programs.json", 'w') as f:
+        json.dump({
+            "program_names": [p["program_name"] for p in programs_data],
+            "fingerprint": matrix_fingerprint(programs_data, classes_data)
+        }, f)
+
+
+class ProgramSimilarity:
+    """Lookups over the program matrices (memory-mapped when saved)."""
+    
+    def __init__(self, program_names: List[str], matrices: Dict[str, np.ndarray]):
+        self.program_names = program_names
+        self.shared_credits = matrices["shared_credits"]
+        self.jaccard = matrices["jaccard"]
+        self.switching_cost = matrices["switching_cost"]
+    
+    @classmethod
+    def load(cls, db_dir: str, programs_data: Optional[List[Dict]] = None,
+             classes_data: Optional[List[Dict]] = None) -> "ProgramSimilarity":
+        """
+        Memory-map the saved matrices.
+        
+        If they are missing or were built from a different catalog (compared by
+        matrix_fingerprint, so changed requirements or credits count too), and
+        the catalog is given, the matrices are computed in memory instead.
+        """
+        matrix_dir = Path(db_dir) / PROGRAM_MATRIX_DIR
+        names_path = matrix_dir / "programs.json"
+        catalog_given = programs_data is not None and classes_data is not None
+        
+        if names_path.exists():
+            with open(names_path, 'r') as f:
+                saved = json.load(f)
+            if isinstance(saved, list):
+                # Written before fingerprints were recorded
+                saved = {"program_names": saved, "fingerprint": None}
+            if not catalog_given or saved["fingerprint"] == matrix_fingerprint(programs_data, classes_data):
+                matrices = {name: np.load(matrix_dir / f"{name}.npy", mmap_mode="r") for name in MATRICES}
+                return cls(saved["program_names"], matrices)
+        
+        if not catalog_given:
+            raise FileNotFoundError(f"No program matrices in {matrix_dir} - run rag_system_setup.py")
+        print("   ⚠️  Program matrices missing or stale - computing in memory (rebuild the database to persist)")
+        return cls([p["program_name"] for p in programs_data], compute_program_matrices(programs_data, classes_data))
+    
+    def _resolve(self, program: str) -> Optional[int]:
+        """Index of the program a free-text name refers to (first match)."""
+        matched = resolve_majors([program], self.program_names)
+        return matched[0] if matched else None
+    
+    def similar_programs(self, program: str, top_k: int = 3) -> List[Dict]:
+        """
+        Programs with the most requirement overlap with `program`.
+        
+        Returns:
+            Dicts with program_name, jaccard, shared_credits and switching_cost
+            (from `program` to the listed one), most similar first
+        """
+        i = self._resolve(program)
+        if i is None:
+            return []
+        scores = np.asarray(self.jaccard[i], dtype=np.float32).copy()
+        scores[i] = -1.0
+        order = np.lexsort((np.asarray(self.switching_cost[i]), -scores))[:top_k]
+        return [{
+            "program_name": self.program_names[j],
+            "jaccard": round(float(self.jaccard[i, j]), 3),
+            "shared_credits": float(self.shared_credits[i, j]),
+            "switching_cost": float(self.switching_cost[i, j])
+        } for j in order if j != i]
+    
+    def switch_cost(self, from_program: str, to_program: str) -> Optional[Dict]:
+        """
+        Cost of switching from one program to another.
+        
+        Returns:
+            Dict with both program names, shared_credits, jaccard and
+            switching_cost, or None if either program is unknown
+        """
+        i, j = self._resolve(from_program), self._resolve(to_program)
+        if i is None or j is None:
+            return None
+        return {
+            "from_program": self.program_names[i],
+            "to_program": self.program_names[j],
+            "shared_credits": float(self.shared_credits[i, j]),
+            "jaccard": round(float(self.jaccard[i, j]), 3),
+            "switching_cost": float(self.switching_cost[i, j])
+        }
+    
+    def programs_in(self, text: str) -> List[str]:
+        """Program names mentioned in free text, in the order they appear (no repeats)."""
+        return [self.program_names[j] for j in majors_in_text(text, self.program_names)]
@@ -3,11 +3,20 @@ RAG System Setup - Creates vector database and embeddings for BYU course advisor
 This uses 100% FREE tools: Chroma + Sentence Transformers (no API keys needed!)
 """
 
+import argparse
+import hashlib
 import json
 from pathlib import Path
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
 import chromadb
-from sentence_transformers import SentenceTransformer
+
+from catalog_store import CatalogStore
+from embeddings import get_shared_encoder
+from retrieval_backends import export_numpy_index, get_backend
+from program_similarity import save_program_matrices
+from course_neighbors import save_course_knn
+from materialized_views import MATERIALIZED_VIEWS, MaterializedViews, catalog_fingerprint
+from streaming_ingest import INGEST_CHUNK_SIZE, catalog_records, stored_hashes, stream_into_collection
 
 class BYUCourseRAG:
     """
@@ -15,86 +24,254 @@ class BYUCourseRAG:
     Uses local embeddings and vector database - no API costs!
     """
     
-    def __init__(self, data_dir: str = "data", db_dir: str = "chroma_db"):
+    def __init__(self, data_dir: str = "data", db_dir: str = "chroma_db",
+                 batch_size: Optional[int] = None, backend: Optional[str] = None,
+                 encoder=None):
         """
         Initialize the RAG system.
         
         Args:
             data_dir: Directory containing JSON files
             db_dir: Directory to store Chroma database
+            batch_size: Optional override of the embedding batch size
+            backend: Retrieval backend for queries (default: RETRIEVAL_BACKEND)
+            encoder: Document encoder (default: the shared SentenceTransformer encoder)
         """
         self.data_dir = Path(data_dir)
         self.db_dir = Path(db_dir)
         self.db_dir.mkdir(exist_ok=True)
         
         print("🔧 Initializing RAG system...")
-        print("   • Loading embedding model (this may take a moment)...")
+        print("   • Preparing embedding encoder...")
         
-        # Load the embedding model (runs locally, no API needed!)
-        # Using a small, fast model perfect for hackathons
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-        print("   ✓ Embedding model loaded!")
+        # Embedding model runs locally, no API needed! Using a small, fast
+        # model perfect for hackathons. The encoder (and its on-disk cache)
+        # is shared with the search agents; the model itself only loads
+        # when a text is missing from the cache.
+        self.encoder = encoder if encoder is not None else get_shared_encoder(batch_size=batch_size)
+        print(f"   ✓ Encoder ready ({self.encoder.model_name})")
         
         # Initialize Chroma DB
         self.client = chromadb.PersistentClient(path=str(self.db_dir))
+        self.backend = get_backend(backend, str(self.db_dir), client=self.client)
         
-        # Load data
-        self.programs = self._load_json("programs.json")
-        self.classes = self._load_json("classes.json")
-        self.class_overlap = self._load_json("class_overlap.json")
+        # Shared, indexed catalog, loaded on first use: a streaming build
+        # reads data/*.jsonl record by record and never loads all of it
+        self._catalog: Optional[CatalogStore] = None
         
-        print(f"   ✓ Loaded {len(self.programs)} programs")
-        print(f"   ✓ Loaded {len(self.classes)} classes")
+        # Per-collection added/updated/unchanged/deleted counts from the last build
+        self.build_stats: Dict[str, Dict[str, int]] = {}
+    
+    @property
+    def catalog(self) -> CatalogStore:
+        """The whole catalog (parsed once per process, on first use)."""
+        if self._catalog is None:
+            self._catalog = CatalogStore.load(str(self.data_dir))
+            print(f"   ✓ Loaded {len(self._catalog.programs_data)} programs")
+            print(f"   ✓ Loaded {len(self._catalog.classes_data)} classes")
+        return self._catalog
+    
+    @property
+    def programs(self) -> List[Dict]:
+        return self.catalog.programs_data
     
-    def _load_json(self, filename: str) -> List[Dict]:
-        """Load JSON data file."""
-        filepath = self.data_dir / filename
-        with open(filepath, 'r') as f:
-            return json.load(f)
+    @property
+    def classes(self) -> List[Dict]:
+        return self.catalog.classes_data
     
-    def build_vector_database(self):
+    @property
+    def class_overlap(self) -> List[Dict]:
+        return self.catalog.overlap_data
+    
+    def build_vector_database(self, stream: bool = False, chunk_size: int = INGEST_CHUNK_SIZE,
+                              build_views: bool = MATERIALIZED_VIEWS):
         """
         Build the vector database with all course and program information.
         This is the core of the RAG system!
+        
+        The build is incremental: every document carries a content hash in
+        its metadata, so only new or changed documents are re-embedded and
+        only ids that disappeared from the catalog are deleted.
+        
+        Args:
+            stream: Read <name>.jsonl (when not older than <name>.json) line by
+                    line and embed/write in chunks (bounded memory, for very
+                    large catalogs). The whole catalog is never loaded, so
+                    materialized views, which rank against it, are skipped.
+            chunk_size: Records per chunk when streaming
+            build_views: Precompute materialized views (default: MATERIALIZED_VIEWS)
         """
         print("\n" + "=" * 70)
-        print("🔨 BUILDING VECTOR DATABASE")
+        print("🔨 BUILDING VECTOR DATABASE" + (f" (streaming, {chunk_size} per chunk)" if stream else ""))
         print("=" * 70)
         
         # Create collections for different types of data
+        chunks = chunk_size if stream else None
         collections = {
-            "programs": self._create_program_collection(),
-            "classes": self._create_class_collection(),
-            "overlap": self._create_overlap_collection()
+            "programs": self._create_program_collection(chunks),
+            "classes": self._create_class_collection(chunks),
+            "overlap": self._create_overlap_collection(chunks)
         }
         
+        # Dense export used by the in-process NumPy backend
+        for collection in collections.values():
+            export_numpy_index(collection, str(self.db_dir))
+        self.backend.reload()
+        
+        # Program × program similarity and switching costs (memory-mapped by the advisor).
+        # Streaming: programs plus each course's credit hours are all it needs
+        if stream:
+            programs = list(self._records("programs", lambda: self.programs))
+            classes = [{"course_id": c["course_id"], "credit_hours": c.get("credit_hours")}
+                       for c in self._records("classes", lambda: self.classes)]
+        else:
+            programs, classes = self.programs, self.classes
+        save_program_matrices(programs, classes, str(self.db_dir))
+        
+        # Course kNN graph for instant "related courses"
+        n_knn = save_course_knn(str(self.db_dir))
+        
+        # Precomputed recommendations for every program and the most overlapping pairs
+        build_views = build_views and not stream
+        n_views = self._build_materialized_views() if build_views else 0
+        
+        totals = {key: sum(stats[key] for stats in self.build_stats.values())
+                  for key in ("added", "updated", "unchanged", "deleted")}
+        cache = self.encoder.cache_stats()
         print("\n✓ Vector database built successfully!")
         print(f"   Database location: {self.db_dir}")
+        print(f"   Documents: {totals['added']} added, {totals['updated']} updated, "
+              f"{totals['unchanged']} unchanged, {totals['deleted']} deleted")
+        print(f"   Program matrices: {len(programs)} × {len(programs)}")
+        print(f"   Course kNN graph: {n_knn} courses")
+        print(f"   Materialized views: {n_views if build_views else 'skipped'}")
+        if cache:
+            print(f"   Embedding cache: {cache['hits']} hits, {cache['misses']} misses")
         return collections
     
-    def _create_program_collection(self):
-        """Create collection for program information."""
-        print("\n📚 Creating program collection...")
+    def _build_materialized_views(self) -> int:
+        """Store catalog-only rankings for single programs and overlapping program pairs."""
+        from agentic_chatbot_phase2 import AnalysisAgent
         
-        # Delete existing collection if it exists
-        try:
-            self.client.delete_collection("programs")
-        except Exception:
-            pass
+        analysis = AnalysisAgent(self.catalog)
+        fingerprint = catalog_fingerprint(self.programs, self.classes, self.class_overlap)
+        return MaterializedViews(str(self.db_dir)).build(analysis, self.programs, fingerprint)
+    
+    def _content_hash(self, document: str, metadata: Dict) -> str:
+        """Stable hash of a document's text, metadata and embedding model."""
+        payload = json.dumps([self.encoder.model_name, document, metadata],
+                             sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _sync_collection(self, name: str, description: str,
+                         documents: List[str], metadatas: List[Dict],
+                         ids: List[str]):
+        """
+        Bring a collection in line with the given documents.
+        
+        Only new or changed documents are upserted (and therefore embedded);
+        ids no longer present are deleted; everything else is left alone.
         
-        collection = self.client.create_collection(
-            name="programs",
-            metadata={"description": "BYU major programs and requirements"}
+        Returns:
+            (collection, counts) where counts has added/updated/unchanged/deleted
+        """
+        collection = self.client.get_or_create_collection(
+            name=name,
+            metadata={"description": description}
         )
         
-        # Prepare documents for embedding
-        documents = []
-        metadatas = []
-        ids = []
+        # Content hashes currently stored in the collection, keyed by id
+        stored = stored_hashes(collection)
+        
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+        upsert_docs, upsert_metas, upsert_ids = [], [], []
+        
+        for doc, meta, doc_id in zip(documents, metadatas, ids):
+            meta = dict(meta, content_hash=self._content_hash(doc, meta))
+            if doc_id not in stored:
+                counts["added"] += 1
+            elif stored[doc_id] != meta["content_hash"]:
+                counts["updated"] += 1
+            else:
+                counts["unchanged"] += 1
+                continue
+            upsert_docs.append(doc)
+            upsert_metas.append(meta)
+            upsert_ids.append(doc_id)
+        
+        if upsert_ids:
+            collection.upsert(
+                documents=upsert_docs,
+                embeddings=self.encoder.encode(upsert_docs),
+                metadatas=upsert_metas,
+                ids=upsert_ids
+            )
+        
+        removed = sorted(set(stored) - set(ids))
+        if removed:
+            collection.delete(ids=removed)
+            counts["deleted"] = len(removed)
         
-        for prog in self.programs:
-            # Create rich text description for embedding
-            doc_text = f"""
+        print(f"   ✓ {counts['added']} added, {counts['updated']} updated, "
+              f"{counts['unchanged']} unchanged, {counts['deleted']} deleted")
+        return collection, counts
+    
+    def _stream_collection(self, name: str, description: str, records,
+                           prepare, chunk_size: int):
+        """
+        Streaming counterpart of _sync_collection.
+        
+        Records are consumed once, chunk by chunk; only the stored id → hash
+        map (read page by page) and the set of ids seen are held for the
+        whole collection.
+        
+        Returns:
+            (collection, counts) where counts has added/updated/unchanged/deleted
+        """
+        collection = self.client.get_or_create_collection(
+            name=name,
+            metadata={"description": description}
+        )
+        stored = stored_hashes(collection)
+        counts, seen = stream_into_collection(collection, self.encoder, records, prepare,
+                                              stored, self._content_hash, chunk_size)
+        
+        removed = sorted(set(stored) - seen)
+        if removed:
+            collection.delete(ids=removed)
+        counts["deleted"] = len(removed)
+        
+        print(f"   ✓ {counts['added']} added, {counts['updated']} updated, "
+              f"{counts['unchanged']} unchanged, {counts['deleted']} deleted")
+        return collection, counts
+    
+    def _records(self, file_name: str, loaded: Callable[[], List[Dict]]):
+        """Stream <file_name>.jsonl if it is up to date, else the catalog's records."""
+        return catalog_records(str(self.data_dir), file_name, loaded)
+    
+    def _collection_from(self, name: str, description: str, file_name: str,
+                         records: Callable[[], List[Dict]], prepare, chunk_size: Optional[int]):
+        """
+        Sync a collection from the loaded catalog, or stream it if chunk_size is set.
+        `records` returns the loaded records; streaming only calls it without a JSONL file.
+        """
+        if chunk_size:
+            collection, self.build_stats[name] = self._stream_collection(
+                name, description, self._records(file_name, records), prepare, chunk_size)
+        else:
+            entries = [prepare(record) for record in records()]
+            collection, self.build_stats[name] = self._sync_collection(
+                name, description,
+                [doc for doc, _, _ in entries],
+                [meta for _, meta, _ in entries],
+                [doc_id for _, _, doc_id in entries]
+            )
+        return collection
+    
+    @staticmethod
+    def _program_document(prog: Dict) -> str:
+        """Create rich text description of a program for embedding."""
+        doc_text = f"""
             Program: {prog['program_name']}
             Category: {prog['program_category']}
             Credit Hours: {prog['min_credit_hours']}-{prog['max_credit_hours']}
@@ -107,50 +284,15 @@ class BYUCourseRAG:
             
             This program is ideal for students interested in {prog['program_category'].lower()}.
             """
-            
-            documents.append(doc_text.strip())
-            metadatas.append({
-                "program_id": prog["program_id"],
-                "program_name": prog["program_name"],
-                "category": prog["program_category"],
-                "type": "program"
-            })
-            ids.append(f"prog_{prog['program_id']}")
-        
-        # Add to collection
-        collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
-        )
-        
-        print(f"   ✓ Added {len(documents)} programs to database")
-        return collection
+        return doc_text.strip()
     
-    def _create_class_collection(self):
-        """Create collection for class information."""
-        print("\n📖 Creating class collection...")
+    @staticmethod
+    def _class_document(cls: Dict) -> str:
+        """Create detailed description of a class for embedding."""
+        prereq_text = f"Prerequisites: {cls['prerequisites']}" if cls['prerequisites'] else "No prerequisites"
+        programs_text = f"Applies to: {', '.join(cls['applies_to_programs'])}"
         
-        try:
-            self.client.delete_collection("classes")
-        except Exception:
-            pass
-        
-        collection = self.client.create_collection(
-            name="classes",
-            metadata={"description": "BYU course information"}
-        )
-        
-        documents = []
-        metadatas = []
-        ids = []
-        
-        for cls in self.classes:
-            # Create detailed description
-            prereq_text = f"Prerequisites: {cls['prerequisites']}" if cls['prerequisites'] else "No prerequisites"
-            programs_text = f"Applies to: {', '.join(cls['applies_to_programs'])}"
-            
-            doc_text = f"""
+        doc_text = f"""
             Course: {cls['course_name']} - {cls['title']}
             Credits: {cls['credit_hours']}
             Category: {cls['category']}
@@ -164,50 +306,14 @@ class BYUCourseRAG:
             
             This course is essential for students in {cls['category']}.
             """
-            
-            documents.append(doc_text.strip())
-            metadatas.append({
-                "course_id": cls["course_id"],
-                "course_name": cls["course_name"],
-                "title": cls["title"],
-                "credit_hours": cls["credit_hours"],
-                "category": cls["category"],
-                "program_count": len(cls["applies_to_programs"]),
-                "type": "class"
-            })
-            ids.append(f"class_{cls['course_id']}")
-        
-        collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
-        )
-        
-        print(f"   ✓ Added {len(documents)} classes to database")
-        return collection
+        return doc_text.strip()
     
-    def _create_overlap_collection(self):
-        """Create collection for multi-major classes (THE KEY TO YOUR PROJECT!)."""
-        print("\n🎯 Creating overlap collection (multi-major classes)...")
-        
-        try:
-            self.client.delete_collection("overlap")
-        except Exception:
-            pass
-        
-        collection = self.client.create_collection(
-            name="overlap",
-            metadata={"description": "Classes that apply to multiple majors"}
-        )
-        
-        documents = []
-        metadatas = []
-        ids = []
+    @staticmethod
+    def _overlap_document(cls: Dict) -> str:
+        """Create description of a multi-major class for embedding."""
+        programs_list = ', '.join(cls['applies_to_programs'])
         
-        for cls in self.class_overlap:
-            programs_list = ', '.join(cls['applies_to_programs'])
-            
-            doc_text = f"""
+        doc_text = f"""
             VERSATILE COURSE: {cls['course_name']} - {cls['title']}
             
             This course counts toward {cls['program_count']} different majors:
@@ -223,27 +329,62 @@ class BYUCourseRAG:
             {cls['category']} fields. Taking this course keeps options open across 
             {cls['program_count']} programs.
             """
-            
-            documents.append(doc_text.strip())
-            metadatas.append({
-                "course_id": cls["course_id"],
-                "course_name": cls["course_name"],
-                "title": cls["title"],
-                "program_count": cls["program_count"],
-                "versatility_score": cls["versatility_score"],
-                "category": cls["category"],
-                "type": "overlap"
-            })
-            ids.append(f"overlap_{cls['course_id']}")
-        
-        collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
-        )
-        
-        print(f"   ✓ Added {len(documents)} multi-major classes to database")
-        return collection
+        return doc_text.strip()
+    
+    @classmethod
+    def _program_entry(cls, prog: Dict):
+        """(document, metadata, id) for a program."""
+        return cls._program_document(prog), {
+            "program_id": prog["program_id"],
+            "program_name": prog["program_name"],
+            "category": prog["program_category"],
+            "type": "program"
+        }, f"prog_{prog['program_id']}"
+    
+    @classmethod
+    def _class_entry(cls, course: Dict):
+        """(document, metadata, id) for a class."""
+        return cls._class_document(course), {
+            "course_id": course["course_id"],
+            "course_name": course["course_name"],
+            "title": course["title"],
+            "credit_hours": course["credit_hours"],
+            "category": course["category"],
+            "program_count": len(course["applies_to_programs"]),
+            "type": "class"
+        }, f"class_{course['course_id']}"
+    
+    @classmethod
+    def _overlap_entry(cls, course: Dict):
+        """(document, metadata, id) for a multi-major class."""
+        return cls._overlap_document(course), {
+            "course_id": course["course_id"],
+            "course_name": course["course_name"],
+            "title": course["title"],
+            "program_count": course["program_count"],
+            "versatility_score": course["versatility_score"],
+            "category": course["category"],
+            "type": "overlap"
+        }, f"overlap_{course['course_id']}"
+    
+    def _create_program_collection(self, chunk_size: Optional[int] = None):
+        """Create collection for program information."""
+        print("\n📚 Creating program collection...")
+        return self._collection_from("programs", "BYU major programs and requirements",
+                                     "programs", lambda: self.programs, self._program_entry, chunk_size)
+    
+    def _create_class_collection(self, chunk_size: Optional[int] = None):
+        """Create collection for class information."""
+        print("\n📖 Creating class collection...")
+        return self._collection_from("classes", "BYU course information",
+                                     "classes", lambda: self.classes, self._class_entry, chunk_size)
+    
+    def _create_overlap_collection(self, chunk_size: Optional[int] = None):
+        """Create collection for multi-major classes (THE KEY TO YOUR PROJECT!)."""
+        print("\n🎯 Creating overlap collection (multi-major classes)...")
+        return self._collection_from("overlap", "Classes that apply to multiple majors",
+                                     "class_overlap", lambda: self.class_overlap, self._overlap_entry,
+                                     chunk_size)
     
     def test_search(self):
         """Test the search functionality with sample queries."""
@@ -269,7 +410,7 @@ class BYUCourseRAG:
             
             # Search overlap collection (most important for your use case)
             results = overlap_col.query(
-                query_texts=[query],
+                query_embeddings=self.encoder.encode([query]),
                 n_results=3
             )
             
@@ -288,8 +429,6 @@ class BYUCourseRAG:
                     print(f"   {j}. {course_name} - {title}")
                     print(f"      → Applies to {prog_count} majors")
     
-    from typing import Optional
-
     def get_recommendations(self, student_interests: str, 
                            considering_majors: Optional[List[str]] = None,
                            n_results: int = 5) -> Dict:
@@ -304,17 +443,15 @@ class BYUCourseRAG:
         Returns:
             Dictionary with recommendations and explanations
         """
-        overlap_col = self.client.get_collection("overlap")
-        classes_col = self.client.get_collection("classes")
-        
         # Build enhanced query
         query = f"{student_interests}"
         if considering_majors:
             query += f" Considering majors: {', '.join(considering_majors)}"
         
         # Search for versatile courses
-        overlap_results = overlap_col.query(
-            query_texts=[query],
+        overlap_results = self.backend.query(
+            "overlap",
+            self.encoder.encode([query]),
             n_results=n_results
         )
         
@@ -343,6 +480,14 @@ class BYUCourseRAG:
 
 def main():
     """Main setup function."""
+    parser = argparse.ArgumentParser(description="Build the BYU course advisor vector database")
+    parser.add_argument("--stream", action="store_true",
+                        help="stream data/*.jsonl and embed in bounded-memory chunks")
+    parser.add_argument("--chunk-size", type=int, default=INGEST_CHUNK_SIZE)
+    parser.add_argument("--no-views", action="store_true",
+                        help="skip precomputing materialized views")
+    args = parser.parse_args()
+    
     print("=" * 70)
     print("🎓 BYU UNDECIDED MAJOR ADVISOR - RAG SYSTEM SETUP")
     print("=" * 70)
@@ -351,7 +496,8 @@ def main():
     rag = BYUCourseRAG()
     
     # Build vector database
-    collections = rag.build_vector_database()
+    collections = rag.build_vector_database(stream=args.stream, chunk_size=args.chunk_size,
+                                            build_views=MATERIALIZED_VIEWS and not args.no_views)
     
     # Test the system
     rag.test_search()
@@ -0,0 +1,281 @@
+"""
+Ranking Engine - Vectorized course scoring for the Analysis Agent.
+
+Per-course feature columns are precomputed from the catalog once:
+  • versatility   - versatility_score / 100
+  • program_count - programs the course applies to (scaled to 0-1)
+  • level         - course level (1 = 100-level ... 5 = 500-level, scaled to 0-1)
+  • credit_hours  - credit hours (scaled to 0-1)
+plus a course × program membership matrix. Scoring candidates for one or
+many student profiles is then a single NumPy expression, and the top-k is
+picked with argpartition.
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Default feature weights. A negative level weight favours intro courses.
+DEFAULT_WEIGHTS = {
+    "relevance": 1.0,       # Search relevance (fused score, scaled to 0-1)
+    "versatility": 0.6,
+    "program_count": 0.3,
+    "level": -0.4,
+    "credit_hours": 0.1,
+    "major_match": 1.2,     # Share of the student's considered majors the course counts toward
+}
+
+FEATURES = ["versatility", "program_count", "level", "credit_hours"]
+
+
+def course_level(course_name: str) -> int:
+    """Course level from its number, e.g. "CS 235" -> 2."""
+    match = re.search(r'(\d+)', course_name)
+    if not match:
+        return 1
+    return max(1, min(int(match.group(1)) // 100, 5))
+
+
+# Abbreviations students use for majors. Applied word by word, so
+# "applied math" reads as "applied mathematics". ("IS" is left out: it is
+# too common an English word to spot in free text.)
+MAJOR_ALIASES = {
+    "cs": "computer science",
+    "compsci": "computer science",
+    "ce": "computer engineering",
+    "infosys": "information systems",
+    "math": "mathematics",
+    "maths": "mathematics",
+    "stat": "statistics",
+    "stats": "statistics",
+    "acct": "accounting",
+    "fin": "finance",
+}
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r'[a-z0-9]+', text.lower())
+
+
+def _expand_aliases(words: Sequence[str]) -> List[str]:
+    expanded = []
+    for word in words:
+        expanded.extend(MAJOR_ALIASES.get(word, word).split())
+    return expanded
+
+
+def _program_words(name: str) -> Tuple[List[str], List[str]]:
+    """(words of the full name, words of the base name before " ("), aliases expanded."""
+    return _expand_aliases(_words(name)), _expand_aliases(_words(name.split(" (")[0]))
+
+
+def _resolve_one(words: List[str], program_words: List[Tuple[List[str], List[str]]]) -> List[int]:
+    """
+    Programs one mention refers to, best match only:
+      1. the full or base name is exactly the mention - "Mathematics" is
+         "Mathematics (BS)", not its Applied & Computational track
+      2. every mention word is a whole word of the name - fewest extra words wins
+      3. the whole base name appears in the mention ("a Finance major")
+    Several indexes come back only for a genuine tie ("Computer").
+    """
+    wanted = set(words)
+    tiers = [
+        [(len(full), j) for j, (full, base) in enumerate(program_words) if words in (full, base)],
+        [(len(set(full) - wanted), j) for j, (full, base) in enumerate(program_words) if wanted <= set(full)],
+        [(-len(base), j) for j, (full, base) in enumerate(program_words) if base and set(base) <= wanted],
+    ]
+    for tier in tiers:
+        if tier:
+            best = min(rank for rank, _ in tier)
+            return [j for rank, j in tier if rank == best]
+    return []
+
+
+def resolve_majors(considering_majors: Sequence[str], program_names: Sequence[str]) -> List[int]:
+    """
+    Indexes of the programs a student means by their free-text majors.
+    
+    Matching is on whole words, case-insensitive, after expanding
+    MAJOR_ALIASES: "CS" is "Computer Science (BS)" and "Math" is
+    "Mathematics (BS)" only. Each major resolves to its best match (see
+    _resolve_one); the result is sorted and free of duplicates.
+    """
+    program_words = [_program_words(name) for name in program_names]
+    matched = set()
+    for major in considering_majors:
+        words = _expand_aliases(_words(major or ""))
+        if words:
+            matched.update(_resolve_one(words, program_words))
+    return sorted(matched)
+
+
+def majors_in_text(text: str, program_names: Sequence[str]) -> List[int]:
+    """
+    Programs mentioned in free text, in the order they appear.
+    
+    Every span that spells a program's base or full name (or an alias) is a
+    mention; overlapping spans keep the longest. Each mention resolves to
+    one program as in resolve_majors, and repeats are dropped, so "switch
+    from Mathematics to Finance" gives Mathematics (BS), then Finance (BS).
+    """
+    words = _expand_aliases(_words(text))
+    program_words = [_program_words(name) for name in program_names]
+    phrases = {tuple(w) for pair in program_words for w in pair if w}
+    
+    spans = []
+    for start in range(len(words)):
+        for phrase in phrases:
+            if tuple(words[start:start + len(phrase)]) == phrase:
+                spans.append((start, -len(phrase)))
+    
+    found: List[int] = []
+    end = 0
+    for start, negative_length in sorted(spans):
+        if start < end:
+            continue
+        end = start - negative_length
+        best = _resolve_one(words[start:end], program_words)
+        if len(best) == 1 and best[0] not in found:
+            found.append(best[0])
+    return found
+
+
+class RankingEngine:
+    """
+    Scores candidate courses with precomputed feature columns.
+    
+    All scoring is vectorized; `rank_batch` scores any number of profiles
+    in one call.
+    """
+    
+    def __init__(self, programs_data: List[Dict], classes_data: List[Dict],
+                 overlap_data: Optional[List[Dict]] = None,
+                 weights: Optional[Dict[str, float]] = None):
+        """
+        Precompute feature columns from the catalog.
+        
+        Args:
+            programs_data: Programs from programs.json
+            classes_data: Courses from classes.json
+            overlap_data: Optional class_overlap.json (for versatility scores)
+            weights: Optional overrides of DEFAULT_WEIGHTS
+        """
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        
+        self.course_ids = [c["course_id"] for c in classes_data]
+        self.course_index = {cid: i for i, cid in enumerate(self.course_ids)}
+        self.program_names = [p["program_name"] for p in programs_data]
+        program_index = {name: j for j, name in enumerate(self.program_names)}
+        
+        versatility_by_id = {c["course_id"]: c["versatility_score"] for c in (overlap_data or [])}
+        
+        n_courses = len(classes_data)
+        program_count = np.zeros(n_courses, dtype=np.float32)
+        versatility = np.zeros(n_courses, dtype=np.float32)
+        level = np.zeros(n_courses, dtype=np.float32)
+        credit_hours = np.zeros(n_courses, dtype=np.float32)
+        self.membership = np.zeros((n_courses, len(programs_data)), dtype=np.float32)
+        
+        for i, cls in enumerate(classes_data):
+            programs = cls.get("applies_to_programs", [])
+            program_count[i] = len(programs)
+            versatility[i] = versatility_by_id.get(cls["course_id"], len(programs) * 10)
+            level[i] = course_level(cls.get("course_name", ""))
+            credit_hours[i] = float(cls.get("credit_hours", 0) or 0)
+            for name in programs:
+                if name in program_index:
+                    self.membership[i, program_index[name]] = 1.0
+        
+        # Feature matrix (n_courses × n_features), every column scaled to 0-1
+        self.features = np.stack([
+            np.clip(versatility / 100.0, 0.0, 1.0),
+            program_count / max(program_count.max(initial=0), 1.0),
+            (level - 1.0) / 4.0,
+            credit_hours / max(credit_hours.max(initial=0), 1.0),
+        ], axis=1).astype(np.float32)
+    
+    def _weight_vector(self) -> np.ndarray:
+        return np.array([self.weights[f] for f in FEATURES], dtype=np.float32)
+    
+    def major_matrix(self, majors_batch: Sequence[Sequence[str]]) -> np.ndarray:
+        """
+        Profile × program matrix; each row sums to 1 over the profile's
+        matched programs (all zero if nothing matched).
+        """
+        matrix = np.zeros((len(majors_batch), len(self.program_names)), dtype=np.float32)
+        for row, majors in enumerate(majors_batch):
+            matched = resolve_majors(majors or [], self.program_names)
+            if matched:
+                matrix[row, matched] = 1.0 / len(matched)
+        return matrix
+    
+    def score_batch(self, candidate_ids: Sequence[str],
+                    majors_batch: Sequence[Sequence[str]],
+                    relevance: Optional[Sequence[float]] = None) -> Tuple[List[str], np.ndarray]:
+        """
+        Score candidates for several profiles at once.
+        
+        Args:
+            candidate_ids: Course ids to score (unknown ids are dropped)
+            majors_batch: considering_majors for each profile
+            relevance: Optional search relevance per candidate (same order)
+        
+        Returns:
+            (kept candidate ids, scores of shape (n_profiles, n_candidates))
+        """
+        keep = [i for i, cid in enumerate(candidate_ids) if cid in self.course_index]
+        ids = [candidate_ids[i] for i in keep]
+        rows = np.array([self.course_index[cid] for cid in ids], dtype=np.int64)
+        
+        rel = np.zeros(len(ids), dtype=np.float32)
+        if relevance is not None and len(ids):
+            rel = np.asarray(relevance, dtype=np.float32)[keep]
+            rel = rel / max(float(rel.max()), 1e-9)
+        
+        majors = self.major_matrix(majors_batch)
+        
+        # One expression: static features + search relevance + major membership
+        scores = (
+            (self.features[rows] @ self._weight_vector())[None, :]
+            + self.weights["relevance"] * rel[None, :]
+            + self.weights["major_match"] * (majors @ self.membership[rows].T)
+        )
+        return ids, scores
+    
+    def rank_batch(self, candidate_ids: Sequence[str],
+                   majors_batch: Sequence[Sequence[str]],
+                   relevance: Optional[Sequence[float]] = None,
+                   top_k: int = 5) -> List[List[Tuple[str, float]]]:
+        """
+        Top-k (course_id, score) lists, one per profile.
+        Ties break on the original candidate order.
+        """
+        ids, scores = self.score_batch(candidate_ids, majors_batch, relevance)
+        if not ids:
+            return [[] for _ in majors_batch]
+        
+        k = min(top_k, len(ids))
+        # k-th best score per profile; argpartition alone would pick arbitrarily among ties at it
+        cutoffs = -np.partition(-scores, k - 1, axis=1)[:, k - 1]
+        
+        ranked = []
+        for row, cutoff in zip(scores, cutoffs):
+            above = np.flatnonzero(row > cutoff)
+            tied = np.flatnonzero(row == cutoff)[:k - len(above)]
+            cols = np.concatenate([above, tied])
+            # Sort the k winners by score, then by candidate position
+            order = np.lexsort((cols, -row[cols]))
+            ranked.append([(ids[c], float(row[c])) for c in cols[order]])
+        return ranked
+    
+    def rank(self, candidate_ids: Sequence[str], considering_majors: Sequence[str],
+             relevance: Optional[Sequence[float]] = None,
+             top_k: int = 5) -> List[Tuple[str, float]]:
+        """Top-k (course_id, score) for a single profile."""
+        return self.rank_batch(candidate_ids, [considering_majors], relevance, top_k)[0]
+    
+    def max_score(self) -> float:
+        """Highest achievable score (sum of the positive weights)."""
+        return float(sum(w for w in self.weights.values() if w > 0))
+
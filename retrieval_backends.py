@@ -0,0 +1,292 @@
+"""
+Retrieval Backends - Pluggable nearest-neighbour search over the course collections.
+
+Two implementations share one interface:
+  • ChromaBackend - queries the persistent Chroma database (default)
+  • NumpyBackend  - exact in-process search over a dense embedding matrix
+                    exported next to the Chroma database at build time
+
+Select one with RETRIEVAL_BACKEND in config.py ("chroma" or "numpy").
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    from config import RETRIEVAL_BACKEND
+except ImportError:
+    RETRIEVAL_BACKEND = "chroma"
+
+# Sub-directory of the database directory holding the NumPy export
+NUMPY_INDEX_DIR = "numpy_index"
+
+# Rows read from Chroma per page when exporting a collection
+EXPORT_PAGE_SIZE = 2048
+
+
+class RetrievalBackend:
+    """
+    Interface for vector search backends.
+    
+    `query` returns Chroma-shaped results: a dict with "ids", "distances",
+    "metadatas" and "documents", each a list with one inner list per query.
+    Distances are squared L2, which for normalized vectors is 2 - 2·cosine.
+    """
+    
+    name = "base"
+    
+    def query(self, collection: str, query_embeddings: np.ndarray,
+              n_results: int = 3, where: Optional[Dict] = None) -> Dict:
+        """
+        Find the nearest documents for each query embedding.
+        
+        Args:
+            collection: Collection name ("programs", "classes" or "overlap")
+            query_embeddings: float32 array of shape (n_queries, dimension)
+            n_results: Results per query
+            where: Optional Chroma-style metadata filter
+        """
+        raise NotImplementedError
+    
+    def reload(self):
+        """Drop anything cached from a previous build."""
+
+
+class ChromaBackend(RetrievalBackend):
+    """Queries the persistent Chroma database."""
+    
+    name = "chroma"
+    
+    def __init__(self, db_dir: str = "chroma_db", client=None):
+        if client is None:
+            import chromadb
+            client = chromadb.PersistentClient(path=str(db_dir))
+        self.client = client
+        self._handles: Dict[str, object] = {}
+    
+    def reload(self):
+        self._handles.clear()
+    
+    def _handle(self, collection: str):
+        """Collection handle, looked up once and then reused."""
+        handle = self._handles.get(collection)
+        if handle is None:
+            handle = self.client.get_collection(collection)
+            self._handles[collection] = handle
+        return handle
+    
+    def query(self, collection: str, query_embeddings: np.ndarray,
+              n_results: int = 3, where: Optional[Dict] = None) -> Dict:
+        handle = self._handle(collection)
+        result = handle.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where or None,
+            include=["metadatas", "documents", "distances"]
+        )
+        return {
+            "ids": result.get("ids") or [],
+            "distances": result.get("distances") or [],
+            "metadatas": result.get("metadatas") or [],
+            "documents": result.get("documents") or []
+        }
+
+
+class _DenseCollection:
+    """One exported collection: normalized embedding matrix plus columnar metadata."""
+    
+    def __init__(self, embeddings: np.ndarray, ids: List[str],
+                 metadatas: List[Dict], documents: List[str]):
+        self.embeddings = embeddings
+        self.sq_norms = np.einsum("ij,ij->i", embeddings, embeddings)
+        self.ids = ids
+        self.metadatas = metadatas
+        self.documents = documents
+        
+        # Columnar view of the metadata for vectorized filtering
+        fields = sorted({key for meta in metadatas for key in meta})
+        self.columns: Dict[str, np.ndarray] = {}
+        for field in fields:
+            values = [meta.get(field) for meta in metadatas]
+            if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+                self.columns[field] = np.asarray(values, dtype=np.float64)
+            else:
+                self.columns[field] = np.asarray(values, dtype=object)
+    
+    def mask(self, where: Optional[Dict]) -> Optional[np.ndarray]:
+        """Evaluate a Chroma-style `where` filter to a boolean row mask."""
+        if not where:
+            return None
+        result = np.ones(len(self.ids), dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    result &= self.mask(clause)
+            elif key == "$or":
+                any_mask = np.zeros(len(self.ids), dtype=bool)
+                for clause in condition:
+                    any_mask |= self.mask(clause)
+                result &= any_mask
+            else:
+                result &= self._field_mask(key, condition)
+        return result
+    
+    def _field_mask(self, field: str, condition) -> np.ndarray:
+        column = self.columns.get(field)
+        if column is None:
+            return np.zeros(len(self.ids), dtype=bool)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        
+        result = np.ones(len(self.ids), dtype=bool)
+        for op, value in condition.items():
+            if op == "$eq":
+                result &= column == value
+            elif op == "$ne":
+                result &= column != value
+            elif op == "$gt":
+                result &= column > value
+            elif op == "$gte":
+                result &= column >= value
+            elif op == "$lt":
+                result &= column < value
+            elif op == "$lte":
+                result &= column <= value
+            elif op == "$in":
+                result &= np.isin(column, list(value))
+            elif op == "$nin":
+                result &= ~np.isin(column, list(value))
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+        return result
+
+
+class NumpyBackend(RetrievalBackend):
+    """
+    Exact search with a single matrix multiply and argpartition top-k.
+    
+    Reads the export written by BYUCourseRAG.build_vector_database:
+    `<db_dir>/numpy_index/<collection>.npy` (memory-mapped embeddings) and
+    `<collection>.json` (ids, metadatas, documents).
+    """
+    
+    name = "numpy"
+    
+    def __init__(self, db_dir: str = "chroma_db", client=None):
+        self.index_dir = Path(db_dir) / NUMPY_INDEX_DIR
+        self._collections: Dict[str, _DenseCollection] = {}
+        self._lock = threading.Lock()
+    
+    def reload(self):
+        with self._lock:
+            self._collections.clear()
+    
+    def _collection(self, name: str) -> _DenseCollection:
+        with self._lock:
+            if name not in self._collections:
+                with open(self.index_dir / f"{name}.json", 'r') as f:
+                    records = json.load(f)
+                embeddings = np.load(self.index_dir / f"{name}.npy", mmap_mode="r")
+                self._collections[name] = _DenseCollection(
+                    embeddings, records["ids"], records["metadatas"], records["documents"]
+                )
+            return self._collections[name]
+    
+    def query(self, collection: str, query_embeddings: np.ndarray,
+              n_results: int = 3, where: Optional[Dict] = None) -> Dict:
+        dense = self._collection(collection)
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        
+        # Squared L2 distances for all queries at once
+        q_norms = np.einsum("ij,ij->i", queries, queries)
+        distances = q_norms[:, None] + dense.sq_norms[None, :] - 2.0 * (queries @ dense.embeddings.T)
+        
+        rows = np.arange(len(dense.ids))
+        mask = dense.mask(where)
+        if mask is not None:
+            rows = rows[mask]
+            distances = distances[:, mask]
+        
+        k = min(n_results, len(rows))
+        results = {"ids": [], "distances": [], "metadatas": [], "documents": []}
+        for q in range(len(queries)):
+            row_distances = distances[q]
+            if k < len(rows):
+                top = np.argpartition(row_distances, k - 1)[:k]
+            else:
+                top = np.arange(len(rows))
+            top = top[np.argsort(row_distances[top], kind="stable")]
+            picked = rows[top]
+            results["ids"].append([dense.ids[i] for i in picked])
+            results["distances"].append([float(max(d, 0.0)) for d in row_distances[top]])
+            results["metadatas"].append([dense.metadatas[i] for i in picked])
+            results["documents"].append([dense.documents[i] for i in picked])
+        return results
+
+
+def export_numpy_index(collection, db_dir: str):
+    """
+    Write a Chroma collection out as a dense matrix for NumpyBackend.
+    
+    Args:
+        collection: Chroma collection handle
+        db_dir: Database directory (the export goes in its numpy_index/)
+    """
+    index_dir = Path(db_dir) / NUMPY_INDEX_DIR
+    index_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Embeddings are copied page by page into the .npy file, so the full
+    # float matrix is never held in memory alongside Chroma's copy
+    count = collection.count()
+    ids, metadatas, documents = [], [], []
+    embeddings = None
+    for offset in range(0, max(count, 1), EXPORT_PAGE_SIZE):
+        page = collection.get(include=["embeddings", "metadatas", "documents"],
+                              limit=EXPORT_PAGE_SIZE, offset=offset)
+        vectors = np.asarray(page["embeddings"], dtype=np.float32)
+        if vectors.ndim != 2:
+            vectors = vectors.reshape(len(page["ids"]), -1) if len(page["ids"]) else vectors.reshape(0, 0)
+        if embeddings is None:
+            embeddings = np.lib.format.open_memmap(
+                index_dir / f"{collection.name}.npy", mode="w+", dtype=np.float32,
+                shape=(count, vectors.shape[1] if len(vectors) else 0))
+        embeddings[len(ids):len(ids) + len(vectors)] = vectors
+        ids.extend(page["ids"])
+        metadatas.extend(page["metadatas"] or [])
+        documents.extend(page["documents"] or [])
+    embeddings.flush()
+    del embeddings
+    
+    with open(index_dir / f"{collection.name}.json", 'w') as f:
+        json.dump({
+            "ids": ids,
+            "metadatas": metadatas,
+            "documents": documents
+        }, f)
+
+
+BACKENDS = {
+    ChromaBackend.name: ChromaBackend,
+    NumpyBackend.name: NumpyBackend,
+}
+
+
+def get_backend(name: Optional[str] = None, db_dir: str = "chroma_db",
+                client=None) -> RetrievalBackend:
+    """
+    Create the retrieval backend selected by `name` (default: RETRIEVAL_BACKEND).
+    
+    Args:
+        name: "chroma" or "numpy"
+        db_dir: Database directory
+        client: Optional existing Chroma client to reuse
+    """
+    name = (name or RETRIEVAL_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown retrieval backend '{name}' "
+                         f"(choose from: {', '.join(BACKENDS)})")
+    return BACKENDS[name](db_dir, client=client)
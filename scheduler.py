@@ -0,0 +1,241 @@
+"""
+Semester Scheduler - Orders a student's required courses into a multi-semester roadmap.
+
+The target is every required course of the considered programs plus all of
+their transitive prerequisites (from the PrerequisiteGraph), minus what the
+student has completed. Each semester takes courses from the frontier of
+takeable courses - direct prerequisites done, or concurrent where allowed -
+up to the credit cap, filling in critical-path order (longest chain of
+dependents first).
+
+Beam search keeps the `beam_width` best partial roadmaps per semester.
+States are completed-course bitsets, so two paths reaching the same set
+are merged. Two things are cached across calls:
+  • per-program requirement masks - the target for any list of majors is
+    a union of them, so adding a major computes only that program's mask
+  • finished plans, keyed by (target bitset, completed, cap, semesters) -
+    a major list whose requirements are already covered by the others
+    reuses the plan as is
+Any other change to the target reruns the beam search from the start;
+the search itself is not reused between targets.
+"""
+
+import copy
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from course_optimizer import DEFAULT_CREDITS
+from prerequisites import PrerequisiteGraph, normalize_course_id
+from ranking import resolve_majors
+
+DEFAULT_SEMESTERS = 4
+
+
+class SemesterScheduler:
+    """Beam-search roadmap planner over the prerequisite DAG."""
+    
+    def __init__(self, programs_data: List[Dict], classes_data: List[Dict],
+                 prereq_graph: Optional[PrerequisiteGraph] = None,
+                 beam_width: int = 8, cache_size: int = 256):
+        """
+        Index the catalog for scheduling.
+        
+        Args:
+            programs_data: Programs from programs.json
+            classes_data: Courses from classes.json
+            prereq_graph: Shared PrerequisiteGraph (built from classes_data if omitted)
+            beam_width: Partial roadmaps kept per semester
+            cache_size: Finished plans kept for repeat requests
+        """
+        self.graph = prereq_graph or PrerequisiteGraph(classes_data)
+        self.beam_width = beam_width
+        self.cache_size = cache_size
+        self.program_names = [p["program_name"] for p in programs_data]
+        self.program_requirements = [p["required_classes"] for p in programs_data]
+        
+        # Graph nodes keep their bit positions; required courses the graph has
+        # never seen are appended with no prerequisites
+        self.course_ids = list(self.graph.course_ids)
+        self.index = dict(self.graph.index)
+        for required in self.program_requirements:
+            for cid in required:
+                if cid not in self.index:
+                    self.index[cid] = len(self.course_ids)
+                    self.course_ids.append(cid)
+        
+        n_graph = len(self.graph.course_ids)
+        n = len(self.course_ids)
+        self.direct = self.graph.direct + [0] * (n - n_graph)
+        self.concurrent_ok = self.graph.concurrent_ok + [0] * (n - n_graph)
+        self.ancestors = self.graph.ancestors + [0] * (n - n_graph)
+        
+        by_id = {c["course_id"]: c for c in classes_data}
+        self.names = [by_id.get(cid, {}).get("course_name", cid) for cid in self.course_ids]
+        self.credits = [float(by_id.get(cid, {}).get("credit_hours") or DEFAULT_CREDITS)
+                        for cid in self.course_ids]
+        
+        # Critical path: longest chain of courses that depend on this one
+        self.height = [0] * n
+        for i in reversed(self.graph.order):
+            for child in self.graph.children[i]:
+                self.height[i] = max(self.height[i], self.height[child] + 1)
+        self.priority_rank = [0] * n
+        for rank, i in enumerate(sorted(range(n), key=lambda i: (-self.height[i], self.course_ids[i]))):
+            self.priority_rank[i] = rank
+        
+        self._program_masks: Dict[int, int] = {}
+        self._plan_cache: Dict[Tuple, Dict] = {}
+        # Plans are shared by concurrent requests; eviction must not race
+        self._cache_lock = threading.Lock()
+    
+    @staticmethod
+    def _bits(mask: int) -> Iterable[int]:
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+    
+    def program_mask(self, j: int) -> int:
+        """Required courses of program j plus their prerequisites (cached)."""
+        mask = self._program_masks.get(j)
+        if mask is None:
+            mask = 0
+            for cid in self.program_requirements[j]:
+                i = self.index[cid]
+                mask |= (1 << i) | self.ancestors[i]
+            self._program_masks[j] = mask
+        return mask
+    
+    def target_mask(self, considering_majors: Sequence[str]) -> int:
+        """Union of the program masks for the student's majors."""
+        mask = 0
+        for j in resolve_majors(considering_majors, self.program_names):
+            mask |= self.program_mask(j)
+        return mask
+    
+    def plan(self, considering_majors: Sequence[str], credit_cap: float,
+             n_semesters: int = DEFAULT_SEMESTERS,
+             completed: Optional[Sequence[str]] = None) -> Dict:
+        """
+        Build a semester-by-semester roadmap.
+        
+        Args:
+            considering_majors: Majors the student is considering (free text)
+            credit_cap: Maximum credit hours per semester
+            n_semesters: Number of semesters to plan
+            completed: Course ids already completed
+        
+        Returns:
+            Dict with "semesters" (course ids, names and credits per semester),
+            "unscheduled" (required courses that did not fit), "required_total",
+            "method" and "elapsed_ms"
+        """
+        start = time.perf_counter()
+        done = 0
+        for cid in completed or []:
+            i = self.index.get(normalize_course_id(cid))
+            if i is not None:
+                done |= (1 << i) | self.ancestors[i]
+        # done now also covers prerequisites of completed courses (MATH 113 implies MATH 112)
+        target = self.target_mask(considering_majors) & ~done
+        
+        key = (target, done, float(credit_cap), n_semesters)
+        cached = self._plan_cache.get(key)
+        if cached is not None:
+            # Deep copy: callers must not share nested semester lists with the cache
+            return dict(copy.deepcopy(cached), method="beam (cached)",
+                        elapsed_ms=round((time.perf_counter() - start) * 1000, 3))
+        
+        semesters = self._beam_search(target, done, credit_cap, n_semesters)
+        scheduled = 0
+        for taken in semesters:
+            scheduled |= taken
+        
+        result = {
+            "semesters": [{
+                "semester": s + 1,
+                "courses": [self.course_ids[i] for i in self._ordered(taken)],
+                "course_names": [self.names[i] for i in self._ordered(taken)],
+                "credits": sum(self.credits[i] for i in self._bits(taken))
+            } for s, taken in enumerate(semesters)],
+            "unscheduled": [self.course_ids[i] for i in self._ordered(target & ~scheduled)],
+            "required_total": bin(target).count("1"),
+            "method": "beam",
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)
+        }
+        with self._cache_lock:
+            if key not in self._plan_cache and len(self._plan_cache) >= self.cache_size:
+                self._plan_cache.pop(next(iter(self._plan_cache)))
+            self._plan_cache[key] = copy.deepcopy(result)
+        return result
+    
+    def _ordered(self, mask: int) -> List[int]:
+        return sorted(self._bits(mask), key=lambda i: self.priority_rank[i])
+    
+    def _beam_search(self, target: int, done: int, credit_cap: float,
+                     n_semesters: int) -> List[int]:
+        """Best sequence of per-semester course bitsets."""
+        beam: List[Tuple[int, List[int]]] = [(done, [])]
+        for _ in range(n_semesters):
+            successors: Dict[int, List[int]] = {}
+            for state, path in beam:
+                if not target & ~state:
+                    successors.setdefault(state, path + [0])
+                    continue
+                fills = self._fills(target, state, credit_cap)
+                if not fills:
+                    # Nothing fits under the cap; carry the state forward
+                    successors.setdefault(state, path + [0])
+                for taken in fills:
+                    # Same completed set = same future; keep the first path to it
+                    successors.setdefault(state | taken, path + [taken])
+            ranked = sorted(successors.items(), key=lambda item: self._state_score(target, item[0]),
+                            reverse=True)
+            beam = ranked[:self.beam_width]
+        
+        best_state, best_path = beam[0]
+        # Drop trailing empty semesters
+        while best_path and not best_path[-1]:
+            best_path.pop()
+        return best_path
+    
+    def _state_score(self, target: int, state: int) -> Tuple[float, int]:
+        """Higher is better: required credits scheduled, then least critical path left."""
+        scheduled = sum(self.credits[i] for i in self._bits(target & state))
+        remaining_height = sum(self.height[i] + 1 for i in self._bits(target & ~state))
+        return scheduled, -remaining_height
+    
+    def _fills(self, target: int, done: int, credit_cap: float) -> List[int]:
+        """
+        Candidate course sets for the next semester: the critical-path greedy
+        fill, plus variants that leave out one of the top frontier courses.
+        """
+        frontier = [i for i in self._ordered(target & ~done)
+                    if self.direct[i] & ~done & ~self.concurrent_ok[i] == 0]
+        fills = []
+        for skip in [None] + frontier[:self.beam_width - 1]:
+            taken = self._fill(frontier, target, done, credit_cap, skip)
+            if taken and taken not in fills:
+                fills.append(taken)
+        return fills
+    
+    def _fill(self, frontier: List[int], target: int, done: int,
+              credit_cap: float, skip: Optional[int]) -> int:
+        """Greedy semester fill; concurrent prerequisites must be taken alongside."""
+        taken = 0
+        used = 0.0
+        changed = True
+        while changed:
+            changed = False
+            for i in frontier:
+                if i == skip or taken >> i & 1 or used + self.credits[i] > credit_cap:
+                    continue
+                # Remaining prerequisites must be concurrent-allowed and in this semester
+                if self.direct[i] & ~done & ~taken:
+                    continue
+                taken |= 1 << i
+                used += self.credits[i]
+                changed = True
+        return taken
+
@@ -0,0 +1,162 @@
+"""
+Streaming Ingestion - Index catalogs too large to hold in memory at once.
+
+The catalog is read from JSONL (one record per line), documents are
+formatted by a generator, and records are embedded and written in
+fixed-size chunks. A single writer thread upserts chunk N while the
+encoder works on chunk N+1, so at most two chunks are in memory at a
+time and the model never waits for the database.
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Tuple
+
+from catalog_binary import BinaryCatalog, stream_binary_records
+
+try:
+    from config import INGEST_CHUNK_SIZE
+except ImportError:
+    INGEST_CHUNK_SIZE = 512
+
+# Ids fetched per page when reading the content hashes already stored
+STORED_HASH_PAGE_SIZE = 5000
+
+
+def iter_jsonl(path: str) -> Iterator[Dict]:
+    """Yield one record per non-empty line of a JSONL file."""
+    with open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_jsonl(path: str, records: Iterable[Dict]) -> int:
+    """
+    Write records to a JSONL file, one per line.
+    
+    Returns:
+        Number of records written
+    """
+    count = 0
+    with open(path, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """Split an iterable into lists of at most `size` items."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def jsonl_is_fresh(data_dir: str, name: str) -> bool:
+    """
+    True if <name>.jsonl exists and is not older than <name>.json (or
+    there is no JSON): a JSONL left over from before the JSON was edited
+    is stale.
+    """
+    path = Path(data_dir) / f"{name}.jsonl"
+    source = Path(data_dir) / f"{name}.json"
+    if not path.exists():
+        return False
+    return not source.exists() or path.stat().st_mtime_ns >= source.stat().st_mtime_ns
+
+
+def catalog_records(data_dir: str, name: str, fallback: Callable[[], List[Dict]]) -> Iterable[Dict]:
+    """
+    Records for one catalog file, streamed from <name>.jsonl when it is
+    fresh (jsonl_is_fresh), or from catalog.sqlite when it matches the JSON
+    (or stands in for it). Otherwise fallback() - the records loaded from
+    <name>.json - which is only called in that case.
+    """
+    path = Path(data_dir) / f"{name}.jsonl"
+    if jsonl_is_fresh(data_dir, name):
+        return iter_jsonl(str(path))
+    if path.exists():
+        print(f"   ⚠️  {path.name} is older than {name}.json - ignoring it")
+    binary = BinaryCatalog.open(data_dir)
+    if binary is not None:
+        return stream_binary_records(binary, name)
+    return fallback()
+
+
+def stored_hashes(collection, page_size: int = STORED_HASH_PAGE_SIZE) -> Dict[str, str]:
+    """
+    id → content hash of every document in a collection, read a page at a
+    time so the full metadata of a large collection is never in memory.
+    """
+    hashes: Dict[str, str] = {}
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        for doc_id, meta in zip(page["ids"], page["metadatas"] or []):
+            hashes[doc_id] = (meta or {}).get("content_hash")
+        if len(page["ids"]) < page_size:
+            return hashes
+        offset += page_size
+
+
+def stream_into_collection(collection, encoder, records: Iterable[Dict],
+                           prepare: Callable[[Dict], Tuple[str, Dict, str]],
+                           stored_hashes: Dict[str, str],
+                           content_hash: Callable[[str, Dict], str],
+                           chunk_size: int = INGEST_CHUNK_SIZE) -> Tuple[Dict[str, int], Set[str]]:
+    """
+    Embed and upsert new or changed records chunk by chunk.
+    
+    Args:
+        collection: Chroma collection to write to
+        encoder: SharedEncoder producing the embeddings
+        records: Catalog records (any iterable; consumed once)
+        prepare: Maps a record to (document, metadata, id)
+        stored_hashes: id → content hash already in the collection
+        content_hash: Hash of (document, metadata), stored in the metadata
+        chunk_size: Records embedded and written at a time
+    
+    Returns:
+        (counts with added/updated/unchanged, set of ids seen)
+    """
+    counts = {"added": 0, "updated": 0, "unchanged": 0}
+    seen: Set[str] = set()
+    pending = None
+    
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-writer") as writer:
+        for chunk in chunked(records, chunk_size):
+            docs, metas, ids = [], [], []
+            for record in chunk:
+                doc, meta, doc_id = prepare(record)
+                seen.add(doc_id)
+                meta = dict(meta, content_hash=content_hash(doc, meta))
+                if doc_id not in stored_hashes:
+                    counts["added"] += 1
+                elif stored_hashes[doc_id] != meta["content_hash"]:
+                    counts["updated"] += 1
+                else:
+                    counts["unchanged"] += 1
+                    continue
+                docs.append(doc)
+                metas.append(meta)
+                ids.append(doc_id)
+            if not ids:
+                continue
+            
+            # Encode this chunk while the previous one is still being written
+            embeddings = encoder.encode(docs)
+            if pending is not None:
+                pending.result()
+            pending = writer.submit(collection.upsert, documents=docs, embeddings=embeddings,
+                                    metadatas=metas, ids=ids)
+        if pending is not None:
+            pending.result()
+    
+    return counts, seen
@@ -273,7 +273,7 @@ if "results" in st.session_state:
     # Course recommendations
     st.header("📚 Your Personalized Course Recommendations")
     
-    for i, rec in enumerate(results["recommendations"][:5], 1):
+    for i, rec in enumerate(results["recommendations"].get("courses", [])[:5], 1):
         majors_list = ", ".join(rec.get('applicable_majors', [])) if rec.get('applicable_majors') else "Multiple programs"
         
         score = rec.get('versatility_score', 0)
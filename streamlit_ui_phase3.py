@@ -7,7 +7,7 @@ import streamlit as st
 import time
 
 # Import Phase 2 & 3 systems
-from agentic_chatbot_phase2 import Phase2AgenticCourseAdvisor, StudentProfile
+from agentic_chatbot_phase2 import Phase2AgenticCourseAdvisor, StudentProfile, course_label, program_label
 from chat_agent import ChatAgent
 
 PHASE3_AVAILABLE = True
@@ -152,7 +152,10 @@ st.markdown("""
 if "advisor" not in st.session_state:
     st.session_state.advisor = Phase2AgenticCourseAdvisor()
 if "chat_agent" not in st.session_state and PHASE3_AVAILABLE:
-    st.session_state.chat_agent = ChatAgent()
+    st.session_state.chat_agent = ChatAgent(prereq_graph=st.session_state.advisor.prereq_graph,
+                                            degree_audit=st.session_state.advisor.degree_audit,
+                                            program_similarity=st.session_state.advisor.program_similarity,
+                                            course_neighbors=st.session_state.advisor.course_neighbors)
 if "show_workflow" not in st.session_state:
     st.session_state.show_workflow = False  # Default off for chat mode
 if "chat_mode" not in st.session_state:
@@ -192,6 +195,12 @@ with st.sidebar:
         placeholder="e.g., tech consulting, data science..."
     )
     
+    completed = st.text_input(
+        "Courses already completed (optional)",
+        placeholder="e.g., MATH 112, CS 111",
+        help="Separate with commas"
+    )
+    
     st.divider()
     
     # Mode selection
@@ -216,7 +225,8 @@ with st.sidebar:
             profile = StudentProfile(
                 interests=interests,
                 considering_majors=major_list,
-                career_goals=career_goals
+                career_goals=career_goals,
+                completed_courses=[c.strip() for c in completed.split(",") if c.strip()]
             )
             
             with st.spinner("🤖 Multi-agent system working..."):
@@ -227,11 +237,12 @@ with st.sidebar:
             # Initialize chat with context if in chat mode
             if PHASE3_AVAILABLE and st.session_state.chat_mode:
                 st.session_state.chat_agent.update_context(
-                    results["recommendations"],
+                    results["recommendations"].get("courses", []),
                     {
                         "interests": interests,
                         "considering_majors": major_list,
-                        "career_goals": career_goals
+                        "career_goals": career_goals,
+                        "completed_courses": profile.completed_courses
                     }
                 )
             
@@ -395,7 +406,7 @@ if "results" in st.session_state:
         for i, program in enumerate(recs["programs"][:3], 1):
             st.markdown(f"""
             <div class="course-card">
-                <div class="course-title">{i}. {program}</div>
+                <div class="course-title">{i}. {program_label(program)}</div>
             </div>
             """, unsafe_allow_html=True)
         st.divider()
@@ -406,9 +417,12 @@ if "results" in st.session_state:
         for i, course in enumerate(recs["courses"][:5], 1):
             st.markdown(f"""
             <div class="course-card">
-                <div class="course-title">{i}. {course}</div>
+                <div class="course-title">{i}. {course_label(course)}</div>
             </div>
             """, unsafe_allow_html=True)
+            related = st.session_state.advisor.related_courses(course["course_id"], top_k=3)
+            if related:
+                st.caption("Related: " + ", ".join(c["course_name"] for c in related))
     
     # Display overlap courses if any
     if recs.get("overlap_courses"):
@@ -418,10 +432,34 @@ if "results" in st.session_state:
         for i, course in enumerate(recs["overlap_courses"][:3], 1):
             st.markdown(f"""
             <div class="course-card">
-                <div class="course-title">{i}. {course}</div>
+                <div class="course-title">{i}. {course_label(course)}</div>
             </div>
             """, unsafe_allow_html=True)
     
+    # Display the optimized semester set
+    semester_plan = recs.get("semester_plan")
+    if semester_plan and semester_plan.get("courses"):
+        st.divider()
+        st.subheader("🧮 Suggested Semester")
+        st.caption(f"{semester_plan['credits']:g} credits covering the most requirements across your majors")
+        st.markdown(", ".join(semester_plan["course_names"]))
+        coverage = ", ".join(f"{name}: {count}" for name, count in semester_plan["coverage"].items())
+        if coverage:
+            st.caption(f"Required courses covered — {coverage}")
+    
+    roadmap = recs.get("roadmap")
+    if roadmap and roadmap.get("semesters"):
+        st.divider()
+        st.subheader("🗓️ Roadmap")
+        columns = st.columns(len(roadmap["semesters"]))
+        for column, semester in zip(columns, roadmap["semesters"]):
+            with column:
+                st.markdown(f"**Semester {semester['semester']}** ({semester['credits']:g} cr)")
+                for name in semester["course_names"]:
+                    st.markdown(f"- {name}")
+        if roadmap["unscheduled"]:
+            st.caption(f"Still to schedule later: {', '.join(roadmap['unscheduled'])}")
+    
     # Explanation (if not in chat mode)
     if not st.session_state.chat_mode:
         st.header("💡 Why These Courses?")
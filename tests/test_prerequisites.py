@@ -0,0 +1,52 @@
+from prerequisites import PrerequisiteGraph, parse_prerequisites, parse_requirements
+
+MATH_CHAIN = [
+    {"course_id": "MATH112", "course_name": "MATH 112", "prerequisites": ""},
+    {"course_id": "MATH113", "course_name": "MATH 113", "prerequisites": "MATH 112"},
+    {"course_id": "MATH314", "course_name": "MATH 314", "prerequisites": "MATH 113"},
+]
+
+
+def test_prerequisites_of_completed_courses_count_as_satisfied():
+    graph = PrerequisiteGraph(MATH_CHAIN)
+    assert graph.missing_prerequisites("MATH 314", ["MATH 113"]) == []
+    assert graph.prereq_status("MATH 314", ["MATH 113"]) == "Prerequisites completed"
+    assert graph.can_take("MATH 314", ["MATH 113"])
+
+
+def test_missing_prerequisites_in_the_order_to_take_them():
+    graph = PrerequisiteGraph(MATH_CHAIN)
+    assert graph.missing_prerequisites("MATH 314") == ["MATH112", "MATH113"]
+    assert graph.missing_prerequisites("MATH 314", ["MATH 112"]) == ["MATH113"]
+
+
+def test_or_groups_are_alternatives_not_hard_prerequisites():
+    assert parse_prerequisites("MATH 112 or MATH 110") == []
+    assert parse_requirements("MATH 112 or MATH 110, STAT 121") == [
+        [("MATH112", False), ("MATH110", False)], [("STAT121", False)]]
+    
+    graph = PrerequisiteGraph([
+        {"course_id": "MATH110", "prerequisites": ""},
+        {"course_id": "MATH112", "prerequisites": ""},
+        {"course_id": "STAT121", "prerequisites": ""},
+        {"course_id": "STAT201", "prerequisites": "MATH 112 or MATH 110, STAT 121"},
+    ])
+    assert graph.missing_prerequisites("STAT 201") == ["STAT121"]
+    assert not graph.can_take("STAT 201", ["STAT 121"])
+    assert graph.can_take("STAT 201", ["STAT 121", "MATH 110"])
+    assert "take one of" in graph.prereq_status("STAT 201", ["STAT 121"])
+    assert graph.prereq_status("STAT 201", ["STAT 121", "MATH 112"]) == "Prerequisites completed"
+
+
+def test_blocked_mask_matches_can_take():
+    graph = PrerequisiteGraph([
+        {"course_id": "MATH110", "prerequisites": ""},
+        {"course_id": "MATH112", "prerequisites": ""},
+        {"course_id": "MATH113", "prerequisites": "MATH 112"},
+        {"course_id": "MATH314", "prerequisites": "MATH 113"},
+        {"course_id": "STAT201", "prerequisites": "MATH 112 or MATH 110"},
+    ])
+    for completed in ([], ["MATH 110"], ["MATH 113"], ["MATH 314"]):
+        blocked = graph.blocked_mask(graph.satisfied_mask(completed))
+        expected = {cid for cid in graph.course_ids if not graph.can_take(cid, completed)}
+        assert set(graph.ids_of(blocked)) == expected
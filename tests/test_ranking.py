@@ -0,0 +1,30 @@
+from ranking import RankingEngine, majors_in_text, resolve_majors
+
+NAMES = ["Computer Science (BS)", "Mathematics (BS)", "Mathematics (BS) - Applied & Computational",
+         "Statistics (BS) - Applied Statistics & Analytics", "Applied Physics (BS)"]
+
+
+def test_resolve_majors_expands_abbreviations():
+    assert resolve_majors(["CS"], NAMES) == [0]
+    assert resolve_majors(["Stats", "Mathematics"], NAMES) == [1, 3]
+
+
+def test_resolve_majors_prefers_the_closest_whole_word_match():
+    assert resolve_majors(["Math"], NAMES) == [1]
+    assert resolve_majors(["applied math"], NAMES) == [2]
+
+
+def test_majors_in_text_finds_one_program_per_mention():
+    assert majors_in_text("switch from Mathematics to Finance", NAMES + ["Finance (BS)"]) == [1, 5]
+
+
+def test_rank_batch_breaks_ties_at_the_cutoff_by_candidate_order():
+    programs = [{"program_name": "Math (BS)", "required_classes": []}]
+    classes = [{"course_id": f"C{i}", "credit_hours": 3, "applies_to_programs": []} for i in range(40)]
+    engine = RankingEngine(programs, classes)
+    ids = [c["course_id"] for c in classes]
+    # Every score ties except the last candidate's
+    relevance = [0.5] * 39 + [0.9]
+    for k in (1, 3, 10):
+        top = engine.rank(ids, [], relevance, top_k=k)
+        assert [cid for cid, _ in top] == ["C39"] + ids[:k - 1]
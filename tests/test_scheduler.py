@@ -0,0 +1,61 @@
+import random
+
+from prerequisites import parse_prerequisites
+from scheduler import SemesterScheduler
+
+MATH_CHAIN = [
+    {"course_id": "MATH112", "prerequisites": ""},
+    {"course_id": "MATH113", "prerequisites": "MATH 112"},
+    {"course_id": "MATH314", "prerequisites": "MATH 113"},
+]
+
+
+def layered_catalog(seed=7):
+    """80 courses in four levels, each above the first requiring one or two from the level below."""
+    rng = random.Random(seed)
+    classes = []
+    for level in range(4):
+        for n in range(20):
+            cid = f"SYN{(level + 1) * 100 + n}"
+            prereqs = []
+            if level:
+                prereqs = [f"SYN {level * 100 + rng.randrange(20)}" for _ in range(rng.randint(1, 2))]
+            classes.append({"course_id": cid, "course_name": cid, "credit_hours": 3.0,
+                            "prerequisites": ", ".join(prereqs)})
+    programs = [{"program_name": f"Program {p} (BS)",
+                 "required_classes": rng.sample([c["course_id"] for c in classes], 30)}
+                for p in range(3)]
+    return programs, classes
+
+
+def test_roadmap_respects_prerequisites_and_credit_cap():
+    programs, classes = layered_catalog()
+    prerequisites = {c["course_id"]: [cid for cid, _ in parse_prerequisites(c["prerequisites"])]
+                     for c in classes}
+    result = SemesterScheduler(programs, classes).plan(
+        ["Program 0", "Program 1", "Program 2"], credit_cap=15, n_semesters=8)
+    
+    assert result["required_total"] > 60
+    taken = set()
+    for semester in result["semesters"]:
+        assert semester["credits"] <= 15
+        for cid in semester["courses"]:
+            assert set(prerequisites[cid]) <= taken, cid
+        taken.update(semester["courses"])
+
+
+def test_prerequisites_of_completed_courses_are_not_rescheduled():
+    scheduler = SemesterScheduler([{"program_name": "Math (BS)", "required_classes": ["MATH112", "MATH314"]}],
+                                  MATH_CHAIN)
+    result = scheduler.plan(["Math"], credit_cap=15, completed=["MATH 113"])
+    assert result["unscheduled"] == [] and result["required_total"] == 1
+
+
+def test_cached_plans_do_not_share_lists_with_callers():
+    scheduler = SemesterScheduler([{"program_name": "Math (BS)", "required_classes": ["MATH112", "MATH314"]}],
+                                  MATH_CHAIN)
+    first = scheduler.plan(["Math"], credit_cap=15, completed=["MATH 113"])
+    first["semesters"][0]["courses"].append("MUTATED")
+    again = scheduler.plan(["Math"], credit_cap=15, completed=["MATH 113"])
+    assert again["method"] == "beam (cached)"
+    assert "MUTATED" not in again["semesters"][0]["courses"]
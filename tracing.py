@@ -0,0 +1,258 @@
+"""
+Tracing - Per-agent timing, memory and call counts for each request.
+
+A Tracer holds a tree of Spans for one request. Each span records:
+  • wall_ms    - elapsed wall-clock time
+  • cpu_ms     - CPU time of the thread that ran the span (work handed to
+                 thread pools shows up as wall time only)
+  • alloc_kb   - net memory allocated, when tracemalloc is tracing. This is
+                 process-wide: it includes other threads' allocations, so it
+                 is only attributable to a span when nothing else runs at the
+                 same time. The advisor runs its stages one at a time while
+                 memory is traced; a request that overlapped another traced
+                 request gets memory_overlapped=True on its root span.
+  • counters   - encoder calls, database queries, LLM calls and tokens, ...
+                 A span's counters include those of its children.
+
+Code anywhere below an open span calls `count("db_queries")`; the value
+lands on the innermost open span of the current thread or asyncio task
+(and is a no-op when nothing is being traced). Finished traces can be
+appended to a JSONL file, one request per line.
+
+tracemalloc is started by the first Tracer that records memory and
+stopped when the last such Tracer finishes (unless the application had
+started it itself).
+"""
+
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    from config import TRACE_FILE
+except ImportError:
+    TRACE_FILE = None  # e.g. "traces.jsonl" to keep every request's trace
+
+try:
+    from config import TRACE_MEMORY
+except ImportError:
+    TRACE_MEMORY = False  # tracemalloc slows allocation-heavy code noticeably
+
+# Innermost open span of the current thread / task
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+_export_lock = threading.Lock()
+# Guards every span's counters: sibling spans may finish concurrently (stages
+# run in parallel), and SearchAgent's query threads count on a shared open span
+_rollup_lock = threading.Lock()
+
+# Open Tracers recording memory; tracemalloc runs while there are any
+_memory_lock = threading.Lock()
+_memory_tracers: List["Tracer"] = []
+_memory_started = False   # tracemalloc was started here, so it is stopped here
+
+
+def _start_memory(tracer: "Tracer"):
+    global _memory_started
+    with _memory_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _memory_started = True
+        if _memory_tracers:
+            # Their memory figures and this one's now include each other's allocations
+            tracer.memory_overlapped = True
+            for other in _memory_tracers:
+                other.memory_overlapped = True
+        _memory_tracers.append(tracer)
+
+
+def _stop_memory(tracer: "Tracer"):
+    global _memory_started
+    with _memory_lock:
+        if tracer not in _memory_tracers:
+            return
+        _memory_tracers.remove(tracer)
+        if not _memory_tracers and _memory_started:
+            tracemalloc.stop()
+            _memory_started = False
+
+
+class Span:
+    """One timed unit of work, with nested child spans."""
+    __slots__ = ("name", "attributes", "status", "start_time", "wall_ms", "cpu_ms",
+                 "alloc_kb", "counters", "children", "parent", "_t0", "_cpu0", "_mem0", "_token")
+    
+    def __init__(self, name: str, parent: Optional["Span"] = None, **attributes):
+        self.name = name
+        self.attributes = attributes
+        self.status = "running"
+        self.start_time = time.time()
+        self.wall_ms: Optional[float] = None
+        self.cpu_ms: Optional[float] = None
+        self.alloc_kb: Optional[float] = None
+        self.counters: Dict[str, float] = {}
+        self.children: List["Span"] = []
+        self.parent = parent
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.thread_time()
+        self._mem0 = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        self._token = None
+    
+    def finish(self, status: str = "complete"):
+        """Stop the clocks and roll counters up into the parent span."""
+        if self.wall_ms is not None:
+            return
+        self.wall_ms = round((time.perf_counter() - self._t0) * 1000, 3)
+        self.cpu_ms = round((time.thread_time() - self._cpu0) * 1000, 3)
+        if self._mem0 is not None and tracemalloc.is_tracing():
+            self.alloc_kb = round((tracemalloc.get_traced_memory()[0] - self._mem0) / 1024, 1)
+        self.status = status
+        if self.parent is not None:
+            with _rollup_lock:
+                for key, value in self.counters.items():
+                    self.parent.counters[key] = self.parent.counters.get(key, 0) + value
+    
+    def metrics(self) -> Dict:
+        """Flat timing/memory/counter summary (no children)."""
+        return {
+            "wall_ms": self.wall_ms,
+            "cpu_ms": self.cpu_ms,
+            "alloc_kb": self.alloc_kb,
+            "counters": self.counter_values()
+        }
+    
+    def counter_values(self) -> Dict[str, float]:
+        """A consistent copy of the counters."""
+        with _rollup_lock:
+            return dict(self.counters)
+    
+    def to_dict(self) -> Dict:
+        """JSON-serializable span tree."""
+        span = {"name": self.name, "status": self.status, "start_time": round(self.start_time, 6)}
+        span.update(self.metrics())
+        if self.attributes:
+            span["attributes"] = self.attributes
+        span["children"] = [child.to_dict() for child in self.children]
+        return span
+
+
+class Tracer:
+    """
+    Span tree for a single request.
+    
+    Spans can be opened with the `span()` context manager or, where start
+    and end happen in different places (AgentOrchestrator status updates),
+    with start_span() / end_span().
+    """
+    
+    def __init__(self, name: str, memory: bool = TRACE_MEMORY, **attributes):
+        """
+        Args:
+            name: Name of the root span (e.g. "get_recommendations")
+            memory: Record allocated memory per span (tracemalloc runs until
+                    the last Tracer recording memory finishes)
+            attributes: Extra fields stored on the root span
+        """
+        self.memory = memory
+        self.memory_overlapped = False
+        if memory:
+            _start_memory(self)
+        self.root = Span(name, **attributes)
+        self.root._token = _current_span.set(self.root)
+        self._open: Dict[str, Span] = {}
+    
+    def start_span(self, name: str, **attributes) -> Span:
+        """Open a child of the innermost open span and make it current."""
+        parent = _current_span.get() or self.root
+        span = Span(name, parent=parent, **attributes)
+        parent.children.append(span)
+        span._token = _current_span.set(span)
+        self._open[name] = span
+        return span
+    
+    def end_span(self, name: str, status: str = "complete", **attributes) -> Span:
+        """
+        Close the open span called `name`. A span that was never started is
+        recorded as an instant span (e.g. a stage served from a cache).
+        """
+        span = self._open.pop(name, None)
+        if span is None:
+            span = self.start_span(name)
+            self._open.pop(name, None)
+        span.attributes.update(attributes)
+        span.finish(status)
+        self._reset(span)
+        return span
+    
+    @staticmethod
+    def _reset(span: Span):
+        if span._token is not None:
+            try:
+                _current_span.reset(span._token)
+            except ValueError:
+                # Closed from another context; fall back to its parent
+                _current_span.set(span.parent)
+            span._token = None
+    
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time the enclosed block as a child span."""
+        span = self.start_span(name, **attributes)
+        try:
+            yield span
+        except BaseException:
+            self._open.pop(name, None)
+            span.finish("error")
+            self._reset(span)
+            raise
+        self.end_span(name)
+    
+    def finish(self, status: str = "complete") -> Dict:
+        """Close any spans still open, then the root; returns the trace as a dict."""
+        for name in list(self._open)[::-1]:
+            self.end_span(name, status="error" if status != "complete" else "abandoned")
+        self.root.finish(status)
+        self._reset(self.root)
+        if self.memory:
+            _stop_memory(self)
+            if self.memory_overlapped:
+                self.root.attributes["memory_overlapped"] = True
+        return self.root.to_dict()
+    
+    def export(self, path: Optional[str] = None):
+        """Append the finished trace to a JSONL file (default: TRACE_FILE)."""
+        path = path or TRACE_FILE
+        if not path:
+            return
+        line = json.dumps(self.root.to_dict(), default=str)
+        with _export_lock:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'a') as f:
+                f.write(line + "\n")
+
+
+def current_span() -> Optional[Span]:
+    """Innermost open span of the current thread / task, if any."""
+    return _current_span.get()
+
+
+def count(key: str, value: float = 1):
+    """Add to a counter on the innermost open span (no-op when not tracing)."""
+    span = _current_span.get()
+    if span is not None:
+        with _rollup_lock:
+            span.counters[key] = span.counters.get(key, 0) + value
+
+
+def record_llm_usage(response):
+    """Count one LLM call and its token usage (OpenAI-style response.usage)."""
+    count("llm_calls")
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        count("llm_prompt_tokens", getattr(usage, "prompt_tokens", 0) or 0)
+        count("llm_completion_tokens", getattr(usage, "completion_tokens", 0) or 0)
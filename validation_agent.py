@@ -7,6 +7,8 @@ This agent reviews recommendations for quality and catches potential issues.
 from typing import List, Dict, Optional
 import re
 
+from tracing import TRACE_MEMORY, Tracer
+
 
 class ValidationAgent:
     """
@@ -19,7 +21,13 @@ class ValidationAgent:
     - Course selections make sense together
     """
     
-    def __init__(self):
+    def __init__(self, prereq_graph=None):
+        """
+        Args:
+            prereq_graph: Optional PrerequisiteGraph; when given, prerequisites are
+                checked against the student's completed courses
+        """
+        self.prereq_graph = prereq_graph
         self.validation_rules = {
             "prerequisite_check": self._check_prerequisites,
             "goal_alignment": self._check_goal_alignment,
@@ -100,9 +108,17 @@ class ValidationAgent:
             }
         
         issues = []
+        completed = profile.get('completed_courses') or []
         
         for rec in recommendations[:5]:
             if isinstance(rec, dict):
+                if self.prereq_graph is not None and rec.get('course_id'):
+                    # Exact check against the prerequisite DAG
+                    missing = self.prereq_graph.missing_prerequisites(rec['course_id'], completed)
+                    if missing:
+                        issues.append(f"{rec.get('course_name', 'Unknown')} needs {', '.join(missing)} first")
+                    continue
+                
                 prereq_status = rec.get('prereq_status', '')
                 
                 # Flag if too many courses require prerequisites
@@ -138,7 +154,10 @@ class ValidationAgent:
                 "message": "Course data format simplified - check skipped"
             }
         
-        student_interests = profile.get('interests', '').lower()
+        interests = profile.get('interests', '')
+        if isinstance(interests, list):
+            interests = ' '.join(interests)
+        student_interests = interests.lower()
         majors = [m.lower() for m in profile.get('considering_majors', [])]
         
         aligned_count = 0
@@ -315,9 +334,19 @@ class ValidationAgent:
 class AgentOrchestrator:
     """
     Meta-agent that coordinates all other agents and tracks their progress.
+    
+    Between start_trace() and finish_trace(), every "running" → "complete"
+    status pair is also a trace span, so each agent's status carries its
+    measured wall time, CPU time, memory delta and call counters.
     """
     
-    def __init__(self):
+    def __init__(self, trace_memory: bool = TRACE_MEMORY):
+        """
+        Args:
+            trace_memory: Record allocated memory per agent (uses tracemalloc)
+        """
+        self.trace_memory = trace_memory
+        self.tracer: Optional[Tracer] = None
         self.agent_status = {}
         self.workflow_steps = [
             {"name": "Planning", "emoji": "🤖", "status": "pending"},
@@ -334,7 +363,7 @@ class AgentOrchestrator:
         
         Args:
             agent_name: Name of the agent
-            status: 'pending', 'running', 'complete', 'error'
+            status: 'pending', 'running', 'complete', 'error', 'cancelled'
             confidence: Optional confidence score (0-100)
             details: Optional details about what the agent found/did
         """
@@ -344,6 +373,15 @@ class AgentOrchestrator:
             "details": details
         }
         
+        # Measured cost of the agent, when a trace is active
+        metrics = None
+        if self.tracer is not None:
+            if status == "running":
+                self.tracer.start_span(agent_name)
+            elif status in ("complete", "error"):
+                metrics = self.tracer.end_span(agent_name, status=status).metrics()
+                self.agent_status[agent_name].update(metrics)
+        
         # Update workflow steps
         for step in self.workflow_steps:
             if step["name"].lower() in agent_name.lower():
@@ -352,8 +390,27 @@ class AgentOrchestrator:
                     step["confidence"] = str(confidence)  # type: ignore
                 if details:
                     step["details"] = details
+                if metrics:
+                    step.update(metrics)
                 break
     
+    def start_trace(self, name: str, **attributes) -> Tracer:
+        """Begin tracing a request; agents' status updates become its spans."""
+        self.tracer = Tracer(name, memory=self.trace_memory, **attributes)
+        return self.tracer
+    
+    def finish_trace(self, status: str = "complete") -> Optional[Dict]:
+        """
+        End the current trace, append it to TRACE_FILE (if configured) and
+        return it as a nested dict of spans.
+        """
+        if self.tracer is None:
+            return None
+        trace = self.tracer.finish(status)
+        self.tracer.export()
+        self.tracer = None
+        return trace
+    
     def get_workflow_progress(self) -> List[Dict]:
         """Get current progress of all agents."""
         return self.workflow_steps
@@ -368,5 +425,7 @@ class AgentOrchestrator:
             "total": total,
             "progress_percent": int((completed / total) * 100),
             "current_step": next((s["name"] for s in self.workflow_steps 
-                                 if s["status"] == "running"), None)
+                                 if s["status"] == "running"), None),
+            # Measured wall time per agent (present once traced)
+            "agent_ms": {s["name"]: s["wall_ms"] for s in self.workflow_steps if "wall_ms" in s}
         }
@@ -0,0 +1,365 @@
+"""
+Workflow - Per-request state and dependency-graph execution for the advisor.
+
+Agents hold only read-only, shared resources (catalog, indexes, clients);
+everything one request produces lives on its WorkflowContext:
+
+  • profile, plan, candidates, recommendations, explanation, validation,
+    semester_plan, roadmap
+  • status  - an AgentOrchestrator with this request's agent status and trace
+  • progress - the workflow events shown by the UIs
+
+A new context is created for every get_recommendations call, so one
+advisor can serve many requests at once from threads or asyncio tasks
+without their progress or results mixing.
+
+The pipeline itself is a list of Stages, each naming the stages it needs.
+run_stages() starts every stage as soon as its dependencies finish, so
+independent stages (explanation, validation, optimizer, scheduler) overlap.
+A failed stage or ctx.cancel() stops everything not yet started - their
+results would be thrown away - and raises. arun_stages() is the asyncio
+counterpart: stages with a coroutine run as tasks on the event loop, the
+rest on an executor, and cancellation also interrupts in-flight awaits.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import queue
+import threading
+from concurrent.futures import Executor
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+from tracing import TRACE_MEMORY
+from validation_agent import AgentOrchestrator
+
+_request_ids = itertools.count(1)
+
+
+class WorkflowCancelled(Exception):
+    """The request was cancelled before every stage finished."""
+
+
+class WorkflowContext:
+    """Everything one advisor request reads and writes while it runs."""
+    
+    def __init__(self, profile, trace_memory: bool = TRACE_MEMORY,
+                 request_id: Optional[str] = None):
+        """
+        Args:
+            profile: StudentProfile the request is for
+            trace_memory: Record allocated memory per agent (default: TRACE_MEMORY)
+            request_id: Label for logs and traces (default: a process-wide counter)
+        """
+        self.profile = profile
+        self.request_id = request_id or f"req-{next(_request_ids)}"
+        self.status = AgentOrchestrator(trace_memory=trace_memory)
+        self.progress: List[Dict] = []
+        
+        self.plan: Optional[Dict] = None
+        self.candidates: Optional[Dict] = None
+        self.recommendations: Optional[Dict] = None
+        self.semester_plan: Optional[Dict] = None
+        self.roadmap: Optional[Dict] = None
+        self.explanation: Optional[str] = None
+        self.validation: Optional[Dict] = None
+        self.trace: Optional[Dict] = None
+        
+        self.cancel_reason: Optional[str] = None
+        self._cancelled = threading.Event()
+        # Wakes run_stages when a stage finishes or the request is cancelled
+        self._events: "queue.Queue[Optional[str]]" = queue.Queue()
+        # Called on cancel() (arun_stages wakes its event loop through these)
+        self._cancel_callbacks: List[Callable[[], None]] = []
+    
+    @property
+    def tracer(self):
+        """The active Tracer (None outside start_trace/finish_trace)."""
+        return self.status.tracer
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+    
+    def cancel(self, reason: str = "cancelled"):
+        """
+        Stop the request: stages that have not started are skipped and
+        get_recommendations raises WorkflowCancelled. Safe from any thread.
+        """
+        if not self._cancelled.is_set():
+            self.cancel_reason = reason
+            self._cancelled.set()
+            self._events.put(None)
+            for callback in list(self._cancel_callbacks):
+                callback()
+    
+    def start_trace(self, name: str, **attributes):
+        """Begin tracing this request (see AgentOrchestrator.start_trace)."""
+        return self.status.start_trace(name, request_id=self.request_id, **attributes)
+    
+    def finish_trace(self, status: str = "complete") -> Optional[Dict]:
+        """End the trace, keep it on the context and return it."""
+        self.trace = self.status.finish_trace(status)
+        return self.trace
+    
+    def begin(self, agent: str, message: str):
+        """Mark an agent as running."""
+        self.status.update_agent_status(agent, "running")
+        self.progress.append({
+            "agent": agent,
+            "status": "running",
+            "message": message
+        })
+    
+    def complete(self, agent: str, confidence: int, message: str,
+                 details: Optional[str] = None):
+        """
+        Mark an agent as complete.
+        
+        Args:
+            agent: Agent name ("Planning", "Search", ...)
+            confidence: Agent confidence (0-100)
+            message: Short progress message for the UI
+            details: Longer status details (default: message)
+        """
+        self.status.update_agent_status(agent, "complete", confidence=confidence,
+                                        details=details or message)
+        self.progress.append({
+            "agent": agent,
+            "status": "complete",
+            "confidence": confidence,
+            "message": message
+        })
+    
+    def skip(self, agent: str, status: str, message: str):
+        """Record an agent that did not run to completion ('error' or 'cancelled')."""
+        self.status.update_agent_status(agent, status, details=message)
+        self.progress.append({
+            "agent": agent,
+            "status": status,
+            "message": message
+        })
+    
+    def summary(self) -> Dict:
+        """Overall progress of this request."""
+        return self.status.get_overall_status()
+
+
+class Stage:
+    """One node of the workflow graph."""
+    
+    def __init__(self, name: str, run: Callable[[WorkflowContext], None],
+                 after: Sequence[str] = (), agent: bool = True,
+                 arun: Optional[Callable[[WorkflowContext], Awaitable[None]]] = None):
+        """
+        Args:
+            name: Stage name (the agent name for agent stages)
+            run: Called with the WorkflowContext; stores its output there
+            after: Names of the stages whose output it reads
+            agent: Reports status through ctx.begin/complete (vs. a trace span only)
+            arun: Coroutine version of `run` for arun_stages (I/O-bound stages);
+                  without one, arun_stages runs `run` on its executor
+        """
+        self.name = name
+        self.run = run
+        self.after = tuple(after)
+        self.agent = agent
+        self.arun = arun
+    
+    def __repr__(self) -> str:
+        return f"Stage({self.name!r}, after={list(self.after)})"
+
+
+def check_order(stages: Sequence[Stage]):
+    """
+    Stages must be listed in dependency order (that is also the sequential
+    execution order), which rules out cycles and unknown names.
+    """
+    seen = set()
+    for stage in stages:
+        if stage.name in seen:
+            raise ValueError(f"Duplicate stage {stage.name!r}")
+        missing = [name for name in stage.after if name not in seen]
+        if missing:
+            raise ValueError(f"Stage {stage.name!r} depends on {missing}, "
+                             f"which are not listed before it")
+        seen.add(stage.name)
+
+
+def _run_stage(ctx: WorkflowContext, stage: Stage):
+    """Run one stage, unless the request has been cancelled meanwhile."""
+    if ctx.cancelled:
+        return
+    try:
+        stage.run(ctx)
+    except Exception as e:
+        if stage.agent:
+            ctx.skip(stage.name, "error", str(e))
+        raise
+
+
+async def _arun_stage(ctx: WorkflowContext, stage: Stage):
+    """Await one stage's coroutine, unless the request has been cancelled meanwhile."""
+    if ctx.cancelled:
+        return
+    try:
+        await stage.arun(ctx)
+    except Exception as e:
+        if stage.agent:
+            ctx.skip(stage.name, "error", str(e))
+        raise
+
+
+def _skip_pending(ctx: WorkflowContext, stages: Sequence[Stage], reason: Optional[str]):
+    for stage in stages:
+        if stage.agent:
+            ctx.skip(stage.name, "cancelled", reason or "cancelled")
+
+
+def run_stages(ctx: WorkflowContext, stages: Sequence[Stage],
+               executor: Optional[Executor] = None):
+    """
+    Execute a stage graph for one request.
+    
+    With an executor, each stage is submitted the moment its last
+    dependency finishes; the calling thread only waits. Without one, the
+    stages run one after another in list order. Every stage runs in a copy
+    of the caller's context, so trace spans and counters land on this
+    request's trace.
+    
+    Raises:
+        WorkflowCancelled: ctx.cancel() was called before the graph finished
+        Exception: the first stage error (nothing else is started after it)
+    """
+    check_order(stages)
+    
+    if executor is None:
+        for i, stage in enumerate(stages):
+            if ctx.cancelled:
+                _skip_pending(ctx, stages[i:], ctx.cancel_reason)
+                raise WorkflowCancelled(ctx.cancel_reason)
+            _run_stage(ctx, stage)
+        return
+    
+    by_name = {stage.name: stage for stage in stages}
+    waiting = {stage.name: set(stage.after) for stage in stages}
+    dependents: Dict[str, List[str]] = {stage.name: [] for stage in stages}
+    for stage in stages:
+        for name in stage.after:
+            dependents[name].append(stage.name)
+    running = {}
+    
+    def launch(names: List[str]):
+        for name in names:
+            del waiting[name]
+            future = executor.submit(contextvars.copy_context().run, _run_stage, ctx, by_name[name])
+            future.add_done_callback(lambda f, name=name: ctx._events.put(name))
+            running[name] = future
+    
+    try:
+        launch([name for name, deps in waiting.items() if not deps])
+        while running:
+            name = ctx._events.get()
+            if name is None or ctx.cancelled:
+                raise WorkflowCancelled(ctx.cancel_reason)
+            future = running.pop(name, None)
+            if future is None:
+                continue
+            error = future.exception()
+            if error is not None:
+                raise error
+            for dependent in dependents[name]:
+                waiting[dependent].discard(name)
+            launch([d for d in dependents[name] if not waiting[d]])
+    except BaseException as e:
+        # Nothing still pending would be used: unstarted stages never start,
+        # running ones (e.g. an LLM call in flight) finish unobserved
+        ctx.cancel(ctx.cancel_reason or f"{type(e).__name__} in workflow")
+        for future in running.values():
+            future.cancel()
+        _skip_pending(ctx, [by_name[name] for name in list(running) + list(waiting)], ctx.cancel_reason)
+        raise
+
+
+async def arun_stages(ctx: WorkflowContext, stages: Sequence[Stage],
+                      executor: Optional[Executor] = None, sequential: bool = False):
+    """
+    asyncio version of run_stages.
+    
+    Stages with `arun` become tasks on the running loop; the others run
+    `run` on `executor` (None: the loop's default executor), each in a copy
+    of the caller's context. Nothing blocks the loop, so one loop can drive
+    many requests at once. ctx.cancel() (from any thread), a stage error or
+    cancelling the awaiting task cancels every stage still pending,
+    including awaits in flight such as an LLM call. With `sequential`,
+    stages run one at a time in list order, like run_stages without an
+    executor.
+    
+    Raises:
+        WorkflowCancelled: ctx.cancel() was called before the graph finished
+        Exception: the first stage error
+    """
+    check_order(stages)
+    loop = asyncio.get_running_loop()
+    
+    by_name = {stage.name: stage for stage in stages}
+    waiting = {stage.name: set(stage.after) for stage in stages}
+    dependents: Dict[str, List[str]] = {stage.name: [] for stage in stages}
+    for stage in stages:
+        for name in stage.after:
+            dependents[name].append(stage.name)
+    running: Dict[asyncio.Future, str] = {}
+    
+    cancelled = asyncio.Event()
+    
+    def wake():
+        loop.call_soon_threadsafe(cancelled.set)
+    
+    ctx._cancel_callbacks.append(wake)
+    if ctx.cancelled:
+        cancelled.set()
+    watcher = asyncio.ensure_future(cancelled.wait())
+    
+    def launch(names: List[str]):
+        for name in names:
+            del waiting[name]
+            stage = by_name[name]
+            if stage.arun is not None:
+                future = asyncio.ensure_future(_arun_stage(ctx, stage))
+            else:
+                future = loop.run_in_executor(executor, contextvars.copy_context().run,
+                                              _run_stage, ctx, stage)
+            running[future] = name
+    
+    def next_stages(finished: Optional[str]) -> List[str]:
+        if sequential:
+            return list(waiting)[:1] if not running else []
+        if finished is None:
+            return [name for name, deps in waiting.items() if not deps]
+        return [d for d in dependents[finished] if not waiting[d]]
+    
+    try:
+        launch(next_stages(None))
+        while running:
+            done, _ = await asyncio.wait(set(running) | {watcher},
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if watcher in done or ctx.cancelled:
+                raise WorkflowCancelled(ctx.cancel_reason)
+            for future in done:
+                name = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    raise error
+                for dependent in dependents[name]:
+                    waiting[dependent].discard(name)
+                launch(next_stages(name))
+    except BaseException as e:
+        ctx.cancel(ctx.cancel_reason or f"{type(e).__name__} in workflow")
+        for future in running:
+            future.cancel()
+        _skip_pending(ctx, [by_name[name] for name in list(running.values()) + list(waiting)],
+                      ctx.cancel_reason)
+        raise
+    finally:
+        watcher.cancel()
+        ctx._cancel_callbacks.remove(wake)